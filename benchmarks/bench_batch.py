@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import numpy as np
+import requests
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_pagination import demarrer_serveur
+from modules import recommandation
+from modules.index_titres import CARACTERES_REGEX
+
+NB_TITRES = [10, 100, 1000]
+CATEGORIES = ["films", "livres", "musiques"]
+
+
+def titres_existants(n, seed=0):
+    """
+    n recherches tirées des titres des catalogues (premier mot ou deux premiers mots),
+    comme les titres qu'un client enverrait pour une liste d'envies.
+    Les titres contenant des caractères regex sont écartés : ils peuvent faire échouer le GET.
+    """
+    rng = np.random.default_rng(seed)
+    requetes = []
+    while len(requetes) < n:
+        categorie = CATEGORIES[rng.integers(len(CATEGORIES))]
+        titres = recommandation.donnees[categorie].df["titre"].dropna()
+        titre = " ".join(str(titres.iloc[rng.integers(len(titres))]).split()[:rng.integers(1, 3)])
+        if titre and not any(c in CARACTERES_REGEX for c in titre):
+            requetes.append({"categorie": categorie, "titre": titre})
+    return requetes
+
+
+if __name__ == "__main__":
+    # Mesure du calcul de chaque réponse, sans le cache des recherches
+    recommandation.cache_recherches.actif = False
+    base = demarrer_serveur()
+    session = requests.Session()
+    params = {"limit": 5, "fields": "titre"}
+    for n in NB_TITRES:
+        requetes = titres_existants(n)
+
+        debut = time.perf_counter()
+        un_par_un = []
+        for r in requetes:
+            reponse = session.get(f"{base}/{r['categorie']}/", params={"titre": r["titre"], **params})
+            un_par_un.append(reponse.json())
+        t_get = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        lot = session.post(f"{base}/batch", params=params, json=requetes).json()
+        t_lot = time.perf_counter() - debut
+
+        identiques = all(item.get("resultats") == attendu for item, attendu in zip(lot, un_par_un))
+        print(f"{n:>5} titres : {n} GET {t_get * 1000:8.1f} ms | POST /batch {t_lot * 1000:7.1f} ms | "
+              f"x{t_get / t_lot:.1f} | résultats identiques : {identiques}")
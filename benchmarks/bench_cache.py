@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import numpy as np
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.main import Pagination, paginer, repondre, rechercher_titre
+from modules.recommandation import donnees, films_recommandations, cache_recherches
+
+NB_REQUETES = 2000
+# Termes de recherche répétés comme dans le chat : quelques-uns reviennent très souvent (loi de Zipf)
+TERMES = ["amour", "Love", "the", "nuit", "star wars", "harry", "la", "roi", "man", "war",
+          "paris", "dark", "le", "life", "girl", "night", "home", "world", "king", "blue"]
+
+
+def requetes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    poids = 1 / np.arange(1, len(TERMES) + 1)
+    return rng.choice(TERMES, n, p=poids / poids.sum())
+
+
+def mesurer(fonction, termes):
+    debut = time.perf_counter()
+    for terme in termes:
+        fonction(terme)
+    return (time.perf_counter() - debut) * 1e6 / len(termes)
+
+
+if __name__ == "__main__":
+    termes = requetes(NB_REQUETES)
+    pagination = Pagination(limit=20, offset=0, fields=None)
+    print(f"{NB_REQUETES} requêtes sur {len(TERMES)} termes")
+
+    films = donnees["films"]
+    t_sans = mesurer(lambda t: paginer(rechercher_titre(films, t, False, 10), pagination, films), termes)
+    t_avec = mesurer(lambda t: repondre(("films", t.lower(), False, None), lambda: rechercher_titre(films, t, False, 10), pagination, films), termes)
+    print(f"API /films/   : sans cache {t_sans:8.1f} µs/requête | avec cache {t_avec:6.1f} µs/requête | x{t_sans / t_avec:.0f}")
+
+    t_sans = mesurer(films_recommandations.__wrapped__, termes)
+    t_avec = mesurer(films_recommandations, termes)
+    print(f"Dashboard     : sans cache {t_sans:8.1f} µs/requête | avec cache {t_avec:6.1f} µs/requête | x{t_sans / t_avec:.0f}")
+
+    print(cache_recherches.statistiques())
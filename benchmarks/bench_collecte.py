@@ -0,0 +1,133 @@
+import json
+import os
+import sys
+import threading
+import time
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import modules.collect_data as collect_data
+
+LATENCE = 0.05  # latence simulée par réponse (secondes)
+
+
+def cle_page(chemin, params):
+    """
+    Clé d'une page enregistrée : chemin + paramètre de pagination (page, startIndex ou offset).
+    """
+    for nom in ["page", "startIndex", "offset"]:
+        if nom in params:
+            return f"{chemin.strip('/').replace('/', '_')}_{nom}_{params[nom]}"
+    return chemin.strip("/").replace("/", "_")
+
+
+class ServeurStub:
+    """
+    Serveur HTTP local qui rejoue des pages JSON enregistrées (dict clé -> contenu JSON).
+    Les pages peuvent être chargées depuis un dossier de fichiers <clé>.json.
+    """
+
+    def __init__(self, pages, latence=LATENCE):
+        self.pages = pages
+        self.nb_requetes = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                stub.nb_requetes += 1
+                time.sleep(latence)
+                contenu = stub.pages.get(cle_page(url.path, params))
+                corps = json.dumps(contenu if contenu is not None else {}).encode()
+                self.send_response(200 if contenu is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+            def log_message(self, *args):
+                pass
+
+        self.serveur = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.serveur.server_address[1]}"
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+
+    @classmethod
+    def depuis_dossier(cls, dossier, **kwargs):
+        pages = {}
+        for nom in os.listdir(dossier):
+            if nom.endswith(".json"):
+                with open(os.path.join(dossier, nom), encoding="utf-8") as f:
+                    pages[nom[:-5]] = json.load(f)
+        return cls(pages, **kwargs)
+
+    def arreter(self):
+        self.serveur.shutdown()
+
+
+def pages_synthetiques(nb_films=20, nb_livres=10, nb_musiques=5):
+    pages = {}
+    for page in range(1, nb_films + 1):
+        pages[f"films_page_{page}"] = {"results": [
+            {"title": f"Film {page}-{i}", "genre_ids": [28, 12], "overview": "Résumé", "release_date": "2024-01-01", "id": page * 100 + i}
+            for i in range(20)
+        ]}
+    for i in range(nb_livres):
+        pages[f"livres_startIndex_{i * 40}"] = {"items": [
+            {"volumeInfo": {"title": f"Livre {i}-{j}", "authors": ["Auteur"], "categories": ["Fiction"], "publishedDate": "2020", "infoLink": "http://x"}}
+            for j in range(40)
+        ]}
+    for i in range(nb_musiques):
+        pages[f"musiques_offset_{i * 200}"] = {"results": [
+            {"trackName": f"Titre {i}-{j}", "artistName": "Artiste", "collectionName": "Album", "primaryGenreName": "Pop", "releaseDate": "2019-05-01", "trackViewUrl": "http://y"}
+            for j in range(200)
+        ]}
+    return pages
+
+
+def collecte_sequentielle(stub):
+    """
+    Reproduction de l'ancienne collecte : requests.get page par page, sans session.
+    """
+    films = []
+    for page in range(1, 21):
+        data = requests.get(f"{stub.url}/films", params={"page": page}, timeout=10).json()
+        films.extend(data["results"])
+    for i in range(10):
+        requests.get(f"{stub.url}/livres", params={"startIndex": i * 40}).json()
+    for i in range(5):
+        requests.get(f"{stub.url}/musiques", params={"offset": i * 200}).json()
+    return films
+
+
+def collecte_parallele(stub, collecteur):
+    df_films = collect_data.collect_films("en-US", 20, collecteur, base_url=f"{stub.url}/films")
+    df_livres = collect_data.collect_livres("anglais", 400, collecteur, base_url=f"{stub.url}/livres")
+    df_musiques = collect_data.collect_musiques("anglais", 1000, collecteur, base_url=f"{stub.url}/musiques")
+    return df_films, df_livres, df_musiques
+
+
+if __name__ == "__main__":
+    stub = ServeurStub.depuis_dossier(sys.argv[1]) if len(sys.argv) > 1 else ServeurStub(pages_synthetiques())
+
+    debut = time.perf_counter()
+    collecte_sequentielle(stub)
+    t_sequentiel = time.perf_counter() - debut
+
+    # Débit large pour mesurer la concurrence, puis débit limité à 10 requêtes/s
+    for debit in [1000, 10]:
+        collecteur = collect_data.Collecteur(limites={stub.url.split("//")[1]: (debit, debit)})
+        debut = time.perf_counter()
+        df_films, df_livres, df_musiques = collecte_parallele(stub, collecteur)
+        t_parallele = time.perf_counter() - debut
+        collecteur.fermer()
+
+        assert df_films["titre"].tolist() == [f"Film {p}-{i}" for p in range(1, 21) for i in range(20)]
+        print(f"Débit max {debit:>5} req/s : séquentiel {t_sequentiel:.2f} s | parallèle {t_parallele:.2f} s "
+              f"({len(df_films)} films, {len(df_livres)} livres, {len(df_musiques)} musiques)")
+
+    stub.arreter()
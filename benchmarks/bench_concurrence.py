@@ -0,0 +1,115 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+import requests
+from collections import Counter
+
+# Ajout du chemin pour accéder aux modules
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RACINE)
+
+NB_CLIENTS = 200
+REQUETES_PAR_CLIENT = 10
+# Un quart de recherches lourdes (parcours complet, recherche approchée), le reste léger
+LOURDES = [
+    ("/livres/", {"titre": "e", "limit": 50}),
+    ("/livres/", {"titre": "the lord of the rngs", "approche": "true"}),
+    ("/search/", {"q": "love story", "categorie": "livres", "limit": 50}),
+]
+LEGERES = [
+    ("/films/", {"titre": "star", "limit": 5}),
+    ("/musiques/", {"titre": "love", "limit": 5, "fields": "titre"}),
+    ("/films/3/similaires", {"k": 5}),
+]
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def lancer_serveur(env):
+    """
+    Lance l'API (uvicorn, un worker) dans un processus séparé et attend qu'elle réponde.
+    """
+    port = port_libre()
+    env = dict(os.environ, RECHARGEMENT_AUTO="0", CACHE_RECHERCHES="0", **env)
+    serveur = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=RACINE, env=env, stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(600):
+        try:
+            requests.get(url, timeout=1)
+            return serveur, url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    serveur.kill()
+    raise RuntimeError("Le serveur n'a pas démarré")
+
+
+def charge(url):
+    """
+    NB_CLIENTS clients simultanés : latences (ms) par type de requête, codes de retour, durée totale.
+    """
+    latences = {"lourde": [], "legere": []}
+    codes = Counter()
+    verrou = threading.Lock()
+    depart = threading.Barrier(NB_CLIENTS)
+
+    def client(numero):
+        rng = np.random.default_rng(numero)
+        session = requests.Session()
+        depart.wait()
+        for _ in range(REQUETES_PAR_CLIENT):
+            lourde = rng.random() < 0.25
+            chemin, params = (LOURDES if lourde else LEGERES)[rng.integers(3)]
+            debut = time.perf_counter()
+            try:
+                code = session.get(url + chemin, params=params, timeout=60).status_code
+            except requests.RequestException:
+                code = "erreur"
+            with verrou:
+                # Latences des réponses abouties seulement (les refus 503 sont immédiats)
+                if code == 200:
+                    latences["lourde" if lourde else "legere"].append((time.perf_counter() - debut) * 1000)
+                codes[code] += 1
+        session.close()
+
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(NB_CLIENTS)]
+    debut = time.perf_counter()
+    for c in clients:
+        c.start()
+    for c in clients:
+        c.join()
+    return latences, codes, time.perf_counter() - debut
+
+
+if __name__ == "__main__":
+    modes = [
+        ("Recherches dans la boucle d'événements", {"NB_THREADS_RECHERCHE": "0"}),
+        ("Recherches dans le pool de threads", {}),
+        ("Pool de threads sans limite d'attente", {"MAX_EN_ATTENTE_RECHERCHE": "100000"}),
+    ]
+    print(f"{NB_CLIENTS} clients simultanés, {REQUETES_PAR_CLIENT} requêtes chacun (cache désactivé)")
+    for nom, env in modes:
+        serveur, url = lancer_serveur(env)
+        try:
+            latences, codes, duree = charge(url)
+        finally:
+            serveur.terminate()
+            serveur.wait()
+
+        total = sum(codes.values())
+        print(f"\n{nom} : {total / duree:.0f} requêtes/s, {codes[200] / duree:.0f} réponses abouties/s, codes {dict(codes)}")
+        for type_requete, valeurs in latences.items():
+            if not valeurs:
+                continue
+            p50, p95, p99 = np.percentile(valeurs, [50, 95, 99])
+            print(f"  {type_requete:<7} p50 {p50:7.1f} ms | p95 {p95:7.1f} ms | p99 {p99:7.1f} ms")
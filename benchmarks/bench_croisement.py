@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import numpy as np
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.croisement import profils_croises
+from modules.recommandation import donnees, COLONNES_SIMILARITE
+from src.main import similaires, croisees
+
+NB_REQUETES = 1000
+K = 10
+
+
+def mesurer(fonction, positions):
+    debut = time.perf_counter()
+    for position in positions:
+        fonction(position)
+    return (time.perf_counter() - debut) / len(positions) * 1e6
+
+
+if __name__ == "__main__":
+    croisements = donnees.croisements
+    print(f"Candidats entre catégories construits en {croisements.duree_construction:.2f} s")
+    profils = {categorie: profils_croises(catalogue.df, COLONNES_SIMILARITE[categorie][0])
+               for categorie, catalogue in donnees.catalogues.items()}
+
+    rng = np.random.default_rng(0)
+    for source, catalogue in donnees.catalogues.items():
+        positions = rng.integers(0, len(catalogue.df), NB_REQUETES)
+        cibles = croisements.categories_cibles(source)
+
+        # Sans précalcul : score de tous les éléments des autres catégories à chaque requête
+        def calcul_complet(position):
+            for cible in cibles:
+                scores = (profils[cible] @ profils[source][position].T).toarray().ravel()
+                np.argpartition(-scores, K - 1)[:K]
+
+        t_meme = mesurer(lambda p: catalogue.similarite.similaires(p, K), positions)
+        t_croise = mesurer(lambda p: croisements.recommander(source, p, K), positions)
+        t_complet = mesurer(calcul_complet, positions[:100])
+        # Réponses complètes de l'API (lignes encodées en JSON)
+        t_api_meme = mesurer(lambda p: similaires(source, int(p), K), positions)
+        t_api_croise = mesurer(lambda p: croisees(source, int(p), K, None), positions)
+        print(f"{source:<9} -> {', '.join(cibles):<16} | même catégorie {t_meme:6.1f} µs | "
+              f"autres catégories {t_croise:6.1f} µs | sans précalcul {t_complet:8.1f} µs | "
+              f"API : similaires {t_api_meme:6.0f} µs, croises {t_api_croise:6.0f} µs")
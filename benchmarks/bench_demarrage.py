@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import modules.config as config
+import modules.data_cleaning as data_cleaning
+
+FICHIERS = [os.path.join(data_cleaning.CLEANED_DIR, f"{nom}.csv") for nom in ["films", "livres", "musiques"]]
+
+
+def chrono(fonction, repetitions=5):
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur * 1000
+
+
+if __name__ == "__main__":
+    fichiers = [path for path in FICHIERS if os.path.exists(path)]
+    for path in fichiers:
+        if data_cleaning.lire_cache(path) is None:
+            data_cleaning.sauvegarder_cache(path, data_cleaning.hash_sources(), data_cleaning.empreintes_sources())
+
+    t_csv = chrono(lambda: [config.import_data(path) for path in fichiers])
+    t_cache = chrono(lambda: [data_cleaning.charger_donnees_nettoyees(path) for path in fichiers])
+    print(f"\nChargement des données nettoyées ({len(fichiers)} fichiers)")
+    print(f"  CSV (import_data)   : {t_csv:8.1f} ms")
+    print(f"  Cache Arrow (mmap)  : {t_cache:8.1f} ms  (x{t_csv / t_cache:.1f})")
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.facettes import IndexFacettes, _cle, _cle_langue
+from modules.genres import GENRES_TMDB, libelles_genre
+
+NB_REQUETES = 20
+# Requêtes de la mesure : (genres, langues, annee_min, annee_max)
+REQUETES = [
+    (["Action", "878"], [], None, None),
+    (["Drame"], ["anglais"], 2000, 2015),
+    ([], ["français"], 1990, None),
+    (["Comédie", "Romance", "Familial"], ["English", "français"], None, 2010),
+]
+
+
+def generer_films(n, seed=0):
+    """
+    Films synthétiques : 1 à 4 identifiants de genre TMDB par film ("28, 80, 53"), langue et année.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.array(list(GENRES_TMDB))
+    # Genres de fréquences inégales, comme dans les données réelles
+    poids = 1 / np.arange(1, len(ids) + 1)
+    tirages = rng.choice(ids, (n, 4), p=poids / poids.sum())
+    nb = rng.integers(1, 5, n)
+    return pd.DataFrame({
+        "titre": [f"Film {i}" for i in range(n)],
+        "langue": rng.choice(["anglais", "français", "English"], n, p=[0.7, 0.2, 0.1]),
+        "genre": [", ".join(map(str, ligne[:k])) for ligne, k in zip(tirages, nb)],
+        "annee": rng.integers(1950, 2026, n).astype(float),
+    })
+
+
+def filtrer_chaines(df, genres, langues, annee_min, annee_max):
+    """
+    Même filtre et mêmes facettes en parcourant les chaînes : découpage et décodage des genres ligne par ligne.
+    """
+    voulus = {_cle(libelle) for g in genres for libelle in libelles_genre(g) or [g]}
+    decodes = df["genre"].fillna("").astype(str).map(lambda v: {_cle(libelle) for libelle in libelles_genre(v)})
+    m_genre = decodes.map(lambda s: bool(s & voulus)).to_numpy() if genres else np.ones(len(df), dtype=bool)
+    langues_df = df["langue"].astype(str).map(_cle_langue)
+    m_langue = langues_df.isin([_cle_langue(l) for l in langues]).to_numpy() if langues else np.ones(len(df), dtype=bool)
+    annees = pd.to_numeric(df["annee"], errors="coerce").to_numpy()
+    m_annee = np.ones(len(df), dtype=bool)
+    if annee_min is not None:
+        m_annee &= annees >= annee_min
+    if annee_max is not None:
+        m_annee &= annees <= annee_max
+    garder = m_genre & m_langue & m_annee
+    comptes = {
+        "genre": decodes[m_langue & m_annee].explode().value_counts(),
+        "langue": langues_df[m_genre & m_annee].value_counts(),
+    }
+    return garder, comptes
+
+
+def mesurer(fonction, *args):
+    debut = time.perf_counter()
+    for _ in range(NB_REQUETES):
+        resultat = fonction(*args)
+    return (time.perf_counter() - debut) / NB_REQUETES * 1000, resultat
+
+
+def comparer(nom, df):
+    debut = time.perf_counter()
+    index = IndexFacettes(df)
+    duree = time.perf_counter() - debut
+    taille = sum(tableau.nbytes for tableau in index.tableaux().values()) / 1e6
+    print(f"{nom} : {len(df)} éléments, index construit en {duree:.2f} s ({taille:.1f} Mo)")
+
+    for genres, langues, annee_min, annee_max in REQUETES:
+        t_chaines, (attendu, comptes) = mesurer(filtrer_chaines, df, genres, langues, annee_min, annee_max)
+        t_bits, (garder, facettes) = mesurer(index.filtrer, genres, langues, annee_min, annee_max, None, True)
+        identiques = (
+            np.array_equal(attendu, garder)
+            and all(comptes["genre"].get(_cle(libelle), 0) == nombre for libelle, nombre in facettes["genre"].items())
+            and all(comptes["langue"].get(_cle_langue(libelle), 0) == nombre for libelle, nombre in facettes["langue"].items())
+        )
+        print(f"  genre={genres} langue={langues} années=[{annee_min}, {annee_max}] : {int(garder.sum())} résultats | "
+              f"chaînes {t_chaines:8.2f} ms | bitsets {t_bits:6.2f} ms (x{t_chaines / t_bits:.0f}) | identiques : {identiques}")
+
+
+if __name__ == "__main__":
+    from modules import recommandation
+    for categorie in ["films", "livres", "musiques"]:
+        comparer(categorie, recommandation.donnees[categorie].df)
+
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    NB_REQUETES = 3
+    comparer("Films synthétiques", generer_films(nb))
@@ -0,0 +1,78 @@
+import csv
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.config import import_data
+
+MOTS = np.array(["amour", "nuit", "guerre", "Paris", "étoile", "été", "cœur", "secret", "ombre", "de", "la"])
+
+
+# Chargement d'origine : un sniff et une lecture complète (moteur C) par encodage essayé
+def ancien_import_data(path):
+    for enc in ['utf-8', 'latin1', 'ISO-8859-1']:
+        try:
+            with open(path, 'r', encoding=enc, errors='ignore') as f:
+                sample = f.readline()
+            sep = csv.Sniffer().sniff(sample).delimiter
+            return pd.read_csv(path, encoding=enc, sep=sep)
+        except Exception:
+            continue
+
+
+def generer(n, seed=0):
+    rng = np.random.default_rng(seed)
+    annees = rng.integers(1950, 2025, n).astype(float)
+    annees[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        "year": annees,
+        "title": [f"{a} {b} {i}" for i, (a, b) in enumerate(zip(rng.choice(MOTS, n), rng.choice(MOTS, n)))],
+        "author": rng.choice(["Kosinski, Joseph", "Miller, George", "Tirard, Laurent", np.nan], n),
+        "publisher": rng.choice(["Paris : Gallimard, 2021", "Arles : Actes Sud ; Montréal : Leméac", "Paris : Seuil"], n),
+        "classification": rng.choice(["AV TOPG", "F TROI", "R DUP"], n),
+        "library": rng.choice(["CABANIS", "SAINT-CYPRIEN"], n),
+    })
+
+
+def chrono(fonction, repetitions=3):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        durees.append(time.perf_counter() - debut)
+    return min(durees), resultat
+
+
+if __name__ == "__main__":
+    nb_lignes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = generer(nb_lignes)
+    entrees = [
+        ("utf-8, virgules", dict(encoding="utf-8", sep=",")),
+        ("latin-1, virgules", dict(encoding="latin1", sep=",")),
+        ("utf-8 (BOM), points-virgules", dict(encoding="utf-8-sig", sep=";")),
+    ]
+    with tempfile.TemporaryDirectory() as dossier:
+        for nom, options in entrees:
+            chemin = os.path.join(dossier, "entree.csv")
+            # Les caractères absents du latin-1 (œ) sont remplacés
+            df.to_csv(chemin, index=False, errors="replace", **options)
+            taille = os.path.getsize(chemin) / 1e6
+
+            t_ancien, ancien = chrono(lambda: ancien_import_data(chemin))
+            t_nouveau, nouveau = chrono(lambda: import_data(chemin))
+            with open(chemin, "rb") as f:
+                donnees = f.read()
+            televerse = BytesIO(donnees)
+            televerse.name = "entree.csv"
+            t_televerse, _ = chrono(lambda: import_data(televerse))
+
+            identique = ancien.equals(nouveau) and list(ancien.dtypes) == list(nouveau.dtypes) \
+                and list(ancien.columns) == list(nouveau.columns)
+            print(f"{nom:<30} {taille:6.0f} Mo | moteur C, un essai par encodage {t_ancien:6.2f} s | "
+                  f"détection + moteur C {t_nouveau:6.2f} s (fichier uploadé {t_televerse:6.2f} s) | identique : {identique}")
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.index_titres import IndexTitres, filtrer_par_titre, rechercher_titres_approches
+
+MOTS = ["amour", "nuit", "guerre", "Paris", "retour", "roi", "étoile", "Dernier", "secret", "ombre",
+        "voyage", "maison", "ciel", "Mer", "histoire", "temps", "fille", "garçon", "ville", "Rêve"]
+REQUETES = ["amour", "nuit", "ret", "roi d", "Étoile", "secret de la", "zzz", "ombre 12"]
+# Requêtes avec fautes de frappe pour la recherche approchée
+REQUETES_APPROCHEES = ["amuor", "secert de la", "etoile dernier", "le voyge 42", "zzz"]
+
+
+def generer_titres(n, seed=0):
+    """
+    Génère n titres synthétiques (3 à 6 mots + un numéro), avec quelques valeurs manquantes.
+    """
+    rng = np.random.default_rng(seed)
+    mots = np.array(MOTS + ["de", "la", "le", "des"])
+    titres = [" ".join(rng.choice(mots, rng.integers(3, 7))) + f" {i % 997}" for i in range(n)]
+    for i in range(0, n, 1000):
+        titres[i] = None
+    return pd.DataFrame({"titre": titres})
+
+
+def chrono(fonction, repetitions):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        result = fonction()
+    return (time.perf_counter() - debut) / repetitions * 1000, result
+
+
+if __name__ == "__main__":
+    for n in [int(x) for x in sys.argv[1:]] or [10_000, 100_000, 1_000_000]:
+        df = generer_titres(n)
+        debut = time.perf_counter()
+        index = IndexTitres(df["titre"])
+        construction = time.perf_counter() - debut
+        print(f"\n{n} lignes - construction de l'index : {construction:.2f} s")
+
+        repetitions = 20 if n < 1_000_000 else 3
+        for requete in REQUETES:
+            t_scan, attendu = chrono(lambda: df[df["titre"].str.contains(requete, case=False, na=False)], repetitions)
+            t_index, obtenu = chrono(lambda: filtrer_par_titre(df, index, requete), repetitions)
+            assert obtenu.index.equals(attendu.index), requete
+            print(f"  {requete!r:16} {len(attendu):>8} résultats | scan {t_scan:8.2f} ms | index {t_index:8.2f} ms | x{t_scan / max(t_index, 1e-6):.1f}")
+
+        for requete in REQUETES_APPROCHEES:
+            t_approche, obtenu = chrono(lambda: rechercher_titres_approches(df, index, requete, k=10), 20)
+            meilleur = f"{obtenu['titre'].iloc[0]!r} ({obtenu['score'].iloc[0]})" if len(obtenu) else "-"
+            print(f"  approchée {requete!r:18} top-10 en {t_approche:6.2f} ms | meilleur : {meilleur}")
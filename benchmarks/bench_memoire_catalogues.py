@@ -0,0 +1,141 @@
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Ajout du chemin pour accéder aux modules
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RACINE)
+
+MOTS = np.array(["amour", "nuit", "guerre", "Paris", "retour", "roi", "étoile", "dernier", "secret", "ombre",
+                 "une", "histoire", "de", "la", "jeune", "femme", "ville", "famille", "voyage", "mystère"])
+
+
+def memoire():
+    """
+    Mémoire du processus (Mo) d'après /proc/self/smaps_rollup (Linux) : RSS, et mémoire anonyme
+    (tas Python, tableaux numpy...) ; la différence est faite de pages de fichiers memory-mappés, partageables.
+    """
+    valeurs = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for ligne in f:
+            parts = ligne.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                valeurs[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {"rss": valeurs["Rss"], "anonyme": valeurs["Anonymous"]}
+
+
+def generer_catalogue(n, seed=0):
+    rng = np.random.default_rng(seed)
+    mots = rng.choice(MOTS, (n, 30))
+    return pd.DataFrame({
+        "titre": [f"{a} {b} {i}" for i, (a, b) in enumerate(zip(mots[:, 0], mots[:, 1]))],
+        "langue": rng.choice(["français", "anglais"], n),
+        "genre": rng.choice(["Fiction", "Policier", "Histoire", "Jeunesse", "28, 80", "Pop", "Inconnu"], n),
+        "description": [" ".join(ligne) for ligne in mots],
+        "source": [f"https://www.themoviedb.org/movie/{i}" for i in range(n)],
+        "auteur": np.where(rng.random(n) < 0.6, "Inconnu", np.array([f"Auteur {i}" for i in rng.integers(0, 20000, n)])),
+        "annee": rng.integers(1950, 2025, n).astype(float),
+    })
+
+
+def enfant_actuel():
+    """
+    Worker de l'API sur les données actuelles : mémoire après chargement, puis après 2000 pages de résultats.
+    """
+    from modules import recommandation
+    charge = memoire()
+    rng = np.random.default_rng(0)
+    for catalogue in recommandation.donnees.catalogues.values():
+        for _ in range(2000):
+            debut = int(rng.integers(0, max(len(catalogue.df) - 20, 1)))
+            catalogue.fragments.encoder(catalogue.df.iloc[debut:debut + 20])
+    gc.collect()
+    print(json.dumps({"charge": charge, "requetes": memoire()}), flush=True)
+
+
+def enfant_synthetique(chemin, compact):
+    """
+    Catalogue synthétique lu depuis son cache Arrow : DataFrame, fragments JSON et colonne de recherche,
+    puis 2000 pages de résultats et 20 recherches par mots-clés sur cette colonne.
+    """
+    from modules.data_cleaning import df_compact, lire_arrow
+    from modules.recherche import colonne_recherche, rechercher_mots_cles
+    from modules.serialisation import FragmentsJSON
+    avant = memoire()
+    table = lire_arrow(chemin)
+    if compact:
+        df = df_compact(table)
+        fragments = FragmentsJSON(df, ["description"], compact=True)
+    else:
+        df = table.to_pandas()
+        fragments = FragmentsJSON(df)
+    recherche = colonne_recherche(df)
+    del table
+    gc.collect()
+    charge = memoire()
+
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        debut = int(rng.integers(0, len(df) - 20))
+        fragments.encoder(df.iloc[debut:debut + 20])
+    gc.collect()
+    requetes = memoire()
+
+    debut = time.perf_counter()
+    for mots in rng.choice(MOTS, (20, 2)):
+        rechercher_mots_cles(df, recherche, list(mots), mode="et")
+    duree_recherche = (time.perf_counter() - debut) / 20
+    gc.collect()
+    print(json.dumps({"avant": avant, "charge": charge, "requetes": requetes, "recherches": memoire(),
+                      "duree_recherche": duree_recherche}), flush=True)
+
+
+def lancer(*args, env=None):
+    sortie = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args], cwd=RACINE,
+        env=dict(os.environ, RECHARGEMENT_AUTO="0", **(env or {})), capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(sortie.strip().split("\n")[-1])
+
+
+def afficher(libelle, mesure):
+    print(f"  {libelle:<28} : RSS {mesure['rss']:7.0f} Mo | mémoire anonyme {mesure['anonyme']:7.0f} Mo")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--actuel":
+        enfant_actuel()
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == "--synthetique":
+        enfant_synthetique(sys.argv[2], sys.argv[3] == "1")
+        sys.exit()
+
+    print("Données actuelles (un worker de l'API)")
+    for compact in ["0", "1"]:
+        mesures = lancer("--actuel", env={"CATALOGUES_COMPACTS": compact})
+        print(" Catalogues compacts" if compact == "1" else " Colonnes object")
+        afficher("après chargement", mesures["charge"])
+        afficher("après 6000 pages de 20", mesures["requetes"])
+
+    nb = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"\nCatalogue synthétique de {nb} éléments (données, fragments JSON, colonne de recherche)")
+    from modules.data_cleaning import ecrire_arrow
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "catalogue.arrow")
+        ecrire_arrow(pa.Table.from_pandas(generer_catalogue(nb), preserve_index=False), chemin)
+        print(f"  (cache Arrow : {os.path.getsize(chemin) / 1e6:.0f} Mo)")
+        for compact in ["0", "1"]:
+            mesures = lancer("--synthetique", chemin, compact)
+            print(" Catalogue compact" if compact == "1" else " Colonnes object")
+            afficher("processus vide", mesures["avant"])
+            afficher("après chargement", mesures["charge"])
+            afficher("après 2000 pages de 20", mesures["requetes"])
+            afficher("après 20 recherches", mesures["recherches"])
+            print(f"  {'recherche (2 mots-clés)':<28} : {mesures['duree_recherche'] * 1000:7.0f} ms")
@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+# Ajout du chemin pour accéder aux modules
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RACINE)
+
+NB_PROCESSUS = [1, 2, 4]
+
+
+def memoire():
+    """
+    Mémoire du processus (Mo) d'après /proc/self/smaps_rollup (Linux) :
+    RSS, PSS (pages partagées réparties entre les processus) et USS (pages privées).
+    """
+    valeurs = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for ligne in f:
+            parts = ligne.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                valeurs[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": valeurs["Rss"],
+        "pss": valeurs["Pss"],
+        "uss": valeurs["Private_Clean"] + valeurs["Private_Dirty"],
+    }
+
+
+def enfant():
+    """
+    Processus « worker » : charge les données, les parcourt entièrement comme le ferait
+    un worker après quelques heures de requêtes, puis affiche sa mémoire quand tous les processus sont prêts.
+    """
+    from modules import recommandation
+    for catalogue in recommandation.donnees.catalogues.values():
+        catalogue.fragments.encoder(catalogue.df)
+        catalogue.index.candidats("the")
+        catalogue.recherche.str.contains("a", regex=False)
+        catalogue.similarite.voisins.sum()
+    print("pret", flush=True)
+    sys.stdin.readline()
+    print(json.dumps(memoire()), flush=True)
+    sys.stdin.read()
+
+
+def mesurer(nb, partage):
+    env = dict(os.environ, DONNEES_PARTAGEES="1" if partage else "0", RECHARGEMENT_AUTO="0")
+    processus, mesures = [], []
+    for _ in range(nb):
+        p = subprocess.Popen([sys.executable, __file__, "--enfant"], cwd=RACINE, env=env,
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        processus.append(p)
+        for ligne in p.stdout:
+            if ligne.startswith("pret"):
+                break
+
+    # Mesure une fois tous les processus chargés : le partage dépend des processus présents
+    for p in processus:
+        p.stdin.write("\n")
+        p.stdin.flush()
+        for ligne in p.stdout:
+            if ligne.startswith("{"):
+                mesures.append(json.loads(ligne))
+                break
+    for p in processus:
+        p.stdin.close()
+        p.wait()
+    return mesures
+
+
+if __name__ == "__main__":
+    if "--enfant" in sys.argv:
+        enfant()
+        sys.exit(0)
+
+    # Publication préalable des données partagées (faite une fois, par le premier processus)
+    mesurer(1, True)
+    for partage in [False, True]:
+        print(f"\n{'Données partagées (memory-map)' if partage else 'Chargement par processus'}")
+        for nb in NB_PROCESSUS:
+            mesures = mesurer(nb, partage)
+            rss = sum(m["rss"] for m in mesures) / nb
+            uss = sum(m["uss"] for m in mesures) / nb
+            pss = sum(m["pss"] for m in mesures)
+            print(f"  {nb} processus : RSS moyen {rss:7.1f} Mo | privé (USS) moyen {uss:7.1f} Mo | PSS total {pss:7.1f} Mo")
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import timeit
+from urllib.parse import urlencode
+
+# Ajout du chemin pour accéder aux modules
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RACINE)
+from modules.metriques import MiddlewareMetriques, etape, compter, mesurer as mesures_bloc
+
+NB_REQUETES = 1000
+NB_TOURS = 5
+# Requêtes mesurées : réponses en cache (les plus rapides, où le surcoût pèse le plus) et recherches recalculées
+REQUETES = [
+    ("GET /health", "/health", {}),
+    ("GET /films/ (en cache)", "/films/", {"titre": "love", "limit": 20}),
+    ("GET /search/ (en cache)", "/search/", {"q": "amour roman", "categorie": "livres"}),
+    ("GET /films/{id}/similaires", "/films/3/similaires", {"k": 10}),
+    ("GET /personnalise/", "/personnalise/", {"genres": "Action", "k": 10}),
+]
+
+
+async def appeler(app, chemin, params):
+    """
+    Une requête ASGI directe (sans client HTTP ni réseau) : renvoie le nombre d'octets du corps.
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": chemin, "raw_path": chemin.encode(), "root_path": "", "query_string": urlencode(params).encode(),
+        "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 1), "server": ("localhost", 80),
+    }
+    corps = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            corps.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return sum(map(len, corps))
+
+
+def enfant():
+    """
+    Durée par requête (µs, meilleure de NB_TOURS séries), requêtes ASGI directes dans le même processus.
+    """
+    import src.main as main
+    from modules import recommandation
+    recommandation.donnees
+
+    async def mesurer_requetes():
+        mesures = {}
+        for libelle, chemin, params in REQUETES:
+            for _ in range(500):
+                await appeler(main.app, chemin, params)
+            durees = []
+            for _ in range(NB_TOURS):
+                debut = time.perf_counter()
+                for _ in range(NB_REQUETES):
+                    await appeler(main.app, chemin, params)
+                durees.append((time.perf_counter() - debut) / NB_REQUETES * 1e6)
+            mesures[libelle] = min(durees)
+        debut = time.perf_counter()
+        mesures["taille /metrics"] = await appeler(main.app, "/metrics", {})
+        mesures["GET /metrics"] = (time.perf_counter() - debut) * 1e6
+        return mesures
+
+    print(json.dumps(asyncio.run(mesurer_requetes())), flush=True)
+
+
+async def application_vide(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def duree_appels(app, n=100_000):
+    debut = time.perf_counter()
+    for _ in range(n):
+        await appeler(app, "/health", {})
+    return (time.perf_counter() - debut) / n * 1e6
+
+
+def etape_et_compteur():
+    with etape("recherche"):
+        compter("lignes_parcourues", 10)
+
+
+def mesurer(actives):
+    sortie = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--enfant"], cwd=RACINE,
+        env=dict(os.environ, METRIQUES="1" if actives else "0", RECHARGEMENT_AUTO="0", PRECHARGEMENT="0"),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(sortie.strip().split("\n")[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--enfant":
+        enfant()
+        sys.exit()
+
+    # Coût d'une étape et d'un compteur hors requête mesurée (métriques désactivées)
+    n = 1_000_000
+    hors = timeit.timeit(etape_et_compteur, number=n) / n * 1e9
+    with mesures_bloc():
+        dans = timeit.timeit(etape_et_compteur, number=n) / n * 1e9
+    print(f"with etape(...) + compter(...) : {hors:.0f} ns sans mesures en cours | {dans:.0f} ns dans une requête mesurée")
+    nu = asyncio.run(duree_appels(application_vide))
+    enveloppe = asyncio.run(duree_appels(MiddlewareMetriques(application_vide)))
+    print(f"Middleware sur une application vide : {nu:.1f} µs sans | {enveloppe:.1f} µs avec ({enveloppe - nu:+.1f} µs par requête)\n")
+
+    sans, avec = mesurer(False), mesurer(True)
+    print(f"Durée par requête, meilleure de {NB_TOURS} séries de {NB_REQUETES} (appels ASGI directs, sans client HTTP ni réseau)")
+    for libelle, *_ in REQUETES:
+        print(f"  {libelle:<28} : METRIQUES=0 {sans[libelle]:7.0f} µs | METRIQUES=1 {avec[libelle]:7.0f} µs "
+              f"({avec[libelle] - sans[libelle]:+.0f} µs, {(avec[libelle] / sans[libelle] - 1) * 100:+.1f} %)")
+    print(f"\nGET /metrics : {avec['GET /metrics'] / 1000:.1f} ms, {avec['taille /metrics']} octets")
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.recherche import colonne_recherche, rechercher_mots_cles
+
+MOTS = ["amour", "nuit", "guerre", "Paris", "retour", "roi", "étoile", "Dernier", "secret", "ombre"]
+
+
+def generer_catalogue(n, seed=0):
+    rng = np.random.default_rng(seed)
+    mots = np.array(MOTS + ["de", "la", "le"])
+    return pd.DataFrame({
+        "titre": [" ".join(rng.choice(mots, 4)) for _ in range(n)],
+        "auteur": [f"Auteur {i}" for i in rng.integers(0, 500, n)],
+        "genre": rng.choice(["Roman", "Policier", "Histoire"], n),
+        "annee": rng.integers(1950, 2025, n).astype(float),
+    })
+
+
+if __name__ == "__main__":
+    for n in [10_000, 100_000]:
+        df = generer_catalogue(n)
+        debut = time.perf_counter()
+        colonne = colonne_recherche(df)
+        construction = (time.perf_counter() - debut) * 1000
+
+        mots_cles = "etoile policier"
+        debut = time.perf_counter()
+        ancien = df[df.apply(lambda row: any(kw.lower() in str(row).lower() for kw in mots_cles.split()), axis=1)]
+        t_ancien = (time.perf_counter() - debut) * 1000
+
+        debut = time.perf_counter()
+        for _ in range(10):
+            nouveau = rechercher_mots_cles(df, colonne, mots_cles, "ou")
+        t_nouveau = (time.perf_counter() - debut) * 100
+
+        print(f"{n:>7} lignes | colonne construite en {construction:7.1f} ms | apply par ligne {t_ancien:9.1f} ms "
+              f"({len(ancien)}) | vectorisé {t_nouveau:6.1f} ms ({len(nouveau)})")
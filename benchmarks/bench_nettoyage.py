@@ -0,0 +1,156 @@
+import gc
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import modules.data_cleaning as data_cleaning
+from modules.data_cleaning import hash_fichier
+
+MOTS = np.array(["amour", "nuit", "guerre", "Paris", "retour", "roi", "étoile", "dernier", "secret", "ombre", "de", "la"])
+GENRES = np.array(["Fiction", "History", "Romance", "Policier", "Roman", "Jeunesse", np.nan], dtype=object)
+LANGUES = np.array(["français", "English", "anglais", np.nan], dtype=object)
+
+
+def _titres(rng, n):
+    # Environ un titre sur dix en double
+    numeros = rng.integers(0, int(n * 0.9), n)
+    return np.array([f"{a} {b} {i}" for a, b, i in zip(rng.choice(MOTS, n), rng.choice(MOTS, n), numeros)], dtype=object)
+
+
+def _avec_na(rng, valeurs, proportion):
+    valeurs = np.asarray(valeurs)
+    valeurs = valeurs.astype(float if np.issubdtype(valeurs.dtype, np.number) else object)
+    valeurs[rng.random(len(valeurs)) < proportion] = np.nan
+    return valeurs
+
+
+def generer_sources(n, seed=0):
+    """
+    Sources brutes synthétiques des livres (n lignes au total), déjà renommées comme à la lecture des fichiers.
+    """
+    rng = np.random.default_rng(seed)
+    tailles = {"livres_fr": n // 10, "livres_toulouse": n // 2, "livres_en": n - n // 10 - n // 2}
+    sources = {}
+
+    m = tailles["livres_fr"]
+    sources["livres_fr"] = pd.DataFrame({
+        "titre": _titres(rng, m),
+        "auteur": _avec_na(rng, [f"Auteur {i}" for i in rng.integers(0, 5000, m)], 0.05),
+        "langue": "français",
+        "genre": rng.choice(GENRES, m),
+        "description": _avec_na(rng, rng.choice(MOTS, m), 0.3),
+        "annee": _avec_na(rng, rng.integers(1950, 2025, m), 0.02),
+        "source": [f"http://books.google.com/books?id={i}" for i in range(m)],
+    })
+
+    m = tailles["livres_toulouse"]
+    sources["livres_toulouse"] = pd.DataFrame({
+        "year": _avec_na(rng, rng.integers(2000, 2024, m), 0.01),
+        "title": _titres(rng, m),
+        "author": _avec_na(rng, [f"Nom {i}, Prénom" for i in rng.integers(0, 20000, m)], 0.1),
+        "publisher": rng.choice(["Paris : Gallimard", "Paris : Seuil", "Arles : Actes Sud"], m),
+        "classification": rng.choice(["R DUP", "BD", "AV TOPG", np.nan], m),
+        "library": rng.choice(["CABANIS", "JOSE CABANIS", "SAINT-CYPRIEN"], m),
+    })
+
+    m = tailles["livres_en"]
+    sources["livres_en"] = pd.DataFrame({
+        "Year_published": _avec_na(rng, rng.integers(1900, 2024, m), 0.05),
+        "Original_Book_Title": _titres(rng, m),
+        "Author_Name": _avec_na(rng, [f"Writer {i}" for i in rng.integers(0, 50000, m)], 0.02),
+        "Genres": rng.choice(GENRES, m),
+        "Book_Description": _avec_na(rng, rng.choice(MOTS, m), 0.1),
+        "Edition_Language": rng.choice(LANGUES, m),
+    })
+    return sources
+
+
+# Nettoyage d'origine (apply ligne par ligne, fillna en place colonne par colonne), pour comparaison
+def ancien_traitement_na(data):
+    num_cols = data.select_dtypes(exclude="object")
+    cat_cols = data.select_dtypes(include="object")
+    df = pd.concat([cat_cols, num_cols], axis=1)
+    percent_na = (df.isnull().sum() / len(df)) * 100
+    for col in df.columns:
+        if percent_na[col] > 20:
+            df.drop(columns=[col], inplace=True)
+        elif percent_na[col] > 0:
+            if df[col].dtype == "object":
+                df.fillna({col: "Inconnu"}, inplace=True)
+            else:
+                df.fillna({col: df[col].median()}, inplace=True)
+    return df
+
+
+def ancien_nettoyage(sources):
+    temps = {}
+    debut = time.perf_counter()
+    livres_en = sources["livres_en"]
+    livres_en["source"] = livres_en.apply(lambda x: f"{x['annee']} - {x['titre']} - {x['auteur']}", axis=1)
+    temps["source"] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    df = pd.concat([sources[nom] for nom in data_cleaning.CATEGORIES["livres"]], ignore_index=True)
+    df = ancien_traitement_na(df)
+    temps["valeurs manquantes"] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    df = df.drop_duplicates(subset="titre")
+    temps["doublons"] = time.perf_counter() - debut
+    return df, temps
+
+
+def nouveau_nettoyage(sources):
+    temps = {}
+    debut = time.perf_counter()
+    livres_en = sources["livres_en"]
+    livres_en["source"] = data_cleaning.source_livres(livres_en)
+    temps["source"] = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    df, _ = data_cleaning.nettoyer_categorie("livres", sources)
+    temps["valeurs manquantes + doublons"] = time.perf_counter() - debut
+    return df, temps
+
+
+def preparer(sources):
+    # Même renommage que preparer_source, sans la construction de la colonne source (mesurée à part)
+    sources = {nom: df.copy() for nom, df in sources.items()}
+    sources["livres_toulouse"] = sources["livres_toulouse"].rename(columns={
+        "year": "annee", "title": "titre", "author": "auteur", "classification": "genre",
+        "publisher": "description", "library": "source",
+    })
+    sources["livres_toulouse"]["langue"] = "français"
+    sources["livres_en"] = sources["livres_en"].rename(columns={
+        "Year_published": "annee", "Original_Book_Title": "titre", "Author_Name": "auteur",
+        "Genres": "genre", "Book_Description": "description", "Edition_Language": "langue",
+    })
+    return sources
+
+
+if __name__ == "__main__":
+    nb_lignes = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    brutes = generer_sources(nb_lignes)
+    print(f"{nb_lignes} lignes synthétiques (livres : 3 sources)")
+
+    hashs = {}
+    with tempfile.TemporaryDirectory() as dossier:
+        for nom, nettoyage in [("apply + fillna en place", ancien_nettoyage), ("vectorisé", nouveau_nettoyage)]:
+            df, temps = nettoyage(preparer(brutes))
+            total = sum(temps.values())
+            chemin = os.path.join(dossier, f"{len(hashs)}.csv")
+            df.to_csv(chemin, index=False, encoding="utf-8")
+            hashs[nom] = hash_fichier(chemin)
+            os.remove(chemin)
+            details = " | ".join(f"{etape} {duree:6.2f} s" for etape, duree in temps.items())
+            print(f"{nom:<24} : {total:6.2f} s ({details}) | {len(df)} lignes, "
+                  f"{df.memory_usage(deep=True).sum() / 1e6:.0f} Mo")
+            del df
+            gc.collect()
+
+    print("Fichiers nettoyés identiques :", len(set(hashs.values())) == 1)
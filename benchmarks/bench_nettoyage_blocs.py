@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import modules.config as config
+import modules.data_cleaning as data_cleaning
+from bench_nettoyage import generer_sources
+
+
+def ecrire_sources(dossier, nb_lignes):
+    """
+    Fichiers bruts synthétiques des livres, avec leurs noms de colonnes et séparateurs d'origine.
+    """
+    sources = generer_sources(nb_lignes)
+    sources["livres_toulouse"].to_csv(os.path.join(dossier, "livres_toulouse.csv"), sep=";", index=False)
+    for nom in ["livres_fr", "livres_en"]:
+        sources[nom].to_csv(os.path.join(dossier, f"{nom}.csv"), index=False)
+
+
+def pic_memoire():
+    """
+    Pic de mémoire résidente du processus (Mo), d'après /proc/self/status (Linux).
+    """
+    with open("/proc/self/status") as f:
+        for ligne in f:
+            if ligne.startswith("VmHWM:"):
+                return int(ligne.split()[1]) / 1024
+
+
+def nettoyer(mode, dossier):
+    """
+    Nettoyage des livres (en mémoire ou par blocs) dans ce processus : durée et pic de mémoire.
+    """
+    for nom in data_cleaning.CATEGORIES["livres"]:
+        data_cleaning.SOURCES[nom] = os.path.join(dossier, f"{nom}.csv")
+    csv_path = os.path.join(dossier, f"nettoye_{mode}.csv")
+
+    debut = time.perf_counter()
+    if mode == "blocs":
+        nb_lignes = data_cleaning.nettoyer_categorie_par_blocs("livres", csv_path)
+    else:
+        sources = {
+            nom: data_cleaning.preparer_source(nom, config.import_data(data_cleaning.SOURCES[nom]))
+            for nom in data_cleaning.CATEGORIES["livres"]
+        }
+        df, nb_lignes = data_cleaning.nettoyer_categorie("livres", sources)
+        df.to_csv(csv_path, index=False, encoding="utf-8")
+    duree = time.perf_counter() - debut
+    print(f"{duree:.2f} {pic_memoire():.0f} {nb_lignes}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        nettoyer(sys.argv[2], sys.argv[3])
+        sys.exit()
+
+    nb_lignes = int(sys.argv[1]) if len(sys.argv) > 1 else 3_000_000
+    with tempfile.TemporaryDirectory() as dossier:
+        ecrire_sources(dossier, nb_lignes)
+        taille = sum(os.path.getsize(os.path.join(dossier, f)) for f in os.listdir(dossier)) / 1e6
+        print(f"{nb_lignes} lignes brutes ({taille:.0f} Mo de CSV), blocs de {data_cleaning.TAILLE_BLOC} lignes")
+
+        hashs = {}
+        for mode, libelle in [("memoire", "Tout en mémoire"), ("blocs", "Par blocs")]:
+            # Un processus par mode : le pic de mémoire de l'un ne compte pas pour l'autre
+            sortie = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, dossier],
+                capture_output=True, text=True, check=True,
+            ).stdout.split("\n")
+            duree, pic, lignes = sortie[-2].split()
+            hashs[mode] = data_cleaning.hash_fichier(os.path.join(dossier, f"nettoye_{mode}.csv"))
+            print(f"{libelle:<16} : {float(duree):6.1f} s | pic de mémoire {float(pic):6.0f} Mo | {lignes} lignes")
+
+        print("Fichiers nettoyés identiques :", hashs["memoire"] == hashs["blocs"])
@@ -0,0 +1,82 @@
+import os
+import sys
+import socket
+import threading
+import time
+import numpy as np
+import requests
+import uvicorn
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.main import app
+from modules import recommandation
+from modules.index_titres import filtrer_par_titre
+
+REQUETES = ["a", "the", "love", "nuit"]
+NB_CLIENTS = 8
+NB_APPELS = 40
+
+
+# Ancien comportement (tout le résultat sérialisé), pour comparaison
+@app.get("/bench/films/", include_in_schema=False)
+async def films_complets(titre: str):
+    films = recommandation.donnees["films"]
+    return filtrer_par_titre(films.df, films.index, titre).to_dict(orient='records')
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def demarrer_serveur():
+    """
+    Lance l'API dans un thread avec uvicorn et renvoie son URL.
+    """
+    port = port_libre()
+    serveur = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=serveur.run, daemon=True).start()
+    while not serveur.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def charge(url, params):
+    """
+    NB_APPELS requêtes réparties sur NB_CLIENTS clients : (latences en ms, taille moyenne en octets).
+    """
+    session = requests.Session()
+
+    def appel(_):
+        debut = time.perf_counter()
+        reponse = session.get(url, params=params)
+        reponse.raise_for_status()
+        return (time.perf_counter() - debut) * 1000, len(reponse.content)
+
+    with ThreadPoolExecutor(NB_CLIENTS) as pool:
+        mesures = list(pool.map(appel, range(NB_APPELS)))
+    session.close()
+    latences = np.array([m[0] for m in mesures])
+    return latences, np.mean([m[1] for m in mesures])
+
+
+if __name__ == "__main__":
+    # Mesure du calcul de chaque réponse, sans le cache des recherches
+    recommandation.cache_recherches.actif = False
+    base = demarrer_serveur()
+    films = recommandation.donnees["films"]
+    print(f"{len(films.df)} films, {NB_CLIENTS} clients, {NB_APPELS} requêtes par cas")
+    variantes = [
+        ("sans pagination", "/bench/films/", {}),
+        ("page par défaut", "/films/", {}),
+        ("limit=10, titre+source", "/films/", {"limit": 10, "fields": "titre,source"}),
+    ]
+    for titre in REQUETES:
+        total = len(filtrer_par_titre(films.df, films.index, titre))
+        print(f"\ntitre={titre!r} ({total} résultats)")
+        for nom, chemin, params in variantes:
+            latences, taille = charge(base + chemin, {"titre": titre, **params})
+            print(f"  {nom:<24} {taille / 1024:>9.1f} Ko  p50 {np.percentile(latences, 50):7.1f} ms  p95 {np.percentile(latences, 95):7.1f} ms")
@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.personnalisation import MoteurPersonnalise
+
+GENRES = [f"Genre {i}" for i in range(200)]
+NB_REQUETES = 50
+
+
+def generer_catalogue(n, seed=0):
+    """
+    Catalogue synthétique : 1 à 3 genres parmi 200, 50 000 auteurs, années 1950-2025.
+    """
+    rng = np.random.default_rng(seed)
+    genres = np.array(GENRES)
+    nb_genres = rng.integers(1, 4, n)
+    tirages = genres[rng.integers(0, len(GENRES), (n, 3))]
+    return pd.DataFrame({
+        "genre": [", ".join(t[:k]) for t, k in zip(tirages, nb_genres)],
+        "auteur": pd.Series(rng.integers(0, 50_000, n)).map("Auteur {}".format),
+        "annee": rng.integers(1950, 2026, n).astype(float),
+    })
+
+
+def tri_complet(moteur, preferences, k):
+    # Ancienne approche pour comparaison : tri de tout le catalogue
+    scores = moteur.matrice @ preferences
+    ordre = np.argsort(-scores, kind="stable")[:k]
+    return ordre[scores[ordre] > 0]
+
+
+def mesurer(fonction, requetes):
+    debut = time.perf_counter()
+    for args in requetes:
+        fonction(*args)
+    return (time.perf_counter() - debut) / len(requetes) * 1000
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    for n in [10_000, 100_000, 1_000_000]:
+        moteur = MoteurPersonnalise(generer_catalogue(n), "auteur")
+        requetes = [
+            moteur.preferences(rng.choice(GENRES, 3), [f"Auteur {i}" for i in rng.integers(0, 50_000, 2)], 1990, 2010)
+            for _ in range(NB_REQUETES)
+        ]
+        # Mêmes résultats (positions) avec la sélection partielle et avec le tri complet
+        for preferences in requetes[:5]:
+            assert np.array_equal(moteur.classer(preferences, 10)[0], tri_complet(moteur, preferences, 10))
+
+        t_partiel = mesurer(lambda p: moteur.classer(p, 10), [(p,) for p in requetes])
+        t_complet = mesurer(lambda p: tri_complet(moteur, p, 10), [(p,) for p in requetes])
+        t_preferences = mesurer(moteur.preferences, [(rng.choice(GENRES, 3), ["Auteur 1"], 1990, 2010)] * NB_REQUETES)
+        print(f"{n:>9} éléments | construction {moteur.duree_construction:6.2f} s | "
+              f"{moteur.matrice.data.nbytes / 1e6:5.1f} Mo (+ {moteur.matrice.indices.nbytes / 1e6:5.1f} Mo d'indices) | "
+              f"préférences {t_preferences:5.2f} ms | top-10 {t_partiel:6.2f} ms (tri complet {t_complet:6.2f} ms)")
@@ -0,0 +1,144 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import requests
+
+# Ajout du chemin pour accéder aux modules
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RACINE)
+
+# Démarrage de l'API : commande et variables d'environnement de chaque mode
+DEMARRAGE_IMPORT = (
+    "from modules import recommandation; recommandation.donnees; import uvicorn; "
+    "uvicorn.run('src.main:app', port={port}, log_level='warning')"
+)
+MODES_API = [
+    ("Données chargées avant d'écouter (ancien import)", "import", {"PRECHARGEMENT": "0"}),
+    ("Préchargement en arrière-plan (défaut)", "uvicorn", {}),
+    ("Chargement à la première recherche", "uvicorn", {"PRECHARGEMENT": "0"}),
+]
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def attendre(url, debut, delai=600):
+    """
+    Secondes écoulées depuis debut jusqu'à la première réponse 200 de url.
+    """
+    while time.perf_counter() - debut < delai:
+        try:
+            if requests.get(url, timeout=delai).status_code == 200:
+                return time.perf_counter() - debut
+        except requests.ConnectionError:
+            time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def lancer_api(commande, env, port):
+    if commande == "import":
+        args = [sys.executable, "-c", DEMARRAGE_IMPORT.format(port=port)]
+    else:
+        args = [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"]
+    return subprocess.Popen(
+        args, cwd=RACINE, env=dict(os.environ, RECHARGEMENT_AUTO="0", **env),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def mesurer_api(commande, env):
+    """
+    Temps jusqu'à la première réponse de /health, puis jusqu'au premier résultat de recherche.
+    """
+    port = port_libre()
+    debut = time.perf_counter()
+    processus = lancer_api(commande, env, port)
+    try:
+        sante = attendre(f"http://127.0.0.1:{port}/health", debut)
+        recherche = attendre(f"http://127.0.0.1:{port}/films/?titre=star&limit=1", debut)
+    finally:
+        processus.terminate()
+        processus.wait()
+    return sante, recherche
+
+
+def enfant_dashboard(mode, api_url):
+    """
+    Exécution du dashboard (streamlit.testing) : temps jusqu'au titre de la page (premier affichage) et total.
+    Mode "import" : ancien démarrage, données chargées à l'import et vérification synchrone de l'API sur GET /films/.
+    """
+    debut = time.perf_counter()
+    import streamlit
+    from streamlit.testing.v1 import AppTest
+    premier = {}
+    titre = streamlit.title
+
+    def titre_mesure(*args, **kwargs):
+        premier.setdefault("titre", time.perf_counter() - debut)
+        return titre(*args, **kwargs)
+
+    streamlit.title = titre_mesure
+    if mode == "import":
+        from modules import recommandation
+        recommandation.donnees
+        try:
+            requests.get(f"{api_url}/films/", timeout=1)
+        except requests.RequestException:
+            pass
+    AppTest.from_file(os.path.join(RACINE, "src", "dashboard.py"), default_timeout=600).run()
+    print(json.dumps({"titre": premier["titre"], "total": time.perf_counter() - debut}), flush=True)
+
+
+def mesurer_dashboard(mode, api_url):
+    sortie = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--dashboard", mode, api_url], cwd=RACINE,
+        env=dict(os.environ, RECHARGEMENT_AUTO="0"), capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(sortie.strip().split("\n")[-1])
+
+
+def sonde(url):
+    debut = time.perf_counter()
+    reponse = requests.get(url, timeout=30)
+    return (time.perf_counter() - debut) * 1000, len(reponse.content)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--dashboard":
+        enfant_dashboard(sys.argv[2], sys.argv[3])
+        sys.exit()
+
+    # Fichiers nettoyés et index sur disque à jour avant les mesures
+    subprocess.run([sys.executable, "-c", "from modules import recommandation; recommandation.donnees"],
+                   cwd=RACINE, env=dict(os.environ, RECHARGEMENT_AUTO="0"), capture_output=True, check=True)
+
+    print("API (uvicorn, un worker) : temps depuis le lancement du processus")
+    for libelle, commande, env in MODES_API:
+        sante, recherche = mesurer_api(commande, env)
+        print(f"  {libelle:<50} : /health {sante:6.2f} s | première recherche {recherche:6.2f} s")
+
+    # Dashboard, avec l'API démarrée et ses données chargées
+    port = port_libre()
+    api_url = f"http://127.0.0.1:{port}"
+    processus = lancer_api("uvicorn", {}, port)
+    try:
+        debut = time.perf_counter()
+        attendre(f"{api_url}/films/?limit=1", debut)
+        print("\nVérification de l'API par le dashboard")
+        for libelle, chemin in [("GET /films/ (ancienne)", "/films/"), ("GET /health", "/health")]:
+            duree, taille = sonde(api_url + chemin)
+            print(f"  {libelle:<24} : {duree:6.1f} ms | {taille} octets")
+
+        print("\nDashboard : premier affichage (titre de la page) et première exécution complète")
+        for libelle, mode in [("Données chargées à l'import (ancien)", "import"), ("Chargement paresseux", "paresseux")]:
+            mesures = mesurer_dashboard(mode, api_url)
+            print(f"  {libelle:<40} : titre {mesures['titre']:6.2f} s | page complète {mesures['total']:6.2f} s")
+    finally:
+        processus.terminate()
+        processus.wait()
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.semantique import IndexSemantique, TAILLE_MIN_IVF
+from modules.recommandation import donnees
+
+NB_THEMES = 200
+MOTS_PAR_THEME = 40
+NB_REQUETES = 200
+SONDES = [1, 2, 4, 8, 16, 32]
+
+
+def generer_catalogue(n, seed=0):
+    """
+    Catalogue synthétique : descriptions de 30 mots, surtout tirés du vocabulaire d'un thème parmi NB_THEMES.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulaire = np.array([f"mot{i}" for i in range(NB_THEMES * MOTS_PAR_THEME)])
+    themes = rng.integers(0, NB_THEMES, n)
+    propres = themes[:, None] * MOTS_PAR_THEME + rng.integers(0, MOTS_PAR_THEME, (n, 20))
+    communs = rng.integers(0, len(vocabulaire), (n, 10))
+    mots = vocabulaire[np.concatenate([propres, communs], axis=1)]
+    return pd.DataFrame({"description": [" ".join(ligne) for ligne in mots]})
+
+
+def rappel(index, positions, nb_sondes, k=10):
+    """
+    Rappel@k de l'index approché par rapport à la recherche exacte. À score égal (doublons),
+    tout élément aussi proche que le k-ième résultat exact compte comme trouvé.
+    """
+    valeurs = []
+    for position in positions:
+        _, exacts = index.similaires_exacts(position, k)
+        if len(exacts):
+            _, approches = index.similaires(position, k, nb_sondes)
+            valeurs.append(np.count_nonzero(approches >= exacts[-1] - 1e-6) / len(exacts))
+    return np.mean(valeurs)
+
+
+def latence(fonction, positions):
+    debut = time.perf_counter()
+    for position in positions:
+        fonction(position)
+    return (time.perf_counter() - debut) / len(positions) * 1000
+
+
+def mesurer(nom, index):
+    positions = np.random.default_rng(1).integers(0, len(index.positions), NB_REQUETES)
+    t_exact = latence(lambda p: index.similaires_exacts(p, 10), positions)
+    print(f"\n{nom} : {len(index.positions)} éléments, {len(index.centroides)} listes | "
+          f"construction {index.duree_construction:.2f} s | exact {t_exact:.3f} ms/requête")
+    if len(index.positions) < TAILLE_MIN_IVF:
+        print(f"  moins de {TAILLE_MIN_IVF} éléments : recherche exhaustive")
+        return
+    for nb_sondes in SONDES:
+        if nb_sondes > len(index.centroides):
+            break
+        t = latence(lambda p: index.similaires(p, 10, nb_sondes), positions)
+        print(f"  {nb_sondes:>3} listes parcourues : rappel@10 {rappel(index, positions, nb_sondes):.3f} | "
+              f"{t:.3f} ms/requête (x{t_exact / t:.1f})")
+
+
+if __name__ == "__main__":
+    for categorie, catalogue in donnees.catalogues.items():
+        mesurer(categorie, catalogue.semantique)
+    tailles = [int(n) for n in sys.argv[1:]] or [10_000, 100_000, 300_000]
+    for n in tailles:
+        mesurer(f"Synthétique {n}", IndexSemantique(generer_catalogue(n), ["description"]))
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.serialisation import FragmentsJSON
+
+MOTS = ["amour", "nuit", "guerre", "Paris", "retour", "roi", "étoile", "Dernier", "secret", "ombre"]
+REPETITIONS = 50
+
+
+def generer_catalogue(n, seed=0):
+    rng = np.random.default_rng(seed)
+    mots = np.array(MOTS + ["de", "la", "le"])
+    return pd.DataFrame({
+        "titre": [" ".join(rng.choice(mots, 4)) for _ in range(n)],
+        "auteur": [f"Auteur {i}" for i in rng.integers(0, 500, n)],
+        "langue": rng.choice(["fr", "en"], n),
+        "genre": rng.choice(["Roman", "Policier", "Histoire"], n),
+        "description": [" ".join(rng.choice(mots, 60)) for _ in range(n)],
+        "source": [f"https://example.org/livre/{i}" for i in range(n)],
+        "annee": rng.integers(1950, 2025, n).astype(float),
+    })
+
+
+def mesurer(fonction):
+    debut = time.perf_counter()
+    for _ in range(REPETITIONS):
+        resultat = fonction()
+    return (time.perf_counter() - debut) * 1000 / REPETITIONS, resultat
+
+
+def ancien(page):
+    # Chemin par défaut de FastAPI : to_dict, jsonable_encoder puis JSONResponse
+    return JSONResponse(jsonable_encoder(page.to_dict(orient='records'))).body
+
+
+if __name__ == "__main__":
+    df = generer_catalogue(20_000)
+    debut = time.perf_counter()
+    fragments = FragmentsJSON(df)
+    print(f"Fragments précalculés pour {len(df)} lignes en {(time.perf_counter() - debut) * 1000:.0f} ms")
+
+    rng = np.random.default_rng(1)
+    for taille in [20, 200, 2000]:
+        page = df.iloc[np.sort(rng.choice(len(df), taille, replace=False))]
+        projection = page[["titre", "source"]]
+        for nom, p in [("toutes colonnes", page), ("titre,source", projection)]:
+            t_ancien, attendu = mesurer(lambda: ancien(p))
+            t_nouveau, obtenu = mesurer(lambda: fragments.encoder(p))
+            assert obtenu == attendu
+            print(f"{taille:>5} lignes, {nom:<15} : to_dict + jsonable_encoder {t_ancien:7.2f} ms | fragments {t_nouveau:6.3f} ms | x{t_ancien / t_nouveau:.0f}")
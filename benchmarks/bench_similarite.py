@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.similarite import MoteurSimilarite
+
+MOTS = [f"mot{i}" for i in range(5000)]
+GENRES = ["Fiction", "History", "Romance", "Policier", "Science-fiction", "Biographie", "Jeunesse", "Poésie"]
+
+
+def generer_catalogue(n, seed=0):
+    """
+    Catalogue synthétique : description de 30 mots, 1 à 2 genres, 2000 auteurs.
+    """
+    rng = np.random.default_rng(seed)
+    mots = np.array(MOTS)
+    # Loi de Zipf approximative pour le vocabulaire
+    poids = 1 / np.arange(1, len(MOTS) + 1)
+    poids /= poids.sum()
+    return pd.DataFrame({
+        "description": [" ".join(rng.choice(mots, 30, p=poids)) for _ in range(n)],
+        "genre": [", ".join(rng.choice(GENRES, rng.integers(1, 3), replace=False)) for _ in range(n)],
+        "auteur": [f"Auteur {i}" for i in rng.integers(0, 2000, n)],
+    })
+
+
+if __name__ == "__main__":
+    for n in [1_000, 10_000, 50_000]:
+        df = generer_catalogue(n)
+        moteur = MoteurSimilarite(df, ["description"], ["genre", "auteur"])
+
+        debut = time.perf_counter()
+        for position in range(0, n, max(n // 1000, 1)):
+            moteur.similaires(position, 10)
+        requete = (time.perf_counter() - debut) / min(n, 1000) * 1e6
+        print(f"{n:>7} éléments | construction {moteur.duree_construction:6.2f} s | "
+              f"{moteur.matrice.shape[1]} termes | requête {requete:.1f} µs")
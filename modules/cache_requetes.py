@@ -0,0 +1,140 @@
+import functools
+import threading
+from cachetools import TTLCache
+from modules.metriques import compter
+
+# Nombre maximal de résultats gardés et durée de vie d'un résultat (secondes)
+CACHE_TAILLE = 1024
+CACHE_TTL = 600
+
+
+def cle_requete(valeur):
+    """
+    Forme normalisée d'un paramètre de recherche pour la clé du cache.
+    Les recherches par titre ignorent la casse : seuls les titres ASCII sans échappement regex
+    (où '\\W' et '\\w' diffèrent) sont mis en minuscules, la casse ne changeant alors pas le résultat.
+    """
+    if isinstance(valeur, str) and valeur.isascii() and "\\" not in valeur:
+        return valeur.lower()
+    return valeur
+
+
+def _copie(valeur):
+    """
+    Copie d'un résultat mémoïsé (liste de dictionnaires aux valeurs immuables) :
+    l'appelant peut la modifier sans changer le résultat en cache.
+    """
+    if isinstance(valeur, list):
+        return [dict(element) if isinstance(element, dict) else element for element in valeur]
+    return valeur
+
+
+class _TTLCacheCompte(TTLCache):
+    """
+    TTLCache qui compte les éléments évincés (moins récemment utilisés) et expirés.
+    """
+
+    def __init__(self, maxsize, ttl):
+        super().__init__(maxsize, ttl)
+        self.evictions = 0
+        self.expirations = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+    def expire(self, time=None):
+        expires = super().expire(time)
+        self.expirations += len(expires)
+        return expires
+
+
+class CacheRequetes:
+    """
+    Cache LRU + TTL des résultats de recherche, avec compteurs de succès, d'échecs et d'évictions.
+    Le cache est vidé à chaque changement de version des données.
+    version_donnees : fonction qui renvoie la version des données (en les chargeant au besoin),
+    pour que les résultats mémoïsés soient rangés sous la version qui sert à les calculer.
+    """
+
+    def __init__(self, taille=CACHE_TAILLE, ttl=CACHE_TTL, actif=True, version_donnees=None):
+        self._cache = _TTLCacheCompte(taille, ttl)
+        self.actif = actif
+        self.version_donnees = version_donnees
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.version = None
+
+    def lire(self, cle):
+        """
+        Résultat en cache pour cle, ou None.
+        """
+        if not self.actif:
+            return None
+        with self._verrou:
+            valeur = self._cache.get(cle)
+            if valeur is None:
+                self.echecs += 1
+            else:
+                self.succes += 1
+        compter("cache_echec" if valeur is None else "cache_succes")
+        return valeur
+
+    def ecrire(self, cle, valeur):
+        if self.actif and valeur is not None:
+            with self._verrou:
+                self._cache[cle] = valeur
+
+    def obtenir(self, cle, calcul):
+        """
+        Résultat en cache pour cle, sinon calcul() (mis en cache s'il n'est pas None).
+        """
+        valeur = self.lire(cle)
+        if valeur is None:
+            valeur = calcul()
+            self.ecrire(cle, valeur)
+        return valeur
+
+    def memoiser(self, nom):
+        """
+        Décorateur : met en cache les résultats d'une fonction de recherche,
+        clé = (version des données, nom, arguments normalisés). Chaque appel reçoit sa propre copie du résultat.
+        """
+        def decorateur(fonction):
+            @functools.wraps(fonction)
+            def enveloppe(*args, **kwargs):
+                # Données chargées avant la clé : leur premier chargement vide le cache et fixe la version
+                version = self.version_donnees() if self.version_donnees else self.version
+                cle = (version, nom) + tuple(map(cle_requete, args)) + tuple(sorted((k, cle_requete(v)) for k, v in kwargs.items()))
+                return _copie(self.obtenir(cle, lambda: fonction(*args, **kwargs)))
+            return enveloppe
+        return decorateur
+
+    def invalider(self, version=None):
+        """
+        Vide le cache (données rechargées) et enregistre la nouvelle version des données.
+        """
+        with self._verrou:
+            # Nouveau cache plutôt que clear(), qui compterait chaque élément comme évincé
+            ancien = self._cache
+            self._cache = _TTLCacheCompte(ancien.maxsize, ancien.ttl)
+            self._cache.evictions, self._cache.expirations = ancien.evictions, ancien.expirations
+            self.version = version
+
+    def statistiques(self):
+        with self._verrou:
+            self._cache.expire()
+            total = self.succes + self.echecs
+            return {
+                "version": self.version,
+                "taille": len(self._cache),
+                "taille_max": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "taux_succes": round(self.succes / total, 4) if total else 0.0,
+                "evictions": self._cache.evictions,
+                "expirations": self._cache.expirations,
+            }
@@ -1,129 +1,439 @@
 import requests
 import pandas as pd
+import argparse
+import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 
-# Crée le dossier
-os.makedirs("data", exist_ok=True)
-
 API_KEY = "API_KEY"
 BASE_URL = "https://api.themoviedb.org/3/discover/movie"
+LIVRES_URL = "https://www.googleapis.com/books/v1/volumes"
+MUSIQUES_URL = "https://itunes.apple.com/search"
 
+# Débit autorisé par hôte : (requêtes par seconde, rafale maximale)
+LIMITES = {
+    "api.themoviedb.org": (4, 4),
+    "www.googleapis.com": (5, 5),
+    "itunes.apple.com": (20 / 60, 1),
+}
+LIMITE_DEFAUT = (5, 5)
 
-# Scraping des films
-def collect_films(langue, pages):
-    films = []
-    for page in range(1, pages + 1):
-        try:
-            params = {
-                "api_key": API_KEY,
-                "language": langue,
-                "sort_by": "popularity.desc",
-                "page": page
-            }
-            response = requests.get(BASE_URL, params=params, timeout=10)
-            data = response.json()
-
-            if "results" not in data:
-                print(f"Aucune donnée à la page {page}, arrêt.")
-                break
+# Nombre de requêtes simultanées et de tentatives par page
+MAX_WORKERS = 8
+TENTATIVES = 4
+TIMEOUT = 10
 
-            for f in data.get("results", []):
-                info = f.get("volumeInfo", {})
-                films.append({
-                    "titre": f.get("title"),
-                    "auteur": ", ".join(info.get("authors", [])) if "authors" in info else "Inconnu",
-                    "langue": "français" if langue == "fr-FR" else "anglais",
-                    "genre": ", ".join([str(g) for g in f.get("genre_ids", [])]),
-                    "description": f.get("overview"),
-                    "annee": f.get("release_date", "")[:4],
-                    "source": f"https://www.themoviedb.org/movie/{f.get('id')}"
-                })
-            time.sleep(0.25)
-        except Exception as e:
-            print(f"Erreur page {page} : {e}")
-            continue
-    return pd.DataFrame(films)
+# Point de reprise de la collecte en flux
+CHECKPOINT_PATH = os.path.join("data", "collecte_checkpoint.json")
 
 
-# Scraping des livres
-def collect_livres(langue, nb):
-    livres = []
-    base_url = "https://www.googleapis.com/books/v1/volumes"
+class ErreurTemporaire(Exception):
+    """
+    Réponse HTTP à retenter (429 ou erreur serveur).
+    """
+
+
+class TokenBucket:
+    """
+    Limiteur de débit : un jeton par requête, regénérés à débit constant.
+    """
+
+    def __init__(self, debit, capacite):
+        self.debit = debit
+        self.capacite = capacite
+        self.jetons = capacite
+        self.dernier = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquerir(self):
+        while True:
+            with self.lock:
+                maintenant = time.monotonic()
+                self.jetons = min(self.capacite, self.jetons + (maintenant - self.dernier) * self.debit)
+                self.dernier = maintenant
+                if self.jetons >= 1:
+                    self.jetons -= 1
+                    return
+                attente = (1 - self.jetons) / self.debit
+            time.sleep(attente)
+
+
+class Collecteur:
+    """
+    Récupère des pages JSON en parallèle : une session HTTP (pool de connexions)
+    et un limiteur de débit par hôte, avec nouvelles tentatives et attente exponentielle.
+    """
+
+    def __init__(self, limites=None, max_workers=MAX_WORKERS, tentatives=TENTATIVES):
+        self.limites = {**LIMITES, **(limites or {})}
+        self.max_workers = max_workers
+        self.tentatives = tentatives
+        self.sessions = {}
+        self.limiteurs = {}
+        self.lock = threading.Lock()
+
+    def _hote(self, hote):
+        with self.lock:
+            if hote not in self.sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self.sessions[hote] = session
+                self.limiteurs[hote] = TokenBucket(*self.limites.get(hote, LIMITE_DEFAUT))
+            return self.sessions[hote], self.limiteurs[hote]
+
+    def get_json(self, url, params):
+        session, limiteur = self._hote(urlparse(url).netloc)
+        for tentative in Retrying(
+            retry=retry_if_exception_type((requests.ConnectionError, requests.Timeout, ErreurTemporaire)),
+            wait=wait_exponential(multiplier=0.5, max=8),
+            stop=stop_after_attempt(self.tentatives),
+            reraise=True,
+        ):
+            with tentative:
+                limiteur.acquerir()
+                response = session.get(url, params=params, timeout=TIMEOUT)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise ErreurTemporaire(f"{response.status_code} sur {url}")
+                return response.json()
+
+    def pages(self, url, liste_params, ignorer_erreurs=False):
+        """
+        Récupère toutes les pages en parallèle et les renvoie dans l'ordre de liste_params.
+        Avec ignorer_erreurs, une page en échec est renvoyée sous forme d'exception.
+        """
+        def recuperer(params):
+            try:
+                return self.get_json(url, params)
+            except Exception as e:
+                if not ignorer_erreurs:
+                    raise
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(recuperer, liste_params))
+
+    def fermer(self):
+        for session in self.sessions.values():
+            session.close()
+
+
+# Collecteur partagé par défaut (sessions réutilisées d'une collecte à l'autre)
+_collecteur = None
+
+
+def collecteur_defaut():
+    global _collecteur
+    if _collecteur is None:
+        _collecteur = Collecteur()
+    return _collecteur
+
+
+# Paramètres des pages TMDB
+def params_films(langue, pages):
+    return [{
+        "api_key": API_KEY,
+        "language": langue,
+        "sort_by": "popularity.desc",
+        "page": page
+    } for page in range(1, pages + 1)]
+
+
+# Films d'une page TMDB (None si la page ne contient pas de résultats)
+def extraire_films(data, langue):
+    if "results" not in data:
+        return None
+
+    films = []
+    for f in data.get("results", []):
+        info = f.get("volumeInfo", {})
+        films.append({
+            "titre": f.get("title"),
+            "auteur": ", ".join(info.get("authors", [])) if "authors" in info else "Inconnu",
+            "langue": "français" if langue == "fr-FR" else "anglais",
+            "genre": ", ".join([str(g) for g in f.get("genre_ids", [])]),
+            "description": f.get("overview"),
+            "annee": f.get("release_date", "")[:4],
+            "source": f"https://www.themoviedb.org/movie/{f.get('id')}"
+        })
+    return films
+
+
+# Paramètres des pages Google Books
+def params_livres(langue, nb):
     query = "livre" if langue == "français" else "book"
     max_results = 40  # limite par requête
     pages = nb // max_results
+    return [{
+        "q": query,
+        "langRestrict": "fr" if langue == "français" else "en",
+        "startIndex": i * max_results,
+        "maxResults": max_results
+    } for i in range(pages)]
 
-    for i in range(pages):
-        params = {"q": query, "langRestrict": "fr" if langue == "français" else "en", "startIndex": i * max_results, "maxResults": max_results}
-        r = requests.get(base_url, params=params)
-        data = r.json()
-        for item in data.get("items", []):
-            info = item.get("volumeInfo", {})
-            livres.append({
-                "titre": info.get("title"),
-                "auteur": ", ".join(info.get("authors", [])) if "authors" in info else "Inconnu",
-                "langue": langue,
-                "genre": ", ".join(info.get("categories", [])) if "categories" in info else "Non spécifié",
-                "description": info.get("description", "Description non disponible"),
-                "annee": info.get("publishedDate", "")[:4],
-                "source": info.get("infoLink")
-            })
-    return pd.DataFrame(livres)
 
+# Livres d'une page Google Books
+def extraire_livres(data, langue):
+    livres = []
+    for item in data.get("items", []):
+        info = item.get("volumeInfo", {})
+        livres.append({
+            "titre": info.get("title"),
+            "auteur": ", ".join(info.get("authors", [])) if "authors" in info else "Inconnu",
+            "langue": langue,
+            "genre": ", ".join(info.get("categories", [])) if "categories" in info else "Non spécifié",
+            "description": info.get("description", "Description non disponible"),
+            "annee": info.get("publishedDate", "")[:4],
+            "source": info.get("infoLink")
+        })
+    return livres
 
-# Scraping des musiques
-def collect_musiques(langue, nb):
-    musiques = []
-    base_url = "https://itunes.apple.com/search"
+
+# Paramètres des pages iTunes
+def params_musiques(langue, nb):
     pays = "fr" if langue == "français" else "us"
     term = "music"
     limit = 200  # max par requête
     pages = nb // limit
+    return [{"term": term, "media": "music", "country": pays, "limit": limit, "offset": i*limit} for i in range(pages)]
+
+
+# Musiques d'une page iTunes
+def extraire_musiques(data, langue):
+    musiques = []
+    for item in data.get("results", []):
+        musiques.append({
+            "titre": item.get("trackName"),
+            "artiste": item.get("artistName"),
+            "album": item.get("collectionName"),
+            "langue": langue,
+            "genre": item.get("primaryGenreName"),
+            "annee": item.get("releaseDate", "")[:4],
+            "source": item.get("trackViewUrl")
+        })
+    return musiques
+
+
+# Scraping des films
+def collect_films(langue, pages, collecteur=None, base_url=BASE_URL):
+    collecteur = collecteur or collecteur_defaut()
+    films = []
+    for page, data in enumerate(collecteur.pages(base_url, params_films(langue, pages), ignorer_erreurs=True), start=1):
+        if isinstance(data, Exception):
+            print(f"Erreur page {page} : {data}")
+            continue
+
+        resultats = extraire_films(data, langue)
+        if resultats is None:
+            print(f"Aucune donnée à la page {page}, arrêt.")
+            break
+        films.extend(resultats)
+    return pd.DataFrame(films)
+
+
+# Scraping des livres
+def collect_livres(langue, nb, collecteur=None, base_url=LIVRES_URL):
+    collecteur = collecteur or collecteur_defaut()
+    livres = []
+    for data in collecteur.pages(base_url, params_livres(langue, nb)):
+        livres.extend(extraire_livres(data, langue))
+    return pd.DataFrame(livres)
 
-    for i in range(pages):
-        params = {"term": term, "media": "music", "country": pays, "limit": limit, "offset": i*limit}
-        r = requests.get(base_url, params=params)
-        data = r.json()
-        for item in data.get("results", []):
-            musiques.append({
-                "titre": item.get("trackName"),
-                "artiste": item.get("artistName"),
-                "album": item.get("collectionName"),
-                "langue": langue,
-                "genre": item.get("primaryGenreName"),
-                "annee": item.get("releaseDate", "")[:4],
-                "source": item.get("trackViewUrl")
-            })
+
+# Scraping des musiques
+def collect_musiques(langue, nb, collecteur=None, base_url=MUSIQUES_URL):
+    collecteur = collecteur or collecteur_defaut()
+    musiques = []
+    for data in collecteur.pages(base_url, params_musiques(langue, nb)):
+        musiques.extend(extraire_musiques(data, langue))
     return pd.DataFrame(musiques)
 
 
-# Collecte musique
-df_music_fr = collect_musiques("français", 2000)
-df_music_en = collect_musiques("anglais", 1000)
-df_music = pd.concat([df_music_fr, df_music_en], ignore_index=True)
+# Lecture / écriture des points de reprise de la collecte en flux
+def lire_checkpoints(checkpoint_path):
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def ecrire_checkpoints(checkpoint_path, checkpoints):
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoints, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+# Suppression des points de reprise : la prochaine collecte en flux repart de zéro
+def effacer_checkpoints(checkpoint_path):
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+# Collecte en flux : chaque lot de pages est ajouté au fichier puis le point de reprise est enregistré
+def collecter_en_flux(source, langue, fichier, url, liste_params, extraire, checkpoint_path=CHECKPOINT_PATH,
+                      collecteur=None, taille_lot=None, ignorer_erreurs=False):
+    """
+    Ajoute au CSV les lignes extraites de chaque page, par lots de taille_lot pages.
+    Le point de reprise (source, langue, dernière page, pages en échec, taille du fichier) est
+    enregistré après chaque lot : une collecte interrompue reprend à la page suivante, et les
+    lignes écrites après le dernier point de reprise sont tronquées.
+    Les pages en échec (avec ignorer_erreurs) sont retentées à la reprise suivante ; la collecte
+    n'est terminée qu'une fois toutes les pages récupérées.
+    Renvoie le nombre de lignes ajoutées.
+    """
+    collecteur = collecteur or collecteur_defaut()
+    taille_lot = taille_lot or collecteur.max_workers
+    checkpoints = lire_checkpoints(checkpoint_path)
+
+    # Première langue d'une nouvelle collecte : on repart d'un fichier vide
+    etat_source = checkpoints.get(source)
+    if etat_source is None or etat_source.get("fichier") != fichier:
+        etat_source = checkpoints[source] = {"fichier": fichier, "langues": {}}
+        if os.path.exists(fichier):
+            os.remove(fichier)
+
+    etat = etat_source["langues"].get(langue)
+    if etat is None:
+        etat = etat_source["langues"][langue] = {
+            "page": 0,
+            "echecs": [],
+            "octets": os.path.getsize(fichier) if os.path.exists(fichier) else 0,
+            "termine": False
+        }
+        ecrire_checkpoints(checkpoint_path, checkpoints)
+    elif etat["termine"]:
+        print(f"Collecte {source} ({langue}) déjà terminée, ignorée.")
+        return 0
+    else:
+        etat.setdefault("echecs", [])
+        print(f"Reprise de la collecte {source} ({langue}) après la page {etat['page']}"
+              f" ({len(etat['echecs'])} pages en échec à retenter)")
+        if os.path.exists(fichier) and os.path.getsize(fichier) > etat["octets"]:
+            with open(fichier, "r+b") as f:
+                f.truncate(etat["octets"])
+
+    nb_lignes = 0
+
+    # Collecte les pages d'indices donnés ; renvoie les pages en échec et si la fin des données est atteinte
+    def collecter_lot(indices):
+        nonlocal nb_lignes
+        lignes, echecs, fin = [], [], False
+        for i, data in zip(indices, collecteur.pages(url, [liste_params[i] for i in indices], ignorer_erreurs)):
+            if isinstance(data, Exception):
+                print(f"Erreur page {i + 1} : {data}")
+                echecs.append(i)
+                continue
+
+            resultats = extraire(data, langue)
+            if resultats is None:
+                print(f"Aucune donnée à la page {i + 1}, arrêt.")
+                fin = True
+                break
+            lignes.extend(resultats)
+
+        if lignes:
+            ecrire_entete = not os.path.exists(fichier) or os.path.getsize(fichier) == 0
+            with open(fichier, "a", encoding="utf-8", newline="") as f:
+                pd.DataFrame(lignes).to_csv(f, index=False, header=ecrire_entete)
+                f.flush()
+                os.fsync(f.fileno())
+            nb_lignes += len(lignes)
+        etat["octets"] = os.path.getsize(fichier) if os.path.exists(fichier) else 0
+        return echecs, fin
+
+    # Pages en échec lors d'un passage précédent : retentées avant de continuer
+    anciens, restants = etat["echecs"], []
+    for debut in range(0, len(anciens), taille_lot):
+        echecs, _ = collecter_lot(anciens[debut:debut + taille_lot])
+        restants.extend(echecs)
+        etat["echecs"] = restants + anciens[debut + taille_lot:]
+        ecrire_checkpoints(checkpoint_path, checkpoints)
+
+    while etat["page"] < len(liste_params):
+        lot = list(range(etat["page"], min(etat["page"] + taille_lot, len(liste_params))))
+        echecs, fin = collecter_lot(lot)
+        etat["echecs"].extend(echecs)
+        # Fin des données : les pages suivantes ne sont pas demandées
+        etat["page"] = len(liste_params) if fin else etat["page"] + len(lot)
+        ecrire_checkpoints(checkpoint_path, checkpoints)
+
+    etat["termine"] = not etat["echecs"]
+    ecrire_checkpoints(checkpoint_path, checkpoints)
+    if etat["echecs"]:
+        print(f"{len(etat['echecs'])} pages en échec pour {source} ({langue}), retentées à la prochaine collecte.")
+    return nb_lignes
+
+
+# Vrai si toutes les collectes enregistrées dans les points de reprise sont terminées
+def collectes_terminees(checkpoint_path):
+    return all(etat["termine"]
+               for etat_source in lire_checkpoints(checkpoint_path).values()
+               for etat in etat_source["langues"].values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collecte des films, livres et musiques")
+    parser.add_argument("--flux", action="store_true",
+                        help="Écrit chaque lot de pages au fil de l'eau et reprend une collecte interrompue")
+    parser.add_argument("--recommencer", action="store_true",
+                        help="Avec --flux : ignore le point de reprise d'une collecte interrompue et repart de zéro")
+    args = parser.parse_args()
+
+    # Crée le dossier
+    os.makedirs("data", exist_ok=True)
+
+    if args.flux:
+        if args.recommencer:
+            effacer_checkpoints(CHECKPOINT_PATH)
+        # Même contenu que la collecte complète, écrit lot par lot
+        for langue, nb in [("français", 2000), ("anglais", 1000)]:
+            collecter_en_flux("musiques", langue, "data/musiques.csv", MUSIQUES_URL, params_musiques(langue, nb), extraire_musiques)
+        for langue, nb in [("français", 1000), ("anglais", 1000)]:
+            collecter_en_flux("livres", langue, "data/livres.csv", LIVRES_URL, params_livres(langue, nb), extraire_livres)
+        collecter_en_flux("films", "en-US", "data/films.csv", BASE_URL, params_films("en-US", 100), extraire_films,
+                          ignorer_erreurs=True)
+        if collectes_terminees(CHECKPOINT_PATH):
+            # Collecte complète : la suivante est une nouvelle collecte, pas une reprise
+            effacer_checkpoints(CHECKPOINT_PATH)
+            print("Collecte en flux terminée")
+        else:
+            print("Collecte en flux incomplète : relancer avec --flux pour retenter les pages en échec")
+
+    else:
+        # Collecte musique
+        df_music_fr = collect_musiques("français", 2000)
+        df_music_en = collect_musiques("anglais", 1000)
+        df_music = pd.concat([df_music_fr, df_music_en], ignore_index=True)
 
-# Sauvegarde
-df_music.to_csv("data/musiques.csv", index=False, encoding="utf-8")
-print(f"{len(df_music)} musiques enregistrées dans data/musiques.csv")
+        # Sauvegarde
+        df_music.to_csv("data/musiques.csv", index=False, encoding="utf-8")
+        print(f"{len(df_music)} musiques enregistrées dans data/musiques.csv")
 
-# Collecte
-df_books_fr = collect_livres("français", 1000)
-df_books_en = collect_livres("anglais", 1000)
-df_books = pd.concat([df_books_fr, df_books_en], ignore_index=True)
+        # Collecte
+        df_books_fr = collect_livres("français", 1000)
+        df_books_en = collect_livres("anglais", 1000)
+        df_books = pd.concat([df_books_fr, df_books_en], ignore_index=True)
 
-# Sauvegarde
-df_books.to_csv("data/livres.csv", index=False, encoding="utf-8")
-print(f"{len(df_books)} livres enregistrés dans data/livres.csv")
+        # Sauvegarde
+        df_books.to_csv("data/livres.csv", index=False, encoding="utf-8")
+        print(f"{len(df_books)} livres enregistrés dans data/livres.csv")
 
 
-# Récupérer 100 films français et 100 anglais
-df_fr = collect_films("fr-FR", pages=100)
-df_en = collect_films("en-US", pages=100)
+        # Récupérer 100 films français et 100 anglais
+        df_fr = collect_films("fr-FR", pages=100)
+        df_en = collect_films("en-US", pages=100)
 
-# Fusionner et sauvegarder
-df_films = pd.concat([df_en], ignore_index=True)
-df_films.to_csv("data/films.csv", index=False, encoding="utf-8")
+        # Fusionner et sauvegarder
+        df_films = pd.concat([df_en], ignore_index=True)
+        df_films.to_csv("data/films.csv", index=False, encoding="utf-8")
 
-print(f"{len(df_films)} films sauvegardés dans data/films.csv")
+        print(f"{len(df_films)} films sauvegardés dans data/films.csv")
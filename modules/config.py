@@ -1,7 +1,75 @@
 import pandas as pd
-import os, csv
+import codecs, os, csv
 from io import StringIO, BytesIO
 
+ENCODAGES = ['utf-8', 'latin1', 'ISO-8859-1']
+# Début de fichier lu pour détecter l'encodage et le séparateur
+TAILLE_PREFIXE = 64 * 1024
+
+
+# Début d'un fichier (chemin local ou fichier uploadé, remis au début après lecture)
+def prefixe_fichier(path, taille=TAILLE_PREFIXE):
+    if isinstance(path, str):
+        with open(path, 'rb') as f:
+            return f.read(taille)
+    path.seek(0)
+    prefixe = path.read(taille)
+    path.seek(0)
+    return prefixe
+
+
+def detecter_format(prefixe):
+    """
+    (encodage, séparateur) d'un CSV d'après le début du fichier, en une seule passe :
+    utf-8 si le début se décode sans erreur (un caractère coupé en fin de début est toléré), latin1 sinon.
+    Le séparateur est détecté sur la première ligne.
+    """
+    try:
+        texte, encodage = prefixe.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError as e:
+        if e.reason == 'unexpected end of data' and e.start >= len(prefixe) - 3:
+            texte, encodage = prefixe[:e.start].decode('utf-8'), 'utf-8'
+        else:
+            texte, encodage = prefixe.decode('latin1'), 'latin1'
+    sample = StringIO(texte, newline=None).readline()
+    return encodage, csv.Sniffer().sniff(sample).delimiter
+
+
+def formats_csv(prefixe):
+    """
+    (encodage, séparateur) à essayer pour lire un CSV : le format détecté d'abord, puis les autres
+    encodages de ENCODAGES au cas où le fichier change d'encodage après son début.
+    """
+    try:
+        encodage, sep = detecter_format(prefixe)
+    except Exception:
+        return []
+    # utf-8 écarté d'office si le début du fichier n'est déjà pas valide ; latin1 et ISO-8859-1 sont le même codec
+    exclus = {codecs.lookup(encodage).name} | ({codecs.lookup('utf-8').name} if encodage != 'utf-8' else set())
+    formats = [(encodage, sep)]
+    for enc in ENCODAGES:
+        if codecs.lookup(enc).name not in exclus:
+            exclus.add(codecs.lookup(enc).name)
+            formats.append((enc, sep))
+    return formats
+
+
+def lire_csv(source, encodage, sep):
+    """
+    Lecture d'un CSV en une seule passe par le moteur C de pd.read_csv, avec le format détecté
+    (chemin local, ou fichier uploadé relu depuis son début).
+    """
+    if not isinstance(source, str):
+        source.seek(0)
+    return pd.read_csv(source, encoding=encodage, sep=sep)
+
+
+# Lecture d'un CSV par blocs de taille_bloc lignes
+def lire_csv_par_blocs(path, taille_bloc, encodage, sep):
+    with pd.read_csv(path, encoding=encodage, sep=sep, chunksize=taille_bloc) as lecteur:
+        yield from lecteur
+
+
 # Fonction d'import des données
 def import_data(path):
     """
@@ -9,7 +77,6 @@ def import_data(path):
     et renvoie un DataFrame propre.
     """
     df = None
-    encodings = ['utf-8', 'latin1', 'ISO-8859-1']
 
     if isinstance(path, str):
         filename = os.path.basename(path)
@@ -18,27 +85,17 @@ def import_data(path):
     else:
         filename = path.name
         file_extension = os.path.splitext(filename)[1].lower()
-        file_bytes = path.read()
-        file_source = BytesIO(file_bytes)
+        # Fichier uploadé lu sur place s'il le permet, sans copie
+        file_source = path if hasattr(path, "seek") else BytesIO(path.read())
 
     # Traitement selon l'extension
     if file_extension == ".csv":
-        for enc in encodings:
+        # On lit le début du fichier pour détecter l'encodage et le séparateur
+        for enc, sep in formats_csv(prefixe_fichier(file_source)):
             try:
-                # On lit quelques lignes pour détecter le séparateur
-                if isinstance(file_source, str):
-                    with open(file_source, 'r', encoding=enc, errors='ignore') as f:
-                        sample = f.readline()
-                else:
-                    sample = file_source.getvalue().decode(enc, errors='ignore').splitlines()[0]
-
-                sniffer = csv.Sniffer()
-                dialect = sniffer.sniff(sample)
-                sep = dialect.delimiter
-
-                df = pd.read_csv(file_source, encoding=enc, sep=sep)
+                df = lire_csv(file_source, enc, sep)
                 break
-            except Exception as e:
+            except Exception:
                 continue
 
     elif file_extension in [".xls", ".xlsx"]:
@@ -54,35 +111,85 @@ def import_data(path):
     return df
 
 
+# Colonnes texte à peu de valeurs distinctes, gardées en catégories pendant le nettoyage
+COLONNES_CATEGORIELLES = ["langue", "genre"]
+
+
+def colonnes_texte(data):
+    """
+    Colonnes texte (object ou catégorie) de data, dans leur ordre.
+    """
+    return [col for col, dtype in data.dtypes.items() if dtype == object or isinstance(dtype, pd.CategoricalDtype)]
+
+
+def en_categories(data, colonnes=None):
+    """
+    Convertit en catégories (en place) les colonnes texte de COLONNES_CATEGORIELLES présentes dans data.
+    """
+    for col in colonnes or COLONNES_CATEGORIELLES:
+        if col in data.columns and data[col].dtype == object:
+            data[col] = data[col].astype("category")
+    return data
+
+
+def completer_texte(serie, manquantes):
+    """
+    Copie d'une colonne texte où les valeurs manquantes (masque) sont remplacées par "Inconnu", sans changer son type.
+    """
+    valeurs = serie.to_numpy(dtype=object, copy=True)
+    valeurs[manquantes] = "Inconnu"
+    return pd.Series(valeurs, index=serie.index, name=serie.name)
+
+
 # Traitement des valeurs manquantes
 def traitement_na(data):
+    """
+    Colonnes texte puis colonnes numériques ; les colonnes à plus de 20 % de valeurs manquantes
+    sont supprimées, les autres complétées ("Inconnu" pour le texte, médiane sinon).
+    Une seule passe par colonne, seules les colonnes complétées sont recopiées.
+    """
     try:
-        num_cols = data.select_dtypes(exclude="object")
-        cat_cols = data.select_dtypes(include="object")
-        df = pd.concat([cat_cols, num_cols], axis=1)
-        percent_na = (df.isnull().sum() / len(df)) * 100
-        
-        for col in df.columns:
-            if percent_na[col] > 20:
-                df.drop(columns=[col], inplace=True)
-            elif percent_na[col] > 0:
-                if df[col].dtype == "object":
-                    df.fillna({col: "Inconnu"}, inplace=True)
+        texte = colonnes_texte(data)
+        numeriques = data.columns.difference(texte, sort=False).tolist()
+
+        colonnes = {}
+        for col in texte + numeriques:
+            serie = data[col]
+            # Masque des valeurs manquantes calculé une fois, pour le taux et pour le remplissage
+            manquantes = serie.isnull().to_numpy()
+            nb_na = manquantes.sum()
+            if nb_na and (nb_na / len(data)) * 100 > 20:
+                continue
+            if nb_na > 0:
+                if isinstance(serie.dtype, pd.CategoricalDtype):
+                    if "Inconnu" not in serie.cat.categories:
+                        serie = serie.cat.add_categories("Inconnu")
+                    serie = serie.fillna("Inconnu")
+                elif col in texte:
+                    serie = completer_texte(serie, manquantes)
                 else:
-                    df.fillna({col: df[col].median()}, inplace=True)
-                
-        return df
-    
+                    serie = serie.fillna(serie.median())
+            colonnes[col] = serie
+
+        return pd.DataFrame(colonnes, index=data.index, copy=False)
+
     except Exception as e:
         print("Erreur de chargement :", e)
-        
-        
+
+
+def doublons(data):
+    """
+    Masque des lignes dont le titre a déjà été vu (titre brut, première occurrence gardée).
+    """
+    return data["titre"].duplicated()
+
+
 # suppression des données dupliquées
 def drop_doublon(data):
     try:
         # Supprimer les doublons
-        result = data.drop_duplicates(subset="titre")
-        return result
-    
+        masque = doublons(data)
+        return data[~masque.to_numpy()] if masque.any() else data
+
     except Exception as e:
-        print("Erreur de chargement :", e)
\ No newline at end of file
+        print("Erreur de chargement :", e)
@@ -0,0 +1,179 @@
+import time
+import zlib
+import numpy as np
+from scipy import sparse
+from modules.genres import libelles_genre, familles_genre
+from modules.personnalisation import TAILLE_TRANCHE
+from modules.recherche import plier_texte
+from modules.similarite import VALEURS_IGNOREES, PROPORTION_MAX_TERME, tokeniser
+
+# Espace de caractéristiques commun aux catégories : termes hachés (pas de vocabulaire à partager)
+NB_DIMENSIONS = 1 << 18
+# Poids des groupes de caractéristiques dans le cosinus entre deux éléments
+POIDS_GROUPES = {"texte": 1.0, "genre": 0.5, "langue": 0.1, "annee": 0.1}
+LANGUES = {"francais": "fr", "french": "fr", "fr": "fr", "anglais": "en", "english": "en", "en": "en"}
+# Candidats précalculés par élément et par catégorie cible
+K_CROISES = 20
+# Nombre de scores calculés à la fois (lignes du bloc x éléments de la catégorie cible)
+TAILLE_BLOC_SCORES = 1 << 24
+
+
+def _texte(df, colonnes_texte):
+    termes = [[] for _ in range(len(df))]
+    for col in ["titre"] + colonnes_texte:
+        if col in df.columns:
+            for doc, texte in zip(termes, df[col].fillna("").astype(str)):
+                if texte.lower() not in VALEURS_IGNOREES:
+                    doc.extend(tokeniser(plier_texte(texte)))
+    return termes
+
+
+def _genres(df):
+    termes = []
+    for valeur in df["genre"].fillna("").astype(str) if "genre" in df.columns else [""] * len(df):
+        doc = []
+        for libelle in libelles_genre(valeur):
+            if libelle.lower() not in VALEURS_IGNOREES and not libelle.isdigit():
+                doc.append(plier_texte(libelle))
+                doc.extend(f"famille:{famille}" for famille in familles_genre(libelle))
+        termes.append(doc)
+    return termes
+
+
+def _langues(df):
+    if "langue" not in df.columns:
+        return [[] for _ in range(len(df))]
+    codes = {valeur: LANGUES.get(plier_texte(str(valeur)).strip()) for valeur in df["langue"].dropna().unique()}
+    return [[codes[v]] if codes.get(v) else [] for v in df["langue"]]
+
+
+def _annees(df):
+    if "annee" not in df.columns:
+        return [[] for _ in range(len(df))]
+    return [[] if annee != annee else [str(int(annee // TAILLE_TRANCHE))] for annee in df["annee"].astype(float)]
+
+
+def _groupe(nom, termes, idf=False):
+    """
+    Matrice (éléments x NB_DIMENSIONS) d'un groupe de caractéristiques, lignes normalisées L2.
+    """
+    hachages = {}
+    lignes, colonnes = [], []
+    for i, doc in enumerate(termes):
+        for terme in doc:
+            j = hachages.get(terme)
+            if j is None:
+                j = hachages[terme] = zlib.crc32(f"{nom}:{terme}".encode("utf-8")) % NB_DIMENSIONS
+            lignes.append(i)
+            colonnes.append(j)
+
+    # Les doublons (même terme plusieurs fois) sont additionnés : fréquence du terme
+    matrice = sparse.csr_matrix(
+        (np.ones(len(lignes), dtype=np.float32), (np.array(lignes, dtype=np.int32), np.array(colonnes, dtype=np.int32))),
+        shape=(len(termes), NB_DIMENSIONS),
+    )
+    if idf and matrice.nnz:
+        # tf sous-linéaire et idf lissé, comme la similarité TF-IDF d'une catégorie
+        matrice.data = 1 + np.log(matrice.data)
+        df_termes = np.bincount(matrice.indices, minlength=NB_DIMENSIONS)
+        poids = (np.log((1 + matrice.shape[0]) / (1 + df_termes)) + 1).astype(np.float32)
+        poids[df_termes > PROPORTION_MAX_TERME * matrice.shape[0]] = 0
+        matrice.data *= poids[matrice.indices]
+    normes = np.sqrt(np.asarray(matrice.multiply(matrice).sum(axis=1)).ravel())
+    normes[normes == 0] = 1
+    return sparse.csr_matrix(sparse.diags(1 / normes) @ matrice, dtype=np.float32)
+
+
+def profils_croises(df, colonnes_texte):
+    """
+    Profil de chaque élément dans l'espace commun : mots du titre et du texte (TF-IDF), genres et familles
+    de genres, langue, tranche d'années. Chaque groupe pèse selon POIDS_GROUPES ; lignes normalisées L2.
+    """
+    groupes = {
+        "texte": _groupe("texte", _texte(df, colonnes_texte), idf=True),
+        "genre": _groupe("genre", _genres(df)),
+        "langue": _groupe("langue", _langues(df)),
+        "annee": _groupe("annee", _annees(df)),
+    }
+    profils = sum(np.float32(np.sqrt(POIDS_GROUPES[nom])) * matrice for nom, matrice in groupes.items())
+    normes = np.sqrt(np.asarray(profils.multiply(profils).sum(axis=1)).ravel())
+    normes[normes == 0] = 1
+    profils = sparse.csr_matrix(sparse.diags(1 / normes) @ profils, dtype=np.float32)
+    profils.eliminate_zeros()
+    return profils
+
+
+def _top_k(source, cible, k):
+    """
+    (voisins, scores) des k éléments de cible les plus proches de chaque élément de source.
+    """
+    voisins = np.zeros((source.shape[0], k), dtype=np.int32)
+    scores = np.zeros((source.shape[0], k), dtype=np.float32)
+    if k == 0:
+        return voisins, scores
+
+    transposee = cible.T.tocsc()
+    taille_bloc = max(1, TAILLE_BLOC_SCORES // max(cible.shape[0], 1))
+    for debut in range(0, source.shape[0], taille_bloc):
+        fin = min(debut + taille_bloc, source.shape[0])
+        bloc = (source[debut:fin] @ transposee).toarray()
+        top = np.argpartition(-bloc, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(bloc, top, axis=1)
+        ordre = np.lexsort((top, -top_scores), axis=1)
+        voisins[debut:fin] = np.take_along_axis(top, ordre, axis=1)
+        scores[debut:fin] = np.take_along_axis(top_scores, ordre, axis=1)
+    return voisins, scores
+
+
+class MoteurCroise:
+    """
+    Recommandations d'une catégorie vers les autres ("aimé ce film -> livres et musiques").
+    Les éléments de toutes les catégories sont décrits dans un même espace (profils_croises) ;
+    les k meilleurs candidats de chaque autre catégorie sont précalculés pour chaque élément,
+    une requête se limite donc à lire et fusionner ces listes.
+    """
+
+    def __init__(self, elements, k=K_CROISES):
+        """
+        elements : {categorie: (df, colonnes de texte)}.
+        """
+        debut = time.perf_counter()
+        profils = {categorie: profils_croises(df, colonnes) for categorie, (df, colonnes) in elements.items()}
+        self.voisins, self.scores = {}, {}
+        for source, profil_source in profils.items():
+            for cible, profil_cible in profils.items():
+                if cible != source:
+                    self.voisins[source, cible], self.scores[source, cible] = _top_k(
+                        profil_source, profil_cible, min(k, profil_cible.shape[0])
+                    )
+        self.duree_construction = time.perf_counter() - debut
+
+    @classmethod
+    def attacher(cls, voisins, scores):
+        """
+        Moteur construit sur des candidats déjà calculés ({(source, cible): tableau}), sans copie.
+        """
+        moteur = cls.__new__(cls)
+        moteur.voisins = voisins
+        moteur.scores = scores
+        moteur.duree_construction = 0.0
+        return moteur
+
+    def categories_cibles(self, source):
+        return [cible for (origine, cible) in self.voisins if origine == source]
+
+    def recommander(self, source, position, k=10, cibles=None):
+        """
+        Renvoie [(categorie, position, score)] des k éléments des catégories cibles (par défaut toutes
+        les autres) les plus proches de l'élément de source à la position donnée, sans score nul.
+        """
+        resultats = []
+        for cible in cibles or self.categories_cibles(source):
+            if cible == source or (source, cible) not in self.voisins:
+                continue
+            voisins = self.voisins[source, cible][position, :k]
+            scores = self.scores[source, cible][position, :k]
+            resultats.extend((cible, int(p), float(s)) for p, s in zip(voisins, scores) if s > 0)
+        # À score égal : ordre des catégories demandées puis du catalogue
+        resultats.sort(key=lambda r: -r[2])
+        return resultats[:k]
@@ -1,70 +1,598 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import modules.config as config
+from modules.metriques import etape, etape_par_element, mesurer, enregistrer_nettoyage
+import hashlib
+import json
+import os
+
+# Chemin absolu vers le dossier du projet
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLEANED_DIR = os.path.join(BASE_DIR, "data/data_cleaned")
+
+# Fichiers bruts à l'origine des données nettoyées
+SOURCES = {
+    "films_fr": os.path.join(BASE_DIR, "data/films_fr.csv"),
+    "films": os.path.join(BASE_DIR, "data/films.csv"),
+    "musiques": os.path.join(BASE_DIR, "data/musiques.csv"),
+    "livres_en": os.path.join(BASE_DIR, "data/Livres_en_anglais.csv"),
+    "livres_toulouse": os.path.join(BASE_DIR, "data/Librairie_toulouse.csv"),
+    "livres_fr": os.path.join(BASE_DIR, "data/livres_fr.csv"),
+}
+
+
+# Sources brutes de chaque catégorie, dans l'ordre de concaténation
+CATEGORIES = {
+    "films": ["films_fr", "films"],
+    "livres": ["livres_fr", "livres_toulouse", "livres_en"],
+    "musiques": ["musiques"],
+}
+LIBELLES = {
+    "films": "Films sauvegardés",
+    "livres": "Livres sauvegardés",
+    "musiques": "Musiques sauvegardées",
+}
+
+# Manifeste des empreintes des sources et sources préparées mises en cache
+MANIFEST_PATH = os.path.join(CLEANED_DIR, "manifest.json")
+SOURCES_DIR = os.path.join(CLEANED_DIR, "sources")
+# Verrou entre processus (workers de l'API, dashboard) : un seul nettoyage à la fois
+VERROU_NETTOYAGE_PATH = os.path.join(CLEANED_DIR, "nettoyage.lock")
+
+
+# Empreinte rapide d'un fichier (taille, date de modification)
+def empreinte_fichier(path):
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# Empreintes rapides des sources brutes (toutes par défaut)
+def empreintes_sources(noms=None):
+    return {nom: empreinte_fichier(SOURCES[nom]) for nom in (noms or SOURCES)}
+
+
+# Hash du contenu d'un fichier, lu par blocs
+def hash_fichier(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+# Hash combiné à partir des hash de chaque source
+def combiner_hashs(hashs):
+    h = hashlib.sha256()
+    for nom, valeur in sorted(hashs.items()):
+        h.update(nom.encode())
+        h.update((valeur or "absent").encode())
+    return h.hexdigest()
+
+
+# Hash du contenu des sources brutes (toutes par défaut)
+def hash_sources(noms=None):
+    return combiner_hashs({
+        nom: hash_fichier(SOURCES[nom]) if os.path.exists(SOURCES[nom]) else None
+        for nom in (noms or SOURCES)
+    })
+
+
+# Catégorie correspondant à un fichier nettoyé (films.csv -> films)
+def categorie_fichier(csv_path):
+    return os.path.splitext(os.path.basename(csv_path))[0]
+
+
+# Fichier temporaire propre au processus, remplacé ensuite de façon atomique par le fichier final
+def chemin_temporaire(path):
+    return f"{path}.tmp{os.getpid()}"
+
+
+# Écriture d'une table Arrow dans un fichier temporaire puis remplacement atomique
+def ecrire_arrow(table, path):
+    tmp_path = chemin_temporaire(path)
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+# Lecture d'un fichier Arrow par memory-map (sans copie)
+def lire_arrow(path):
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def chemin_cache(csv_path):
+    return os.path.splitext(csv_path)[0] + ".arrow"
+
+
+# Sauvegarde d'un fichier nettoyé au format Arrow (colonnes typées, lisible par memory-map)
+def sauvegarder_cache(csv_path, hash_brut, empreintes):
+    """
+    Écrit le cache colonnes à côté du CSV nettoyé, avec le hash des sources brutes
+    et les empreintes utilisées pour le valider au chargement.
+    """
+    try:
+        # Relecture du CSV pour obtenir exactement les types du chargement classique
+        df = config.lire_csv(csv_path, "utf-8", ",")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"hash_sources"] = hash_brut.encode()
+        metadata[b"empreintes_sources"] = json.dumps(empreintes).encode()
+        metadata[b"empreinte_csv"] = json.dumps(empreinte_fichier(csv_path)).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        ecrire_arrow(table, chemin_cache(csv_path))
+
+    except Exception as e:
+        print("Erreur d'écriture du cache :", e)
+
+
+# Part maximale de valeurs distinctes d'une colonne texte gardée en catégories dans un DataFrame compact
+PART_MAX_CATEGORIES = 0.5
+
+
+def _categories(serie):
+    # La chaîne vide fait partie des catégories : fillna("") reste possible, comme sur une colonne object
+    if "" not in serie.cat.categories:
+        serie = serie.cat.add_categories("")
+    return serie
+
+
+def df_compact(table):
+    """
+    DataFrame compact d'une table Arrow (ex : cache memory-mappé). Les colonnes texte à peu de valeurs
+    distinctes (langue, genre, auteur...) deviennent des catégories, les autres restent des chaînes Arrow
+    sans copie : lues depuis le fichier à la demande, hors du tas Python.
+    """
+    colonnes = {}
+    for nom, colonne in zip(table.column_names, table.columns):
+        if pa.types.is_dictionary(colonne.type):
+            colonnes[nom] = _categories(colonne.to_pandas())
+        elif pa.types.is_string(colonne.type) or pa.types.is_large_string(colonne.type):
+            if pc.count_distinct(colonne).as_py() <= PART_MAX_CATEGORIES * len(table):
+                colonnes[nom] = _categories(pc.dictionary_encode(colonne.combine_chunks()).to_pandas())
+            else:
+                colonnes[nom] = pd.Series(pd.arrays.ArrowExtensionArray(colonne))
+        else:
+            colonnes[nom] = colonne.to_pandas()
+    return pd.DataFrame(colonnes, index=pd.RangeIndex(len(table)), copy=False)
+
+
+# Lecture du cache s'il correspond toujours aux sources brutes et au CSV nettoyé (DataFrame compact si demandé)
+def lire_cache(csv_path, compact=False):
+    cache_path = chemin_cache(csv_path)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        table = lire_arrow(cache_path)
+        metadata = table.schema.metadata or {}
+
+        if json.loads(metadata.get(b"empreinte_csv", b"null")) != empreinte_fichier(csv_path):
+            return None
+        # Empreintes identiques : inutile de relire les sources brutes
+        noms = CATEGORIES.get(categorie_fichier(csv_path))
+        if json.loads(metadata.get(b"empreintes_sources", b"null")) != empreintes_sources(noms):
+            if metadata.get(b"hash_sources", b"").decode() != hash_sources(noms):
+                return None
+
+        return df_compact(table) if compact else table.to_pandas()
+
+    except Exception as e:
+        print("Erreur de lecture du cache :", e)
+        return None
+
+
+# Chargement d'un fichier nettoyé : cache Arrow si à jour, sinon CSV (compact : colonnes Arrow et catégories)
+def charger_donnees_nettoyees(csv_path, compact=False):
+    df = lire_cache(csv_path, compact)
+    if df is None:
+        # Premier chargement : le cache est créé à partir du CSV existant
+        if not os.path.exists(chemin_cache(csv_path)):
+            noms = CATEGORIES.get(categorie_fichier(csv_path))
+            sauvegarder_cache(csv_path, hash_sources(noms), empreintes_sources(noms))
+            # Le cache tout juste écrit est relu par memory-map
+            df = lire_cache(csv_path, compact) if compact else None
+            if df is not None:
+                print(f"Cache créé : {os.path.basename(chemin_cache(csv_path))} ({len(df)} lignes, {len(df.columns)} colonnes)")
+                return df
+        else:
+            print(f"Cache obsolète pour {os.path.basename(csv_path)}, chargement du CSV.")
+        df = config.import_data(csv_path)
+        return df_compact(pa.Table.from_pandas(df, preserve_index=False)) if compact else df
+
+    print(f"Cache chargé : {os.path.basename(chemin_cache(csv_path))} ({len(df)} lignes, {len(df.columns)} colonnes)")
+    return df
+
+
+# Lecture du manifeste des sources déjà traitées
+def lire_manifest():
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ecrire_manifest(manifest):
+    tmp_path = chemin_temporaire(MANIFEST_PATH)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+# État actuel des sources : empreinte (taille, mtime) et hash, relu seulement si l'empreinte a changé
+def etat_sources(manifest):
+    etat = {}
+    for nom, path in SOURCES.items():
+        empreinte = empreinte_fichier(path)
+        ancien = manifest.get(nom) if manifest else None
+        if empreinte is None:
+            etat[nom] = None
+        elif ancien and [ancien["taille"], ancien["mtime"]] == empreinte:
+            etat[nom] = ancien
+        else:
+            etat[nom] = {"taille": empreinte[0], "mtime": empreinte[1], "hash": hash_fichier(path)}
+    return etat
+
+
+def hash_etat(etat_source):
+    return etat_source["hash"] if etat_source else None
+
+
+# Texte d'une colonne tel que l'écrirait un f-string ligne par ligne (NaN -> "nan", 2001.0 -> "2001.0")
+def _texte_colonne(serie):
+    if serie.dtype == object:
+        return serie.map(str)
+    return serie.astype(str)
+
+
+# Source des livres anglais : "annee - titre - auteur", construite colonne par colonne
+def source_livres(df):
+    return _texte_colonne(df["annee"]) + " - " + _texte_colonne(df["titre"]) + " - " + _texte_colonne(df["auteur"])
+
+
+# Renommage des colonnes des sources qui n'ont pas le format commun
+def preparer_source(nom, df):
+    if nom == "livres_toulouse":
+        df.rename(columns={
+            "year": "annee",
+            "title": "titre",
+            "author": "auteur",
+            "classification": "genre",
+            "publisher": "description",
+            "library": "source"
+        }, inplace=True)
+
+        df["langue"] = "français"
+
+    elif nom == "livres_en":
+        df.rename(columns={
+            "Year_published": "annee",
+            "Original_Book_Title": "titre",
+            "Author_Name": "auteur",
+            "Genres": "genre",
+            "Book_Description": "description",
+            "Edition_Language": "langue"
+        }, inplace=True)
+
+        df["source"] = source_livres(df)
+
+    return df
+
+
+# Chargement d'une source préparée : depuis son cache si le hash est inchangé, sinon depuis le fichier brut
+def charger_source(nom, hash_source):
+    cache_path = os.path.join(SOURCES_DIR, f"{nom}.arrow")
+    if os.path.exists(cache_path):
+        try:
+            table = lire_arrow(cache_path)
+            if (table.schema.metadata or {}).get(b"hash_source", b"").decode() == hash_source:
+                return table.to_pandas()
+        except Exception as e:
+            print("Erreur de lecture du cache :", e)
+
+    df = preparer_source(nom, config.import_data(SOURCES[nom]))
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"hash_source"] = hash_source.encode()
+        os.makedirs(SOURCES_DIR, exist_ok=True)
+        ecrire_arrow(table.replace_schema_metadata(metadata), cache_path)
+    except Exception as e:
+        print("Erreur d'écriture du cache :", e)
+    return df
+
+
+# Nettoyage d'une catégorie à partir de ses sources préparées
+def nettoyer_categorie(categorie, sources):
+    with etape("chargement"):
+        df_save = pd.concat([sources[nom] for nom in CATEGORIES[categorie]], ignore_index=True)
+    with etape("valeurs_manquantes"):
+        df_save = config.traitement_na(config.en_categories(df_save))
+
+    with etape("doublons"):
+        # Les films sont sauvegardés avant la suppression des doublons : seul leur nombre est utile
+        if categorie == "films":
+            return df_save, int((~config.doublons(df_save)).sum())
+        df = config.drop_doublon(df_save)
+    return df, df.shape[0]
+
+
+# Nettoyage par blocs : sources lues TAILLE_BLOC lignes à la fois, pour les fichiers bruts trop gros pour la mémoire.
+# Automatique au-delà de SEUIL_PAR_BLOCS octets de sources brutes pour une catégorie (NETTOYAGE_PAR_BLOCS=1 / 0 pour forcer)
+TAILLE_BLOC = int(os.environ.get("TAILLE_BLOC_NETTOYAGE", 100_000))
+SEUIL_PAR_BLOCS = 512 * 1024 * 1024
+NETTOYAGE_PAR_BLOCS = os.environ.get("NETTOYAGE_PAR_BLOCS", "auto")
+
+
+def par_blocs(categorie):
+    if NETTOYAGE_PAR_BLOCS in ("0", "1"):
+        return NETTOYAGE_PAR_BLOCS == "1"
+    return sum(os.path.getsize(SOURCES[nom]) for nom in CATEGORIES[categorie] if os.path.exists(SOURCES[nom])) > SEUIL_PAR_BLOCS
+
+
+# Type d'une colonne après concaténation des blocs, comme pd.concat (manquante : valeurs NaN)
+def _type_commun(types, manquante):
+    types = set(types) | ({np.dtype(float)} if manquante else set())
+    if len(types) == 1:
+        return types.pop()
+    if all(t.kind in "iuf" for t in types):
+        return np.result_type(*types)
+    return np.dtype(object)
+
+
+class _Colonne:
+    """
+    Statistiques d'une colonne cumulées bloc par bloc : types, valeurs manquantes, effectif de chaque valeur numérique.
+    """
+
+    def __init__(self):
+        self.types = set()
+        self.lignes = 0
+        self.nb_na = 0
+        self.effectifs = pd.Series(dtype=float)
+
+    def ajouter(self, serie):
+        self.types.add(serie.dtype)
+        self.lignes += len(serie)
+        self.nb_na += int(serie.isnull().sum())
+        if serie.dtype.kind in "iuf":
+            self.ajouter_effectifs(serie.astype(float).value_counts())
+
+    @classmethod
+    def fusionner(cls, cumuls):
+        colonne = cls()
+        for cumul in cumuls:
+            colonne.ajouter_effectifs(cumul.effectifs)
+        return colonne
+
+    def ajouter_effectifs(self, effectifs):
+        self.effectifs = self.effectifs.add(effectifs, fill_value=0) if len(self.effectifs) else effectifs
+
+    def mediane(self):
+        # Médiane exacte à partir des effectifs (moyenne des deux valeurs centrales si nombre pair)
+        effectifs = self.effectifs.sort_index()
+        cumul = np.cumsum(effectifs.to_numpy())
+        total = int(cumul[-1])
+        valeurs = effectifs.index.to_numpy()
+        bas = valeurs[np.searchsorted(cumul, (total - 1) // 2 + 1)]
+        haut = valeurs[np.searchsorted(cumul, total // 2 + 1)]
+        return (bas + haut) / 2
+
+
+def _statistiques_source(nom, taille_bloc):
+    """
+    Premier passage sur une source : format de lecture retenu, type de chaque colonne brute sur tout le fichier,
+    nombre de lignes et statistiques par colonne préparée.
+    Un encodage qui échoue en cours de lecture fait recommencer la source avec le suivant, comme import_data.
+    """
+    path = SOURCES[nom]
+    for format_csv in config.formats_csv(config.prefixe_fichier(path)):
+        try:
+            types_bruts, lignes, colonnes = {}, 0, {}
+            for bloc in config.lire_csv_par_blocs(path, taille_bloc, *format_csv):
+                for col, dtype in bloc.dtypes.items():
+                    types_bruts.setdefault(col, set()).add(dtype)
+                bloc = preparer_source(nom, bloc)
+                lignes += len(bloc)
+                for col in bloc.columns:
+                    colonnes.setdefault(col, _Colonne()).ajouter(bloc[col])
+            types_bruts = {col: _type_commun(types, False) for col, types in types_bruts.items()}
+            return format_csv, types_bruts, lignes, colonnes
+        except Exception:
+            continue
+    raise ValueError(f"Impossible de charger le fichier {os.path.basename(path)}")
+
+
+def _hash_titres(titres):
+    return pd.util.hash_array(titres.to_numpy(dtype=object), categorize=False)
+
+
+class _TitresVus:
+    """
+    Titres déjà écrits : hash triés (recherche vectorisée) et titres correspondants.
+    Deux titres distincts peuvent avoir le même hash : à hash égal, les titres sont comparés.
+    """
+
+    def __init__(self):
+        self.hashs = np.array([], dtype=np.uint64)
+        self.titres = np.array([], dtype=object)
+
+    def nouveaux(self, titres):
+        """
+        Masque des titres jamais vus (première occurrence dans le bloc), qui sont ajoutés aux titres vus.
+        """
+        valeurs = titres.to_numpy(dtype=object)
+        hashs = _hash_titres(titres)
+        nouveaux = ~titres.duplicated().to_numpy()
+        if len(self.hashs):
+            debuts = np.searchsorted(self.hashs, hashs, side="left")
+            fins = np.searchsorted(self.hashs, hashs, side="right")
+            touches = nouveaux & (fins > debuts)
+            egaux = np.zeros(len(valeurs), dtype=bool)
+            egaux[touches] = self.titres[debuts[touches]] == valeurs[touches]
+            # Collision : plusieurs titres vus ont ce hash, comparaison avec chacun
+            for i in np.flatnonzero(touches & ~egaux & (fins - debuts > 1)):
+                egaux[i] = any(titre == valeurs[i] for titre in self.titres[debuts[i] + 1:fins[i]])
+            nouveaux &= ~egaux
+        hashs = np.concatenate([self.hashs, hashs[nouveaux]])
+        ordre = np.argsort(hashs, kind="stable")
+        self.hashs = hashs[ordre]
+        self.titres = np.concatenate([self.titres, valeurs[nouveaux]])[ordre]
+        return nouveaux
+
+
+def nettoyer_categorie_par_blocs(categorie, csv_path, taille_bloc=TAILLE_BLOC):
+    """
+    Même résultat que nettoyer_categorie suivi de l'écriture du CSV, en mémoire bornée :
+    un premier passage cumule les statistiques des colonnes (valeurs manquantes, médianes),
+    le second complète chaque bloc, retire les titres déjà vus (hash triés des titres, vérifiés sur les titres
+    eux-mêmes : seuls les titres distincts restent en mémoire) et l'ajoute au fichier nettoyé. Renvoie le nombre de lignes comme nettoyer_categorie.
+    """
+    noms = CATEGORIES[categorie]
+    # Premier passage (lecture complète des sources) compté dans le chargement
+    with etape("chargement"):
+        statistiques = {nom: _statistiques_source(nom, taille_bloc) for nom in noms}
+    total = sum(lignes for _, _, lignes, _ in statistiques.values())
+
+    # Colonnes dans l'ordre de pd.concat, types et valeurs de remplacement de traitement_na
+    ordre = list(dict.fromkeys(col for *_, colonnes in statistiques.values() for col in colonnes))
+    types, remplacements, gardees = {}, {}, []
+    for col in ordre:
+        cumuls = [colonnes[col] for *_, colonnes in statistiques.values() if col in colonnes]
+        manquantes = total - sum(cumul.lignes for cumul in cumuls)
+        types[col] = _type_commun([t for cumul in cumuls for t in cumul.types], manquantes > 0)
+        nb_na = manquantes + sum(cumul.nb_na for cumul in cumuls)
+        if nb_na and (nb_na / total) * 100 > 20:
+            continue
+        if nb_na and types[col] == object:
+            remplacements[col] = "Inconnu"
+        elif nb_na:
+            remplacements[col] = _Colonne.fusionner(cumuls).mediane()
+        gardees.append(col)
+    gardees = [col for col in gardees if types[col] == object] + [col for col in gardees if types[col] != object]
+
+    vus = _TitresVus()
+    nb_lignes = 0
+    tmp_path = chemin_temporaire(csv_path)
+    with open(tmp_path, "w", encoding="utf-8", newline="") as sortie:
+        pd.DataFrame(columns=gardees).to_csv(sortie, index=False)
+        for nom in noms:
+            format_csv, types_bruts = statistiques[nom][:2]
+            for bloc in etape_par_element("chargement", config.lire_csv_par_blocs(SOURCES[nom], taille_bloc, *format_csv)):
+                with etape("chargement"):
+                    # Types du fichier entier avant préparation (la colonne source des livres en dépend)
+                    bloc = bloc.astype({col: dtype for col, dtype in types_bruts.items() if bloc[col].dtype != dtype})
+                    bloc = preparer_source(nom, bloc).reindex(columns=gardees)
+                with etape("valeurs_manquantes"):
+                    for col in gardees:
+                        if bloc[col].dtype != types[col]:
+                            bloc[col] = bloc[col].astype(types[col])
+                        if col not in remplacements:
+                            continue
+                        manquantes = bloc[col].isnull().to_numpy()
+                        if not manquantes.any():
+                            continue
+                        if types[col] == object:
+                            bloc[col] = config.completer_texte(bloc[col], manquantes)
+                        else:
+                            bloc[col] = bloc[col].fillna(remplacements[col])
+
+                with etape("doublons"):
+                    # Doublons : titre déjà vu dans ce bloc ou dans un bloc précédent
+                    nouveaux = vus.nouveaux(bloc["titre"])
+                    nb_lignes += int(nouveaux.sum())
+
+                    # Les films sont sauvegardés avant la suppression des doublons
+                    if categorie != "films":
+                        bloc = bloc[nouveaux]
+                with etape("ecriture"):
+                    bloc.to_csv(sortie, index=False, header=False)
+    os.replace(tmp_path, csv_path)
+    return nb_lignes
+
 
 # Chargement, netoyage et sauvegarde des données
-def load_clean_and_save_data():
+def load_clean_and_save_data(force=False):
     """
-    Charge, nettoie et sauvegarde les données dans le dossier data_cleaned
+    Charge, nettoie et sauvegarde les données dans le dossier data_cleaned.
+    Seules les catégories dont une source a changé depuis le dernier passage
+    (d'après le manifeste) sont reconstruites. Un seul processus nettoie à la fois :
+    les autres attendent puis trouvent les fichiers à jour.
     """
-    import os
-    # Chemin absolu vers le dossier du projet
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    
-    # Charger les datasets avec chemins absolus
-    films_fr_import = config.import_data(os.path.join(BASE_DIR, "data/films_fr.csv"))
-    films_import = config.import_data(os.path.join(BASE_DIR, "data/films.csv"))
-    musiques_import = config.import_data(os.path.join(BASE_DIR, "data/musiques.csv"))
-    livres_en_import = config.import_data(os.path.join(BASE_DIR, "data/Livres_en_anglais.csv"))
-    livres_toulouse_import = config.import_data(os.path.join(BASE_DIR, "data/Librairie_toulouse.csv"))
-    livres_fr_import = config.import_data(os.path.join(BASE_DIR, "data/livres_fr.csv"))
-
-    livres_toulouse_import.rename(columns={
-        "year": "annee",
-        "title": "titre",
-        "author": "auteur",
-        "classification": "genre",
-        "publisher": "description",
-        "library": "source"
-    }, inplace=True)
-
-    livres_toulouse_import["langue"] = "français"
-
-    livres_en_import.rename(columns={
-        "Year_published": "annee",
-        "Original_Book_Title": "titre",
-        "Author_Name": "auteur",
-        "Genres": "genre",
-        "Book_Description": "description",
-        "Edition_Language": "langue"
-    }, inplace=True)
-
-    livres_en_import["source"] = livres_en_import.apply(lambda x: f"{x['annee']} - {x['titre']} - {x['auteur']}", axis=1)
-
-    df_films_save = pd.concat([films_fr_import, films_import], ignore_index=True)
-    df_livres_save = pd.concat([livres_fr_import, livres_toulouse_import, livres_en_import], ignore_index=True)
-    df_musiques_save = musiques_import
-
-
-    # Nétoyage des données
-    df_films_save = config.traitement_na(df_films_save)
-    df_livres_save = config.traitement_na(df_livres_save)
-    df_musiques_save = config.traitement_na(df_musiques_save)
-    
-    df_films = config.drop_doublon(df_films_save)
-    df_livres = config.drop_doublon(df_livres_save)
-    df_musiques = config.drop_doublon(df_musiques_save)
-    
+    # Import local : stockage_partage importe ce module
+    from modules.stockage_partage import VerrouFichier
+
     # Création du dossier cleaned s'il n'existe pas
-    cleaned_dir = os.path.join(BASE_DIR, "data/data_cleaned")
-    if not os.path.exists(cleaned_dir):
-        os.makedirs(cleaned_dir)
-        
-    # Sauvegarde des données nettoyées
-    df_films_save.to_csv(os.path.join(cleaned_dir, "films.csv"), index=False, encoding="utf-8")
-    df_livres.to_csv(os.path.join(cleaned_dir, "livres.csv"), index=False, encoding="utf-8")
-    df_musiques.to_csv(os.path.join(cleaned_dir, "musiques.csv"), index=False, encoding="utf-8")
-
-    print(f"Films sauvegardés avec succès : {df_films.shape[0]} lignes")
-    print(f"Livres sauvegardés avec succès : {df_livres.shape[0]} lignes")
-    print(f"Musiques sauvegardées avec succès : {df_musiques.shape[0]} lignes")
+    if not os.path.exists(CLEANED_DIR):
+        os.makedirs(CLEANED_DIR)
+
+    with VerrouFichier(VERROU_NETTOYAGE_PATH):
+        _nettoyer_et_sauvegarder(force)
+
+
+def _nettoyer_et_sauvegarder(force):
+    manifest = lire_manifest()
+    etat = etat_sources(manifest)
+
+    # Sans manifeste, les fichiers nettoyés déjà présents servent de référence
+    if manifest is None and not force:
+        manifest = {
+            nom: etat[nom]
+            for categorie, noms in CATEGORIES.items()
+            if os.path.exists(os.path.join(CLEANED_DIR, f"{categorie}.csv"))
+            for nom in noms
+        }
+
+    nouveau_manifest = dict(manifest or {})
+    a_reconstruire = []
+    for categorie, noms in CATEGORIES.items():
+        csv_path = os.path.join(CLEANED_DIR, f"{categorie}.csv")
+        modifiee = any(hash_etat(etat.get(nom)) != hash_etat((manifest or {}).get(nom)) for nom in noms)
+        if force or modifiee or not os.path.exists(csv_path):
+            a_reconstruire.append(categorie)
+        else:
+            nouveau_manifest.update({nom: etat[nom] for nom in noms})
+
+    for categorie in a_reconstruire:
+        noms = CATEGORIES[categorie]
+        csv_path = os.path.join(CLEANED_DIR, f"{categorie}.csv")
+
+        # Source absente : on garde les données nettoyées existantes
+        absentes = [nom for nom in noms if etat[nom] is None]
+        if absentes and os.path.exists(csv_path):
+            print(f"Sources manquantes pour {categorie} ({', '.join(absentes)}), fichier nettoyé conservé.")
+            continue
+
+        # Durées des étapes (chargement, valeurs_manquantes, doublons, ecriture), exposées sur /metrics
+        with mesurer() as mesures:
+            if par_blocs(categorie):
+                nb_lignes = nettoyer_categorie_par_blocs(categorie, csv_path)
+            else:
+                with etape("chargement"):
+                    sources = {nom: charger_source(nom, hash_etat(etat[nom])) for nom in noms}
+                df, nb_lignes = nettoyer_categorie(categorie, sources)
+                with etape("ecriture"):
+                    tmp_path = chemin_temporaire(csv_path)
+                    df.to_csv(tmp_path, index=False, encoding="utf-8")
+                    os.replace(tmp_path, csv_path)
+
+            # Cache colonnes des données nettoyées
+            hash_brut = combiner_hashs({nom: hash_etat(etat[nom]) for nom in noms})
+            with etape("ecriture"):
+                sauvegarder_cache(csv_path, hash_brut, {nom: empreinte_fichier(SOURCES[nom]) for nom in noms})
+        enregistrer_nettoyage(categorie, mesures)
+        nouveau_manifest.update({nom: etat[nom] for nom in noms})
+
+        durees = ", ".join(f"{nom} {duree:.2f} s" for nom, duree in mesures.etapes.items())
+        print(f"{LIBELLES[categorie]} avec succès : {nb_lignes} lignes ({durees})")
 
+    if nouveau_manifest != manifest:
+        ecrire_manifest(nouveau_manifest)
+    if not a_reconstruire:
+        print("Données nettoyées à jour, aucune reconstruction nécessaire.")
@@ -0,0 +1,271 @@
+import time
+import numpy as np
+import pandas as pd
+from modules.genres import libelles_genre
+from modules.croisement import LANGUES
+from modules.metriques import compter
+from modules.personnalisation import TAILLE_TRANCHE, VALEURS_VIDES
+from modules.recherche import plier_texte
+
+# Une valeur présente sur au moins 1/DENSITE_BITSET des lignes a son bitset (une ligne = un bit) ;
+# les plus rares gardent la liste de leurs lignes (4 octets par ligne), plus compacte
+DENSITE_BITSET = 32
+# Nombre de valeurs renvoyées par facette (les plus fréquentes)
+NB_VALEURS_FACETTE = 50
+# Libellés des langues reconnues (codes de croisement.LANGUES)
+LIBELLES_LANGUES = {"fr": "français", "en": "anglais"}
+_VIDES = {plier_texte(valeur) for valeur in VALEURS_VIDES}
+# Tableaux d'un index de facettes, dans l'ordre de IndexFacettes.attacher
+FICHIERS = [
+    f"{facette}_{nom}" for facette in ["genre", "langue"]
+    for nom in ["cles", "libelles", "denses", "bits", "rares", "rares_bornes", "rares_lignes"]
+] + ["annees"]
+
+
+def _empaqueter(masque):
+    """
+    Masque booléen -> bitset (mots de 64 bits, bit i = ligne i).
+    """
+    octets = np.packbits(masque, bitorder="little")
+    return np.pad(octets, (0, -len(octets) % 8)).view(np.uint64)
+
+
+def _depaqueter(bits, n):
+    return np.unpackbits(bits.view(np.uint8), count=n, bitorder="little").view(bool)
+
+
+def _cle(libelle):
+    return plier_texte(str(libelle)).strip()
+
+
+def _cle_langue(valeur):
+    cle = _cle(valeur)
+    return LANGUES.get(cle, cle)
+
+
+class Facette:
+    """
+    Lignes de chaque valeur d'une caractéristique à plusieurs valeurs par ligne (genres) ou une seule (langue).
+    Valeurs fréquentes : un bitset par valeur ; valeurs rares : liste triée de leurs lignes.
+    Les valeurs sont comparées sans casse ni accents (cles, triées) ; libelles garde leur forme d'origine.
+    """
+
+    def __init__(self, lignes, codes, libelles, n):
+        """
+        lignes, codes : couples (ligne, position du libellé dans libelles), une ligne pouvant avoir plusieurs libellés.
+        """
+        cles = np.array([_cle(libelle) for libelle in libelles], dtype=str)
+        self.cles, premiers, inverse = np.unique(cles, return_index=True, return_inverse=True)
+        self.libelles = np.array(libelles, dtype=str)[premiers]
+        codes = inverse[np.asarray(codes, dtype=np.intp)]
+        self.nb_lignes = n
+
+        # Une valeur répétée sur une même ligne ne compte qu'une fois
+        paires = np.unique(codes.astype(np.int64) * max(n, 1) + np.asarray(lignes, dtype=np.int64))
+        codes, lignes = paires // max(n, 1), (paires % max(n, 1)).astype(np.int32)
+        comptes = np.bincount(codes, minlength=len(self.cles))
+        bornes = np.concatenate([[0], np.cumsum(comptes)])
+
+        denses = comptes * DENSITE_BITSET >= n
+        self.denses = np.flatnonzero(denses).astype(np.int32)
+        self.bits = np.zeros((len(self.denses), (n + 63) // 64), dtype=np.uint64)
+        for i, valeur in enumerate(self.denses):
+            masque = np.zeros(n, dtype=bool)
+            masque[lignes[bornes[valeur]:bornes[valeur + 1]]] = True
+            self.bits[i] = _empaqueter(masque)
+
+        self.rares = np.flatnonzero(~denses).astype(np.int32)
+        self.rares_bornes = np.concatenate([[0], np.cumsum(comptes[self.rares])]).astype(np.int64)
+        self.rares_lignes = lignes[np.isin(codes, self.rares)]
+
+    @classmethod
+    def attacher(cls, cles, libelles, denses, bits, rares, rares_bornes, rares_lignes, n):
+        """
+        Facette construite sur des tableaux déjà calculés (ex : memory-mappés), sans copie.
+        """
+        facette = cls.__new__(cls)
+        facette.cles, facette.libelles = cles, libelles
+        facette.denses, facette.bits = denses, bits
+        facette.rares, facette.rares_bornes, facette.rares_lignes = rares, rares_bornes, rares_lignes
+        facette.nb_lignes = n
+        return facette
+
+    def tableaux(self):
+        return {nom: getattr(self, nom) for nom in ["cles", "libelles", "denses", "bits", "rares", "rares_bornes", "rares_lignes"]}
+
+    def _valeurs(self, cles):
+        """
+        Positions dans cles des valeurs connues (les autres sont ignorées).
+        """
+        cles = np.array(list(cles), dtype=str)
+        if len(self.cles) == 0 or len(cles) == 0:
+            return np.array([], dtype=np.intp)
+        positions = np.minimum(np.searchsorted(self.cles, cles), len(self.cles) - 1)
+        return np.unique(positions[self.cles[positions] == cles])
+
+    def masque(self, cles):
+        """
+        Bitset des lignes ayant au moins une des valeurs (cles pliées).
+        """
+        valeurs = self._valeurs(cles)
+        selection = np.isin(self.denses, valeurs)
+        if selection.any():
+            bits = np.bitwise_or.reduce(self.bits[selection], axis=0)
+        else:
+            bits = np.zeros((self.nb_lignes + 63) // 64, dtype=np.uint64)
+
+        rares = np.flatnonzero(np.isin(self.rares, valeurs))
+        if len(rares):
+            masque = np.zeros(self.nb_lignes, dtype=bool)
+            masque[np.concatenate([self.rares_lignes[self.rares_bornes[r]:self.rares_bornes[r + 1]] for r in rares])] = True
+            bits |= _empaqueter(masque)
+        return bits
+
+    def comptes(self, bits, masque):
+        """
+        Nombre de lignes de la sélection (bitset et masque booléen équivalent) pour chaque valeur.
+        """
+        comptes = np.zeros(len(self.cles), dtype=np.int64)
+        if len(self.denses):
+            comptes[self.denses] = np.bitwise_count(self.bits & bits).sum(axis=1)
+        if len(self.rares_lignes):
+            presents = masque[self.rares_lignes].astype(np.int64)
+            comptes[self.rares] = np.add.reduceat(presents, self.rares_bornes[:-1])
+        return comptes
+
+    def frequents(self, comptes, n=NB_VALEURS_FACETTE):
+        """
+        {libellé: nombre} des n valeurs les plus fréquentes (à égalité, ordre des valeurs), sans les absentes.
+        """
+        ordre = np.argsort(-comptes, kind="stable")[:n]
+        return {str(self.libelles[i]): int(comptes[i]) for i in ordre if comptes[i] > 0}
+
+
+def _facette_genres(colonne):
+    """
+    Facette des genres : chaque valeur distincte est décodée une seule fois ("28, 80" -> Action, Crime).
+    """
+    codes, distinctes = pd.factorize(colonne)
+    vocabulaire = {}
+    decodees = [
+        [vocabulaire.setdefault(libelle, len(vocabulaire)) for libelle in libelles_genre(valeur) if _cle(libelle) not in _VIDES]
+        for valeur in distinctes
+    ]
+    # Couples (ligne, libellé) : chaque ligne reprend les libellés de sa valeur (aucun si elle est manquante)
+    tailles = np.array([len(libelles) for libelles in decodees] + [0])
+    debuts = np.concatenate([[0], np.cumsum(tailles)[:-1]])
+    tous = np.array([libelle for libelles in decodees for libelle in libelles], dtype=np.intp)
+    repetitions = tailles[codes]
+    lignes = np.repeat(np.arange(len(colonne)), repetitions)
+    rangs = np.arange(len(lignes)) - np.repeat(np.cumsum(repetitions) - repetitions, repetitions)
+    return Facette(lignes, tous[np.repeat(debuts[codes], repetitions) + rangs], list(vocabulaire), len(colonne))
+
+
+def _facette_langues(colonne):
+    """
+    Facette des langues : "English" et "anglais" sont la même valeur (croisement.LANGUES).
+    """
+    codes, distinctes = pd.factorize(colonne)
+    libelles = [LIBELLES_LANGUES.get(_cle_langue(v), str(v)) for v in distinctes]
+    # Valeurs manquantes (code -1) et valeurs de remplissage ignorées
+    gardees = np.array([_cle(libelle) not in _VIDES for libelle in libelles] + [False])
+    connues = np.flatnonzero(gardees[codes])
+    return Facette(connues, codes[connues], libelles, len(colonne))
+
+
+class IndexFacettes:
+    """
+    Filtres d'un catalogue (genres, langue, période) et nombre de résultats par valeur (facettes).
+    Genres et langues sont des bitsets par valeur, calculés au chargement : un filtre est une intersection
+    de bitsets, sans parcourir les chaînes de caractères.
+    """
+
+    def __init__(self, df):
+        debut = time.perf_counter()
+        n = len(df)
+        vides = pd.Series([""] * n, index=df.index)
+        self.genre = _facette_genres(df["genre"] if "genre" in df.columns else vides)
+        self.langue = _facette_langues(df["langue"] if "langue" in df.columns else vides)
+        if "annee" in df.columns:
+            self.annees = pd.to_numeric(df["annee"], errors="coerce").to_numpy(dtype=np.float32)
+        else:
+            self.annees = np.full(n, np.nan, dtype=np.float32)
+        self.nb_lignes = n
+        self.duree_construction = time.perf_counter() - debut
+
+    @classmethod
+    def attacher(cls, *tableaux):
+        """
+        Index construit sur des tableaux déjà calculés (ex : memory-mappés, dans l'ordre de FICHIERS), sans copie.
+        """
+        index = cls.__new__(cls)
+        index.annees = tableaux[-1]
+        index.nb_lignes = len(index.annees)
+        index.genre = Facette.attacher(*tableaux[:7], index.nb_lignes)
+        index.langue = Facette.attacher(*tableaux[7:14], index.nb_lignes)
+        index.duree_construction = 0.0
+        return index
+
+    def tableaux(self):
+        tableaux = {f"genre_{nom}": tableau for nom, tableau in self.genre.tableaux().items()}
+        tableaux.update({f"langue_{nom}": tableau for nom, tableau in self.langue.tableaux().items()})
+        tableaux["annees"] = self.annees
+        return tableaux
+
+    def genres_frequents(self, n=30):
+        """
+        Les n genres les plus fréquents du catalogue (libellés décodés), pour proposer des choix.
+        """
+        tout = _empaqueter(np.ones(self.nb_lignes, dtype=bool))
+        return list(self.genre.frequents(self.genre.comptes(tout, np.ones(self.nb_lignes, dtype=bool)), n))
+
+    def filtrer(self, genres=(), langues=(), annee_min=None, annee_max=None, lignes=None, facettes=False):
+        """
+        Éléments ayant au moins un des genres, une des langues et une année dans [annee_min, annee_max]
+        (filtres vides ignorés). lignes : positions candidates (ex : résultats d'une recherche), tout le catalogue
+        par défaut. Renvoie (masque booléen aligné sur lignes ou sur le catalogue, facettes ou None).
+        Le nombre de résultats par valeur d'une facette tient compte des autres filtres, pas du sien
+        (on voit ce qu'ajouterait une autre valeur).
+        """
+        n = self.nb_lignes
+        compter("lignes_parcourues", n)
+        candidats = np.ones(n, dtype=bool)
+        if lignes is not None:
+            candidats = np.zeros(n, dtype=bool)
+            candidats[lignes] = True
+        filtres = {"genre": None, "langue": None, "annee": None}
+        if genres:
+            # Identifiants TMDB acceptés : genre=28 -> Action
+            filtres["genre"] = self.genre.masque(_cle(libelle) for g in genres for libelle in libelles_genre(g) or [g])
+        if langues:
+            filtres["langue"] = self.langue.masque(_cle(LIBELLES_LANGUES.get(_cle_langue(l), l)) for l in langues)
+        if annee_min is not None or annee_max is not None:
+            periode = ~np.isnan(self.annees)
+            if annee_min is not None:
+                periode &= self.annees >= annee_min
+            if annee_max is not None:
+                periode &= self.annees <= annee_max
+            filtres["annee"] = _empaqueter(periode)
+
+        def selection(sauf=None):
+            bits = _empaqueter(candidats)
+            for nom, masque in filtres.items():
+                if masque is not None and nom != sauf:
+                    bits &= masque
+            return bits
+
+        garder = _depaqueter(selection(), n)
+        if lignes is not None:
+            garder = garder[lignes]
+        if not facettes:
+            return garder, None
+
+        comptes = {}
+        for nom, facette in [("genre", self.genre), ("langue", self.langue)]:
+            bits = selection(nom)
+            comptes[nom] = facette.frequents(facette.comptes(bits, _depaqueter(bits, n)))
+        # Période : nombre de résultats par tranche d'années ("1990" : 1990 à 1999)
+        annees = self.annees[_depaqueter(selection("annee"), n)]
+        tranches, nombres = np.unique(np.floor(annees[~np.isnan(annees)] / TAILLE_TRANCHE).astype(np.int64), return_counts=True)
+        comptes["annee"] = {str(int(t * TAILLE_TRANCHE)): int(c) for t, c in zip(tranches, nombres)}
+        return garder, comptes
@@ -0,0 +1,53 @@
+import re
+from modules.recherche import plier_texte
+
+# Genres des films TMDB (identifiants de genre_ids), libellés de l'API en français
+GENRES_TMDB = {
+    28: "Action", 12: "Aventure", 16: "Animation", 35: "Comédie", 80: "Crime",
+    99: "Documentaire", 18: "Drame", 10751: "Familial", 14: "Fantastique", 36: "Histoire",
+    27: "Horreur", 10402: "Musique", 9648: "Mystère", 10749: "Romance", 878: "Science-Fiction",
+    10770: "Téléfilm", 53: "Thriller", 10752: "Guerre", 37: "Western",
+}
+
+# Familles de genres communes aux films, livres et musiques : mots (pliés) qui y rattachent un genre
+FAMILLES_GENRES = {
+    "action": ["action", "aventure", "adventure"],
+    "comedie": ["comedie", "comedy", "humour", "humor"],
+    "crime": ["crime", "policier", "polar", "thriller", "mystere", "mystery", "detective", "suspense"],
+    "documentaire": ["documentaire", "documentary", "biographie", "biography", "memoires", "essai"],
+    "drame": ["drame", "drama"],
+    "fantastique": ["fantastique", "fantasy", "merveilleux", "magie"],
+    "guerre": ["guerre", "war", "militaire"],
+    "histoire": ["histoire", "history", "historique", "historical"],
+    "horreur": ["horreur", "horror", "epouvante"],
+    "jeunesse": ["familial", "family", "jeunesse", "juvenile", "enfants", "children", "animation"],
+    "musique": ["musique", "music", "musical"],
+    "romance": ["romance", "romantique", "romantic", "amour", "love", "sentimental"],
+    "science-fiction": ["science-fiction", "science fiction", "sci-fi", "anticipation"],
+    "western": ["western"],
+}
+_FAMILLES = [
+    (famille, re.compile(r"\b(?:" + "|".join(re.escape(mot) for mot in mots) + r")\b"))
+    for famille, mots in FAMILLES_GENRES.items()
+]
+
+
+def libelles_genre(valeur):
+    """
+    Libellés d'une valeur de la colonne genre : "28, 80" -> ["Action", "Crime"], "Hip-hop/Rap" -> ["Hip-hop/Rap"].
+    Les identifiants TMDB inconnus, et les chiffres qu'int() ne lit pas ('²', '①'), sont gardés tels quels.
+    """
+    libelles = []
+    for part in str(valeur).split(","):
+        part = part.strip()
+        if part:
+            libelles.append(GENRES_TMDB.get(int(part), part) if part.isdecimal() else part)
+    return libelles
+
+
+def familles_genre(libelle):
+    """
+    Familles communes (FAMILLES_GENRES) auxquelles se rattache un libellé de genre.
+    """
+    texte = plier_texte(libelle)
+    return [famille for famille, motif in _FAMILLES if motif.search(texte)]
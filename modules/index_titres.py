@@ -0,0 +1,306 @@
+import unicodedata
+import numpy as np
+import pandas as pd
+from collections.abc import Mapping
+from functools import lru_cache
+from modules.metriques import compter
+
+# Caractères ayant un sens particulier pour str.contains (regex=True par défaut)
+CARACTERES_REGEX = set(".^$*+?{}[]\\|()")
+TAILLE_NGRAM = 3
+
+# Recherche approchée : candidats évalués et nombre maximal d'entrées de listes lues par requête
+NB_CANDIDATS = 64
+BUDGET_POSTINGS = 100_000
+
+
+@lru_cache(maxsize=None)
+def _normaliser_caractere(c):
+    """
+    Ramène un caractère à une forme unique, compatible avec re.IGNORECASE
+    (ex : 'ſ' -> 's', 'µ' -> 'μ'), puis retire ses accents ('É' -> 'e').
+    Deux caractères égaux à la casse près ont toujours la même forme.
+    La mise en minuscules finale vient après la décomposition : 'İ' (sans minuscule d'un seul caractère)
+    donne 'I' + point, puis 'i', comme pour re.IGNORECASE.
+    """
+    u = c.upper()
+    if len(u) != 1:
+        u = c
+    l = u.lower()
+    if len(l) != 1:
+        l = c.lower() if len(c.lower()) == 1 else c
+    return "".join(x for x in unicodedata.normalize("NFKD", l) if unicodedata.category(x) != "Mn").lower()
+
+
+def normaliser_titre(texte):
+    """
+    Normalise un titre pour l'index (insensible à la casse et aux accents).
+    La normalisation se fait caractère par caractère : si une requête est contenue
+    dans un titre à la casse près, sa forme normalisée est contenue dans celle du titre.
+    """
+    if texte.isascii():
+        return texte.lower()
+    return "".join(map(_normaliser_caractere, texte))
+
+
+def ngrams(texte, n=TAILLE_NGRAM):
+    return {texte[i:i + n] for i in range(len(texte) - n + 1)}
+
+
+class PostingsCSR(Mapping):
+    """
+    Listes de positions stockées à plat (format CSR) : trigrammes triés, bornes et positions.
+    Les tableaux peuvent être des vues memory-mappées (np.load(..., mmap_mode="r")), lues sans copie.
+    """
+
+    def __init__(self, grams, bornes, positions):
+        self.grams = grams
+        self.bornes = bornes
+        self.positions = positions
+
+    def _rang(self, gram):
+        i = int(np.searchsorted(self.grams, gram))
+        return i if i < len(self.grams) and self.grams[i] == gram else None
+
+    def __getitem__(self, gram):
+        i = self._rang(gram)
+        if i is None:
+            raise KeyError(gram)
+        return self.positions[self.bornes[i]:self.bornes[i + 1]]
+
+    def __contains__(self, gram):
+        return self._rang(gram) is not None
+
+    def __iter__(self):
+        return iter(self.grams.tolist())
+
+    def __len__(self):
+        return len(self.grams)
+
+
+class IndexTitres:
+    """
+    Index inversé de trigrammes sur une colonne de titres.
+    Chaque trigramme pointe vers la liste triée des positions des lignes qui le contiennent.
+    """
+
+    def __init__(self, titres):
+        postings = {}
+        for position, titre in enumerate(titres):
+            if not isinstance(titre, str):
+                continue
+            for gram in ngrams(normaliser_titre(titre)):
+                liste = postings.get(gram)
+                if liste is None:
+                    postings[gram] = [position]
+                else:
+                    liste.append(position)
+
+        self.nb_lignes = len(titres)
+        self.postings = {gram: np.array(liste, dtype=np.int32) for gram, liste in postings.items()}
+
+    def vers_csr(self):
+        """
+        (trigrammes triés, bornes, positions) : l'index à plat, pour l'écrire sur disque.
+        """
+        grams = sorted(self.postings)
+        listes = [self.postings[g] for g in grams]
+        bornes = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum([len(liste) for liste in listes], out=bornes[1:])
+        positions = np.concatenate(listes) if listes else np.empty(0, dtype=np.int32)
+        return np.array(grams, dtype=f"<U{TAILLE_NGRAM}"), bornes, positions
+
+    @classmethod
+    def attacher(cls, grams, bornes, positions, nb_lignes):
+        """
+        Index construit sur des tableaux déjà calculés (cf. vers_csr), sans copie.
+        """
+        index = cls.__new__(cls)
+        index.nb_lignes = nb_lignes
+        index.postings = PostingsCSR(grams, bornes, positions)
+        return index
+
+    def candidats(self, requete):
+        """
+        Renvoie les positions (triées) des lignes pouvant contenir la requête,
+        ou None si l'index ne peut pas répondre (requête trop courte ou regex).
+        """
+        normalisee = normaliser_titre(requete)
+        if len(normalisee) < TAILLE_NGRAM or any(c in CARACTERES_REGEX for c in requete):
+            return None
+
+        listes = []
+        for gram in ngrams(normalisee):
+            liste = self.postings.get(gram)
+            if liste is None:
+                return np.empty(0, dtype=np.int32)
+            listes.append(liste)
+
+        # Intersection en partant des listes les plus courtes
+        listes.sort(key=len)
+        result = listes[0]
+        for liste in listes[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, liste, assume_unique=True)
+        return result
+
+    def candidats_approches(self, requete, nb_max=NB_CANDIDATS):
+        """
+        Positions des titres partageant le plus de trigrammes avec la requête (au plus nb_max),
+        avec la proportion de trigrammes de la requête retrouvés dans chacun.
+        Les listes les plus longues (trigrammes fréquents) sont ignorées au-delà de BUDGET_POSTINGS.
+        """
+        normalisee = normaliser_titre(requete)
+        grams = ngrams(normalisee)
+        # Requête courte : une seule faute peut toucher tous ses trigrammes,
+        # on ajoute ceux des variantes privées d'un caractère
+        if len(normalisee) <= 8:
+            for i in range(len(normalisee)):
+                grams |= ngrams(normalisee[:i] + normalisee[i + 1:])
+
+        listes = sorted((self.postings[g] for g in grams if g in self.postings), key=len)
+        if not listes:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+
+        retenues, total = [], 0
+        for liste in listes:
+            if retenues and total + len(liste) > BUDGET_POSTINGS:
+                break
+            retenues.append(liste)
+            total += len(liste)
+
+        positions, comptes = np.unique(np.concatenate(retenues), return_counts=True)
+        if len(positions) > nb_max:
+            meilleurs = np.argpartition(-comptes, nb_max - 1)[:nb_max]
+            positions, comptes = positions[meilleurs], comptes[meilleurs]
+        return positions, np.minimum(comptes / len(ngrams(normalisee)), 1)
+
+
+def distance_sous_chaine(motif, texte):
+    """
+    Plus petite distance d'édition entre motif et une sous-chaîne de texte
+    (algorithme bit-parallèle de Myers, en O(len(texte))).
+    """
+    m = len(motif)
+    if m == 0:
+        return 0
+
+    peq = {}
+    for i, c in enumerate(motif):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    tout = (1 << m) - 1
+    haut = 1 << (m - 1)
+
+    pv, mv, score, meilleur = tout, 0, m, m
+    for c in texte:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & tout
+        mh = pv & xh
+        if ph & haut:
+            score += 1
+        elif mh & haut:
+            score -= 1
+        ph = (ph << 1) & tout
+        mh = (mh << 1) & tout
+        pv = (mh | ~(xv | ph)) & tout
+        mv = ph & xv
+        if score < meilleur:
+            meilleur = score
+    return meilleur
+
+
+def score_titre(requete, titre, part_ngrams):
+    """
+    Score entre 0 et 1 : erreurs de frappe (distance à la meilleure sous-chaîne),
+    trigrammes communs et mots communs.
+    """
+    distance = distance_sous_chaine(requete, titre)
+    mots_requete, mots_titre = set(requete.split()), set(titre.split())
+    mots_communs = len(mots_requete & mots_titre) / len(mots_requete | mots_titre) if mots_requete else 0
+    return 0.6 * (1 - distance / len(requete)) + 0.25 * part_ngrams + 0.15 * mots_communs, distance
+
+
+def rechercher_titres_approches(df, index, titre, k=10):
+    """
+    Recherche tolérante aux fautes de frappe : les k titres les plus proches, triés par score.
+    Seuls les candidats préfiltrés par l'index de trigrammes sont évalués.
+    """
+    requete = normaliser_titre(titre).strip()
+    if len(requete) < TAILLE_NGRAM:
+        result = filtrer_par_titre(df, index, titre).head(k).copy()
+        result["score"] = 1.0
+        return result
+
+    positions, parts = index.candidats_approches(titre)
+    compter("lignes_parcourues", len(positions))
+    erreurs_max = 1 + len(requete) // 4
+    titres = df["titre"].take(positions).tolist()
+
+    scores = []
+    for position, titre_candidat, part in zip(positions, titres, parts):
+        score, distance = score_titre(requete, normaliser_titre(titre_candidat), part)
+        if distance <= erreurs_max:
+            scores.append((score, int(position)))
+
+    meilleurs = sorted(scores, key=lambda x: (-x[0], x[1]))[:k]
+    result = df.iloc[[position for _, position in meilleurs]].copy()
+    result["score"] = [round(score, 4) for score, _ in meilleurs]
+    return result
+
+
+def filtrer_par_titre(df, index, titre):
+    """
+    Équivalent de df[df["titre"].str.contains(titre, case=False, na=False)],
+    en ne vérifiant que les candidats proposés par l'index.
+    """
+    positions = index.candidats(titre) if index is not None else None
+    compter("lignes_parcourues", len(df) if positions is None else len(positions))
+    if positions is None:
+        return df[_titres_objets(df).str.contains(titre, case=False, na=False)]
+
+    candidats = df.iloc[positions]
+    return candidats[_titres_objets(candidats).str.contains(titre, case=False, na=False)]
+
+
+def filtrer_par_titres(df, index, titres):
+    """
+    filtrer_par_titre pour plusieurs titres à la fois (mêmes résultats, dans l'ordre des titres).
+    Les titres candidats de toutes les requêtes sont lus en une seule fois,
+    et la colonne entière n'est préparée qu'une fois pour les requêtes que l'index ne couvre pas.
+    """
+    candidats = [index.candidats(titre) if index is not None else None for titre in titres]
+    compter("lignes_parcourues", sum(len(df) if positions is None else len(positions) for positions in candidats))
+
+    indexees = [positions for positions in candidats if positions is not None and len(positions)]
+    if indexees:
+        toutes = np.unique(np.concatenate(indexees))
+        textes = _titres_objets(df.iloc[toutes]).to_numpy()
+    colonne = None
+
+    resultats = []
+    for titre, positions in zip(titres, candidats):
+        if positions is None:
+            if colonne is None:
+                colonne = _titres_objets(df)
+            resultats.append(df[colonne.str.contains(titre, case=False, na=False)])
+        elif len(positions) == 0:
+            resultats.append(df.iloc[positions])
+        else:
+            sous_titres = pd.Series(textes[np.searchsorted(toutes, positions)], dtype=object)
+            masque = sous_titres.str.contains(titre, case=False, na=False).to_numpy()
+            resultats.append(df.iloc[positions[masque]])
+    return resultats
+
+
+def _titres_objets(df):
+    """
+    Colonne des titres en chaînes Python : une colonne Arrow (données partagées)
+    utiliserait le moteur regex d'Arrow, dont la syntaxe diffère de celle de re.
+    """
+    titres = df["titre"]
+    if isinstance(titres.dtype, pd.ArrowDtype):
+        return titres.astype(object)
+    return titres
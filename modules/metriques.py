@@ -0,0 +1,267 @@
+import bisect
+import contextlib
+import contextvars
+import os
+import threading
+import time
+
+# Instrumentation de l'API (durées par route et par étape, lignes, octets, cache), exposée sur /metrics
+# au format texte de Prometheus. METRIQUES=0 : pas de middleware, les étapes et compteurs des requêtes ne mesurent rien
+# (les durées des étapes du nettoyage sont toujours notées).
+ACTIVES = os.environ.get("METRIQUES", "1") != "0"
+TYPE_CONTENU = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bornes des histogrammes : durées (secondes), nombres de lignes, tailles des réponses (octets)
+BORNES_DUREE = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BORNES_DUREE_NETTOYAGE = (0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+BORNES_LIGNES = (0, 1, 10, 100, 1000, 10_000, 100_000, 1_000_000)
+BORNES_OCTETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+# Route des requêtes qui ne correspondent à aucune route (404) : le nombre de séries reste borné
+ROUTE_INCONNUE = "inconnue"
+
+_verrou = threading.Lock()
+_registre = []
+
+
+def _echapper(valeur):
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _nombre(valeur):
+    if valeur == float("inf"):
+        return "+Inf"
+    return repr(float(valeur)) if isinstance(valeur, float) else str(int(valeur))
+
+
+class Metrique:
+    """
+    Famille de séries Prometheus (counter, gauge ou histogram) : une série par valeurs des étiquettes.
+    """
+
+    def __init__(self, nom, type, aide, etiquettes=(), bornes=None):
+        self.nom = nom
+        self.type = type
+        self.aide = aide
+        self.etiquettes = etiquettes
+        self.bornes = bornes
+        self._series = {}
+        _registre.append(self)
+
+    def incrementer(self, valeurs=(), n=1):
+        with _verrou:
+            self._incrementer(valeurs, n)
+
+    def observer(self, valeurs, valeur):
+        with _verrou:
+            self._observer(valeurs, valeur)
+
+    # Versions sans verrou, pour enregistrer plusieurs valeurs sous un seul verrou
+    def _incrementer(self, valeurs, n):
+        self._series[valeurs] = self._series.get(valeurs, 0) + n
+
+    def _observer(self, valeurs, valeur):
+        serie = self._series.get(valeurs)
+        if serie is None:
+            serie = self._series[valeurs] = [[0] * (len(self.bornes) + 1), 0.0]
+        # Premier intervalle dont la borne est >= valeur (le : "less or equal")
+        serie[0][bisect.bisect_left(self.bornes, valeur)] += 1
+        serie[1] += valeur
+
+    def _etiquettes(self, valeurs, *supplement):
+        paires = list(zip(self.etiquettes, valeurs)) + list(supplement)
+        if not paires:
+            return ""
+        return "{" + ",".join(f'{nom}="{_echapper(valeur)}"' for nom, valeur in paires) + "}"
+
+    def exposer(self):
+        with _verrou:
+            series = [(valeurs, (list(serie[0]), serie[1]) if isinstance(serie, list) else serie)
+                      for valeurs, serie in self._series.items()]
+        lignes = [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} {self.type}"]
+        for valeurs, serie in sorted(series, key=lambda s: s[0]):
+            if self.type != "histogram":
+                lignes.append(f"{self.nom}{self._etiquettes(valeurs)} {_nombre(serie)}")
+                continue
+            comptes, somme = serie
+            cumul = 0
+            for borne, compte in zip(self.bornes + (float("inf"),), comptes):
+                cumul += compte
+                lignes.append(f"{self.nom}_bucket{self._etiquettes(valeurs, ('le', _nombre(float(borne))))} {cumul}")
+            lignes.append(f"{self.nom}_sum{self._etiquettes(valeurs)} {_nombre(somme)}")
+            lignes.append(f"{self.nom}_count{self._etiquettes(valeurs)} {cumul}")
+        return "\n".join(lignes)
+
+
+REQUETES = Metrique("api_requetes_total", "counter", "Requêtes HTTP traitées", ("route", "methode", "statut"))
+DUREE_REQUETES = Metrique("api_requete_duree_secondes", "histogram", "Durée des requêtes, envoi de la réponse compris",
+                          ("route",), BORNES_DUREE)
+DUREE_ETAPES = Metrique("api_etape_duree_secondes", "histogram",
+                        "Durée des étapes d'une requête (recherche, filtres, serialisation, envoi ; filtres est comprise dans recherche)",
+                        ("route", "etape"), BORNES_DUREE)
+LIGNES_PARCOURUES = Metrique("api_lignes_parcourues", "histogram", "Lignes du catalogue examinées par requête",
+                             ("route",), BORNES_LIGNES)
+LIGNES_RENVOYEES = Metrique("api_lignes_renvoyees", "histogram", "Lignes renvoyées par requête", ("route",), BORNES_LIGNES)
+OCTETS_REPONSES = Metrique("api_reponse_octets", "histogram", "Taille du corps des réponses", ("route",), BORNES_OCTETS)
+CACHE_REQUETES = Metrique("api_cache_total", "counter", "Lectures du cache des recherches par route (succes, echec)",
+                          ("route", "resultat"))
+DUREE_NETTOYAGE = Metrique("nettoyage_etape_duree_secondes", "histogram",
+                           "Durée des étapes du nettoyage d'une catégorie (chargement, valeurs_manquantes, doublons, ecriture)",
+                           ("categorie", "etape"), BORNES_DUREE_NETTOYAGE)
+
+
+class Mesures:
+    """
+    Mesures d'une requête ou d'un nettoyage : durée cumulée de chaque étape et compteurs.
+    """
+    __slots__ = ("etapes", "compteurs")
+
+    def __init__(self):
+        self.etapes = {}
+        self.compteurs = {}
+
+
+_mesures = contextvars.ContextVar("mesures", default=None)
+_SANS_MESURE = contextlib.nullcontext()
+
+
+class _Chrono:
+    __slots__ = ("mesures", "nom", "debut")
+
+    def __init__(self, mesures, nom):
+        self.mesures = mesures
+        self.nom = nom
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+
+    def __exit__(self, *args):
+        etapes = self.mesures.etapes
+        etapes[self.nom] = etapes.get(self.nom, 0.0) + time.perf_counter() - self.debut
+
+
+def etape(nom):
+    """
+    Chronomètre d'une étape (with etape("recherche"): ...), cumulé dans les mesures en cours.
+    Sans mesures en cours (métriques désactivées, hors requête), rien n'est mesuré.
+    """
+    mesures = _mesures.get()
+    return _SANS_MESURE if mesures is None else _Chrono(mesures, nom)
+
+
+def compter(nom, n=1):
+    """
+    Ajoute n au compteur nom des mesures en cours (lignes_parcourues, lignes_renvoyees, cache_succes, cache_echec).
+    """
+    mesures = _mesures.get()
+    if mesures is not None:
+        mesures.compteurs[nom] = mesures.compteurs.get(nom, 0) + n
+
+
+def etape_par_element(nom, elements):
+    """
+    Parcourt elements en comptant dans l'étape nom le temps de production de chacun (ex : lecture d'un bloc).
+    """
+    elements = iter(elements)
+    while True:
+        with etape(nom):
+            element = next(elements, None)
+        if element is None:
+            return
+        yield element
+
+
+@contextlib.contextmanager
+def mesurer():
+    """
+    Mesures propres au bloc : les étapes et compteurs du bloc (et des fonctions qu'il appelle) y sont notés.
+    """
+    mesures = Mesures()
+    jeton = _mesures.set(mesures)
+    try:
+        yield mesures
+    finally:
+        _mesures.reset(jeton)
+
+
+def enregistrer_nettoyage(categorie, mesures):
+    for nom, duree in mesures.etapes.items():
+        DUREE_NETTOYAGE.observer((categorie, nom), duree)
+
+
+def enregistrer_requete(route, methode, statut, duree, octets, mesures):
+    # Copies : une recherche expirée (504) peut encore écrire dans ses mesures depuis le pool
+    etapes, compteurs = dict(mesures.etapes), dict(mesures.compteurs)
+    serie = (route,)
+    with _verrou:
+        REQUETES._incrementer((route, methode, str(statut)), 1)
+        DUREE_REQUETES._observer(serie, duree)
+        OCTETS_REPONSES._observer(serie, octets)
+        for nom, valeur in etapes.items():
+            DUREE_ETAPES._observer((route, nom), valeur)
+        if "lignes_parcourues" in compteurs:
+            LIGNES_PARCOURUES._observer(serie, compteurs["lignes_parcourues"])
+        if "lignes_renvoyees" in compteurs:
+            LIGNES_RENVOYEES._observer(serie, compteurs["lignes_renvoyees"])
+        if "cache_succes" in compteurs:
+            CACHE_REQUETES._incrementer((route, "succes"), compteurs["cache_succes"])
+        if "cache_echec" in compteurs:
+            CACHE_REQUETES._incrementer((route, "echec"), compteurs["cache_echec"])
+
+
+def exposer(valeurs=()):
+    """
+    Texte Prometheus de toutes les métriques, suivi des valeurs instantanées (nom, type, aide, valeur).
+    """
+    morceaux = [metrique.exposer() for metrique in _registre]
+    for nom, type, aide, valeur in valeurs:
+        morceaux.append(f"# HELP {nom} {aide}\n# TYPE {nom} {type}\n{nom} {_nombre(valeur)}")
+    return "\n".join(morceaux) + "\n"
+
+
+class MiddlewareMetriques:
+    """
+    Middleware ASGI : durée, statut et taille de chaque réponse par route (modèle de chemin, ex : /films/{item_id}/similaires),
+    avec les étapes et compteurs notés pendant la requête, y compris dans le pool de recherche.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = {}
+
+    def _route(self, scope):
+        # Le routeur ajoute l'endpoint de la route trouvée au scope de la requête
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return ROUTE_INCONNUE
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = next((r.path for r in scope["app"].routes if getattr(r, "endpoint", None) is endpoint), ROUTE_INCONNUE)
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mesures = Mesures()
+        etapes = mesures.etapes
+        statut, octets = 500, 0
+
+        async def envoyer(message):
+            nonlocal statut, octets
+            if message["type"] == "http.response.start":
+                statut = message["status"]
+            elif message["type"] == "http.response.body":
+                octets += len(message.get("body", b""))
+            debut_envoi = time.perf_counter()
+            await send(message)
+            etapes["envoi"] = etapes.get("envoi", 0.0) + time.perf_counter() - debut_envoi
+
+        debut = time.perf_counter()
+        jeton = _mesures.set(mesures)
+        try:
+            await self.app(scope, receive, envoyer)
+        finally:
+            _mesures.reset(jeton)
+            enregistrer_requete(self._route(scope), scope["method"], statut, time.perf_counter() - debut, octets, mesures)
@@ -0,0 +1,172 @@
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from modules.genres import libelles_genre
+from modules.metriques import compter
+from modules.recherche import plier_texte
+from modules.similarite import VALEURS_IGNOREES
+
+# Poids des préférences dans le score d'un élément (un point par genre en commun)
+POIDS_GENRE = 1.0
+POIDS_PERSONNE = 2.0
+POIDS_ANNEE = 0.5
+# Largeur (années) des tranches d'années
+TAILLE_TRANCHE = 10
+# Valeurs de remplissage qui ne désignent ni un genre ni une personne
+VALEURS_VIDES = VALEURS_IGNOREES | {"-", ""}
+
+
+def _vocabulaire(valeurs, ignorees=frozenset()):
+    """
+    Valeurs pliées (minuscules, sans accents) triées et code de chaque valeur d'entrée (-1 si ignorée).
+    Le pliage n'est fait qu'une fois par valeur distincte.
+    """
+    codes, distinctes = pd.factorize(valeurs)
+    pliees = np.array([plier_texte(str(v)).strip() for v in distinctes], dtype=str)
+    vocabulaire, inverse = np.unique(pliees, return_inverse=True)
+    inverse = np.append(inverse, -1)
+    codes = inverse[codes]
+
+    if ignorees:
+        garder = ~np.isin(vocabulaire, [plier_texte(v) for v in ignorees])
+        nouveaux = np.cumsum(garder) - 1
+        nouveaux[~garder] = -1
+        vocabulaire = vocabulaire[garder]
+        codes = np.where(codes >= 0, np.append(nouveaux, -1)[codes], -1)
+    return vocabulaire, codes
+
+
+def _positions(vocabulaire, valeurs):
+    """
+    Positions dans le vocabulaire trié des valeurs connues (les autres sont ignorées).
+    """
+    pliees = np.array([plier_texte(str(v)).strip() for v in valeurs], dtype=str)
+    if len(vocabulaire) == 0 or len(pliees) == 0:
+        return np.array([], dtype=np.intp)
+    positions = np.minimum(np.searchsorted(vocabulaire, pliees), len(vocabulaire) - 1)
+    return positions[vocabulaire[positions] == pliees]
+
+
+class MoteurPersonnalise:
+    """
+    Profil de chaque élément (genres, auteur ou artiste, tranche d'années) dans une matrice creuse binaire,
+    et classement du catalogue entier contre un vecteur de préférences en un seul produit matrice-vecteur.
+    La matrice est stockée par colonnes : le produit ne parcourt que les éléments des caractéristiques préférées.
+    """
+
+    def __init__(self, df, colonne_personne):
+        debut = time.perf_counter()
+        n = len(df)
+
+        # Genres : plusieurs valeurs séparées par des virgules ("28, 80, 53"), identifiants TMDB décodés une fois par valeur
+        genres = df["genre"].fillna("").astype(str).str.split(",").explode()
+        codes, distinctes = pd.factorize(genres.str.strip().to_numpy())
+        decodees = np.array([(libelles_genre(valeur) or [""])[0] for valeur in distinctes] + [""], dtype=object)
+        self.genres, codes_genres = _vocabulaire(decodees[codes], VALEURS_VIDES)
+        lignes_genres = np.repeat(np.arange(n), df["genre"].fillna("").astype(str).str.count(",").to_numpy() + 1)
+
+        # Auteur, réalisateur ou artiste : une seule valeur ("Saint-Mars, Dominique de")
+        if colonne_personne in df.columns:
+            personnes = df[colonne_personne].to_numpy(dtype=object, na_value="")
+        else:
+            personnes = np.full(n, "", dtype=object)
+        self.personnes, codes_personnes = _vocabulaire(personnes, VALEURS_VIDES)
+
+        # Tranches d'années
+        annees = pd.to_numeric(df["annee"], errors="coerce").to_numpy(dtype=float) if "annee" in df.columns else np.full(n, np.nan)
+        connues = ~np.isnan(annees)
+        tranches = np.full(n, -1, dtype=np.int64)
+        tranches[connues] = np.floor(annees[connues] / TAILLE_TRANCHE).astype(np.int64)
+        self.tranches, codes_tranches = np.unique(tranches[connues], return_inverse=True)
+        tranches[connues] = codes_tranches
+
+        # Colonnes : [genres | personnes | tranches]
+        decalage_personnes = len(self.genres)
+        decalage_tranches = decalage_personnes + len(self.personnes)
+        lignes = np.concatenate([lignes_genres, np.arange(n), np.arange(n)])
+        colonnes = np.concatenate([codes_genres, codes_personnes + decalage_personnes, tranches + decalage_tranches])
+        garder = np.concatenate([codes_genres >= 0, codes_personnes >= 0, tranches >= 0])
+        matrice = sparse.csc_matrix(
+            (np.ones(garder.sum(), dtype=np.float32), (lignes[garder].astype(np.int32), colonnes[garder].astype(np.int32))),
+            shape=(n, decalage_tranches + len(self.tranches)),
+        )
+        # Un genre répété sur une même ligne ne compte qu'une fois
+        matrice.sum_duplicates()
+        matrice.data[:] = 1
+        self.matrice = matrice
+
+        self.duree_construction = time.perf_counter() - debut
+
+    @classmethod
+    def attacher(cls, matrice, genres, personnes, tranches):
+        """
+        Moteur construit sur une matrice et des vocabulaires déjà calculés (ex : tableaux memory-mappés), sans copie.
+        """
+        moteur = cls.__new__(cls)
+        moteur.matrice = matrice
+        moteur.genres = genres
+        moteur.personnes = personnes
+        moteur.tranches = tranches
+        moteur.duree_construction = 0.0
+        return moteur
+
+    def genres_frequents(self, n=30):
+        """
+        Les n genres les plus fréquents du catalogue (valeurs pliées), pour proposer des choix.
+        """
+        nb_genres = len(self.genres)
+        comptes = np.diff(self.matrice.indptr[:nb_genres + 1])
+        ordre = np.argsort(-comptes, kind="stable")[:n]
+        return [str(self.genres[i]) for i in ordre if comptes[i] > 0]
+
+    def preferences(self, genres=(), personnes=(), annee_min=None, annee_max=None):
+        """
+        Vecteur de préférences aligné sur les colonnes de la matrice.
+        Les genres (libellés ou identifiants TMDB) et personnes sont comparés sans casse ni accents ;
+        les valeurs inconnues sont ignorées.
+        """
+        vecteur = np.zeros(self.matrice.shape[1], dtype=np.float32)
+        vecteur[_positions(self.genres, [libelle for genre in genres for libelle in libelles_genre(genre)])] = POIDS_GENRE
+        vecteur[len(self.genres) + _positions(self.personnes, personnes)] = POIDS_PERSONNE
+        if annee_min is not None or annee_max is not None:
+            bas = -np.inf if annee_min is None else np.floor(annee_min / TAILLE_TRANCHE)
+            haut = np.inf if annee_max is None else np.floor(annee_max / TAILLE_TRANCHE)
+            dans_periode = (self.tranches >= bas) & (self.tranches <= haut)
+            vecteur[len(self.genres) + len(self.personnes) + np.flatnonzero(dans_periode)] = POIDS_ANNEE
+        return vecteur
+
+    def classer(self, preferences, k=10):
+        """
+        Renvoie (positions, scores) des k éléments au meilleur score, sans score nul.
+        Sélection partielle sur tout le catalogue, puis tri des k meilleurs seulement (à égalité, ordre du catalogue).
+        """
+        colonnes = np.flatnonzero(preferences)
+        # Seuls les éléments des colonnes préférées sont parcourus
+        compter("lignes_parcourues", int((self.matrice.indptr[colonnes + 1] - self.matrice.indptr[colonnes]).sum()))
+        scores = self.matrice[:, colonnes] @ preferences[colonnes]
+        candidats = np.flatnonzero(scores > 0)
+        k = min(k, len(candidats))
+        if k == 0:
+            return np.array([], dtype=np.intp), np.array([], dtype=np.float32)
+
+        valeurs = scores[candidats]
+        top = np.argpartition(-valeurs, k - 1)[:k]
+        # Égalités au seuil : les premiers éléments du catalogue sont gardés
+        seuil = valeurs[top].min()
+        if np.count_nonzero(valeurs >= seuil) > k:
+            au_dessus = np.flatnonzero(valeurs > seuil)
+            top = np.concatenate([au_dessus, np.flatnonzero(valeurs == seuil)[:k - len(au_dessus)]])
+        positions = candidats[top]
+        ordre = np.lexsort((positions, -scores[positions]))
+        return positions[ordre], scores[positions[ordre]]
+
+
+def recommander(df, moteur, genres=(), personnes=(), annee_min=None, annee_max=None, k=10):
+    """
+    Lignes de df les mieux classées pour les préférences données, avec leur score.
+    """
+    positions, scores = moteur.classer(moteur.preferences(genres, personnes, annee_min, annee_max), k)
+    result = df.iloc[positions].copy()
+    result["score"] = np.round(scores.astype(float), 4)
+    return result
@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads de recherche, requêtes acceptées au plus (en cours + en attente) et délai maximal (secondes)
+NB_THREADS = int(os.environ.get("NB_THREADS_RECHERCHE", os.cpu_count() or 4))
+MAX_EN_ATTENTE = int(os.environ.get("MAX_EN_ATTENTE_RECHERCHE", 64))
+DELAI_REQUETE = float(os.environ.get("DELAI_REQUETE_RECHERCHE", 10))
+
+
+class Surcharge(Exception):
+    """
+    Trop de recherches en cours ou en attente : la requête est refusée.
+    """
+
+
+class PoolRecherches:
+    """
+    Pool de threads borné qui exécute les recherches (pandas, sérialisation) hors de la boucle d'événements.
+    Au-delà de max_en_attente recherches acceptées et non terminées, les nouvelles sont refusées (Surcharge),
+    et une recherche qui dépasse le délai est abandonnée (asyncio.TimeoutError).
+    Avec nb_threads=0, les recherches sont exécutées directement dans la boucle d'événements.
+    """
+
+    def __init__(self, nb_threads=NB_THREADS, max_en_attente=MAX_EN_ATTENTE, delai=DELAI_REQUETE):
+        self.nb_threads = nb_threads
+        self.max_en_attente = max_en_attente
+        self.delai = delai
+        self._pool = ThreadPoolExecutor(nb_threads, thread_name_prefix="recherche") if nb_threads > 0 else None
+        self._verrou = threading.Lock()
+        self.en_cours = 0
+        self.terminees = 0
+        self.refusees = 0
+        self.expirees = 0
+
+    def _terminee(self, future):
+        with self._verrou:
+            self.en_cours -= 1
+            self.terminees += 1
+
+    async def executer(self, fonction, *args):
+        if self._pool is None:
+            return fonction(*args)
+
+        with self._verrou:
+            if self.en_cours >= self.max_en_attente:
+                self.refusees += 1
+                raise Surcharge(f"{self.en_cours} recherches en cours")
+            self.en_cours += 1
+        # Contexte de la requête (mesures des métriques) transmis au thread
+        future = self._pool.submit(contextvars.copy_context().run, fonction, *args)
+        future.add_done_callback(self._terminee)
+
+        try:
+            # Une recherche encore en attente est annulée ; une recherche commencée va jusqu'au bout
+            # et garde sa place dans la limite jusqu'à sa fin
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.delai)
+        except asyncio.TimeoutError:
+            with self._verrou:
+                self.expirees += 1
+            raise
+
+    def fermer(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def statistiques(self):
+        with self._verrou:
+            return {
+                "threads": self.nb_threads,
+                "max_en_attente": self.max_en_attente,
+                "delai": self.delai,
+                "en_cours": self.en_cours,
+                "terminees": self.terminees,
+                "refusees": self.refusees,
+                "expirees": self.expirees,
+            }
@@ -0,0 +1,58 @@
+import unicodedata
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from modules.metriques import compter
+
+
+def plier_texte(texte):
+    """
+    Minuscules et sans accents (même transformation que la colonne de recherche).
+    """
+    decompose = unicodedata.normalize("NFKD", texte)
+    return "".join(c for c in decompose if unicodedata.category(c) != "Mn").lower()
+
+
+def colonne_recherche(df):
+    """
+    Concatène toutes les colonnes de chaque ligne en un seul texte, en minuscules et sans accents.
+    Le résultat est une colonne Arrow, alignée sur df, sur laquelle les recherches sont vectorisées.
+    """
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=pd.ArrowDtype(pa.string()))
+
+    colonnes = [pa.array(df[col].fillna("").astype(str), type=pa.string()) for col in df.columns]
+    texte = pc.binary_join_element_wise(*colonnes, " ")
+    texte = pc.replace_substring_regex(pc.utf8_normalize(texte, "NFKD"), r"\p{Mn}", "")
+    return pd.Series(pc.utf8_lower(texte), index=df.index, dtype=pd.ArrowDtype(pa.string()))
+
+
+def masque_mots_cles(colonne, mots_cles, mode="ou"):
+    """
+    Masque des lignes contenant au moins un (mode "ou") ou tous (mode "et") les mots-clés.
+    """
+    mots = [plier_texte(mot) for mot in mots_cles if mot.strip()]
+    if not mots:
+        return np.zeros(len(colonne), dtype=bool)
+
+    masque = None
+    for mot in mots:
+        contient = colonne.str.contains(mot, regex=False).to_numpy(dtype=bool, na_value=False)
+        if masque is None:
+            masque = contient
+        elif mode == "et":
+            masque &= contient
+        else:
+            masque |= contient
+    return masque
+
+
+def rechercher_mots_cles(df, colonne, mots_cles, mode="ou"):
+    """
+    Lignes de df correspondant aux mots-clés (chaîne séparée par des espaces ou liste).
+    """
+    if isinstance(mots_cles, str):
+        mots_cles = mots_cles.split()
+    compter("lignes_parcourues", len(colonne))
+    return df[masque_mots_cles(colonne, mots_cles, mode)]
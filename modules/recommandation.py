@@ -1,6 +1,16 @@
-import pandas as pd
 import modules.data_cleaning as data_cleaning
-import modules.config as config
+from modules.index_titres import IndexTitres, filtrer_par_titre, rechercher_titres_approches
+from modules.similarite import MoteurSimilarite, elements_similaires
+from modules.personnalisation import MoteurPersonnalise, recommander
+from modules.semantique import IndexSemantique, elements_semantiques
+from modules.croisement import MoteurCroise
+from modules.facettes import IndexFacettes
+from modules.recherche import colonne_recherche, rechercher_mots_cles
+from modules.cache_requetes import CacheRequetes
+from modules.serialisation import FragmentsJSON
+import modules.stockage_partage as stockage_partage
+import threading
+import time
 import os
 
 
@@ -10,60 +20,393 @@ DATA_DIR = os.path.join(BASE_DIR, "data", "data_cleaned")
 FILMS_PATH = os.path.join(DATA_DIR, "films.csv")
 LIVRES_PATH = os.path.join(DATA_DIR, "livres.csv")
 MUSIQUES_PATH = os.path.join(DATA_DIR, "musiques.csv")
+CHEMINS = {"films": FILMS_PATH, "livres": LIVRES_PATH, "musiques": MUSIQUES_PATH}
 
-# Vérifier si les fichiers existent
-if not (os.path.exists(FILMS_PATH) and os.path.exists(LIVRES_PATH) and os.path.exists(MUSIQUES_PATH)):
-    print("Fichiers manquants : nettoyage et génération en cours...")
+# Colonnes de la similarité par catégorie : (texte libre, colonnes catégorielles)
+COLONNES_SIMILARITE = {
+    "films": (["description"], ["genre", "auteur"]),
+    "livres": (["description"], ["genre", "auteur"]),
+    "musiques": (["album"], ["genre", "artiste"]),
+}
+# Colonne auteur / réalisateur / artiste des recommandations personnalisées
+COLONNES_PERSONNE = {"films": "auteur", "livres": "auteur", "musiques": "artiste"}
+
+# Catalogues compacts (désactivable avec CATALOGUES_COMPACTS=0) : colonnes Arrow lues par memory-map depuis le cache,
+# catégories pour les colonnes à peu de valeurs distinctes, colonnes encodées en JSON seulement quand elles sont renvoyées
+CATALOGUES_COMPACTS = os.environ.get("CATALOGUES_COMPACTS", "1") != "0"
+COLONNES_A_LA_DEMANDE = ["description"]
+
+# Intervalle (secondes) entre deux vérifications du dossier data_cleaned
+INTERVALLE_SURVEILLANCE = 5.0
+
+# Données partagées entre processus (workers uvicorn, dashboard) : publiées une fois
+# dans des fichiers memory-mappés, auxquels chaque processus s'attache en lecture seule
+DONNEES_PARTAGEES = os.environ.get("DONNEES_PARTAGEES", "0") == "1"
+
+
+class Catalogue:
+    """
+    Données nettoyées d'une catégorie et structures de recherche construites dessus.
+    """
+
+    def __init__(self, df, colonnes_texte, colonnes_categories, colonne_personne, empreinte=None, categorie=None, compact=False):
+        self.df = df
+        # Empreinte du fichier nettoyé d'origine (taille, date de modification)
+        self.empreinte = empreinte
+        # Index des titres
+        self.index = IndexTitres(df["titre"])
+        # Moteur de similarité (TF-IDF), voisins précalculés
+        self.similarite = MoteurSimilarite(df, colonnes_texte, colonnes_categories)
+        # Profils (genres, auteur ou artiste, années) des recommandations personnalisées
+        self.personnalisation = MoteurPersonnalise(df, colonne_personne)
+        # Vecteurs des descriptions et index approché (IVF), enregistrés sur disque pour la catégorie
+        self.semantique = IndexSemantique(df, colonnes_texte, categorie)
+        # Colonne de recherche par mots-clés (toutes les colonnes, minuscules, sans accents)
+        self.recherche = colonne_recherche(df)
+        # Bitsets des genres (identifiants TMDB décodés) et langues, années : filtres et facettes
+        self.facettes = IndexFacettes(df)
+        # Lignes encodées en JSON pour les réponses de l'API
+        self.fragments = FragmentsJSON(df, COLONNES_A_LA_DEMANDE if compact else (), compact)
+
+    @classmethod
+    def attacher(cls, df, empreinte, index, similarite, personnalisation, semantique, recherche, facettes, fragments):
+        """
+        Catalogue construit sur des éléments publiés (cf. stockage_partage.attacher), sans copie.
+        """
+        catalogue = cls.__new__(cls)
+        catalogue.df = df
+        catalogue.empreinte = empreinte
+        catalogue.index = IndexTitres.attacher(*index)
+        catalogue.similarite = MoteurSimilarite.attacher(*similarite)
+        catalogue.personnalisation = MoteurPersonnalise.attacher(*personnalisation)
+        catalogue.semantique = IndexSemantique.attacher(*semantique)
+        catalogue.recherche = recherche
+        catalogue.facettes = IndexFacettes.attacher(*facettes)
+        catalogue.fragments = FragmentsJSON.attacher(*fragments)
+        return catalogue
+
+
+class Donnees:
+    """
+    Instantané versionné des trois catalogues et des recommandations entre catégories.
+    Il n'est jamais modifié après sa construction : un rechargement construit un nouvel instantané
+    et remplace l'ancien en une seule affectation.
+    """
+
+    def __init__(self, version, catalogues, croisements):
+        self.version = version
+        self.catalogues = catalogues
+        self.croisements = croisements
+        self.charge_le = time.time()
+
+    def __getitem__(self, categorie):
+        return self.catalogues[categorie]
+
+    def lignes(self):
+        return {categorie: len(catalogue.df) for categorie, catalogue in self.catalogues.items()}
+
+
+# Version des données nettoyées : empreinte (taille, date de modification) des fichiers
+def version_fichiers():
+    return data_cleaning.combiner_hashs({
+        categorie: str(data_cleaning.empreinte_fichier(chemin)) for categorie, chemin in CHEMINS.items()
+    })[:12]
+
+
+def charger_donnees(precedentes=None):
+    """
+    Charge les données nettoyées et construit les index de chaque catégorie.
+    Les catalogues de l'instantané precedentes dont le fichier n'a pas changé sont réutilisés.
+    """
+    debut = time.perf_counter()
+    version = version_fichiers()
+
+    catalogues, construits = {}, []
+    for categorie, chemin in CHEMINS.items():
+        empreinte = data_cleaning.empreinte_fichier(chemin)
+        if precedentes is not None and precedentes[categorie].empreinte == empreinte:
+            catalogues[categorie] = precedentes[categorie]
+            continue
+        df = data_cleaning.charger_donnees_nettoyees(chemin, CATALOGUES_COMPACTS)
+        catalogues[categorie] = Catalogue(
+            df, *COLONNES_SIMILARITE[categorie], COLONNES_PERSONNE[categorie],
+            empreinte=empreinte, categorie=categorie, compact=CATALOGUES_COMPACTS,
+        )
+        construits.append(catalogues[categorie])
+
+    # Candidats entre catégories : dépendent de toutes les catégories, recalculés à chaque chargement
+    croisements = MoteurCroise({
+        categorie: (catalogue.df, COLONNES_SIMILARITE[categorie][0]) for categorie, catalogue in catalogues.items()
+    })
+
+    print(f"Similarités construites en {sum(c.similarite.duree_construction for c in construits):.2f} s")
+    print(f"Recommandations entre catégories construites en {croisements.duree_construction:.2f} s")
+    print(f"Données chargées (version {version}) en {time.perf_counter() - debut:.2f} s")
+    return Donnees(version, catalogues, croisements)
+
+
+def charger_donnees_partagees(force=False, version_active=None):
+    """
+    Mode partagé : un seul processus à la fois met à jour et publie les données,
+    et s'attache à la version publiée avant de rendre la main. Renvoie None si version_active est déjà à jour.
+    """
+    with stockage_partage.VerrouFichier():
+        data_cleaning.load_clean_and_save_data()
+        version = version_fichiers()
+        if not force and version == version_active:
+            return None
+        if force or not stockage_partage.est_publie(version):
+            nouvelles = charger_donnees()
+            stockage_partage.publier(version, nouvelles.catalogues, nouvelles.croisements)
+
+        # Attachement sous le verrou : une publication suivante supprime les autres versions,
+        # mais les fichiers déjà ouverts en memory-map restent lisibles
+        catalogues = {
+            categorie: Catalogue.attacher(**elements)
+            for categorie, elements in stockage_partage.attacher(version).items()
+        }
+        croisements = MoteurCroise.attacher(*stockage_partage.attacher_croisements(version))
+    print(f"Données partagées attachées (version {version})")
+    return Donnees(version, catalogues, croisements)
+
+
+# Cache des résultats de recherche (API et dashboard), vidé à chaque chargement des données
+# (désactivable avec CACHE_RECHERCHES=0)
+cache_recherches = CacheRequetes(
+    actif=os.environ.get("CACHE_RECHERCHES", "1") != "0", version_donnees=lambda: donnees_actives().version
+)
+
+# Instantané actif, lu une seule fois par requête. Il n'est chargé qu'au premier usage
+# (recommandation.donnees ou donnees_actives()) : importer le module ne lit aucune donnée.
+_donnees = None
+_verrou_rechargement = threading.Lock()
+
+
+def donnees_actives():
+    """
+    Instantané actif, chargé au premier appel (les appels simultanés attendent ce chargement).
+    """
+    if _donnees is None:
+        with _verrou_rechargement:
+            if _donnees is None:
+                _activer(_charger_initial())
+    return _donnees
+
+
+def donnees_chargees():
+    return _donnees is not None
+
+
+def _charger_initial():
+    if DONNEES_PARTAGEES:
+        return charger_donnees_partagees()
+    # Reconstruction incrémentale : seules les catégories dont les sources ont changé sont retraitées
     data_cleaning.load_clean_and_save_data()
-else:
-    print("Fichiers déjà présents, chargement direct.")
+    return charger_donnees()
 
-# Utilisation de chemins absolus pour le chargement des données
-df_films = config.import_data(FILMS_PATH)
-df_livres = config.import_data(LIVRES_PATH)
-df_musiques = config.import_data(MUSIQUES_PATH)
 
+def _activer(nouvelles):
+    global _donnees
+    _donnees = nouvelles
+    cache_recherches.invalider(nouvelles.version)
 
-#Rechercher un film
-def films_recommandations(titre: str):
+
+def __getattr__(nom):
+    # recommandation.donnees : instantané actif, chargé au premier accès
+    if nom == "donnees":
+        return donnees_actives()
+    raise AttributeError(f"module {__name__!r} has no attribute {nom!r}")
+
+
+def recharger(force=False):
+    """
+    Construit un nouvel instantané hors du chemin des requêtes et le rend actif.
+    Sans force, rien n'est fait si les fichiers nettoyés n'ont pas changé,
+    et seules les catégories dont le fichier a changé sont reconstruites.
+    Renvoie True si les données ont été rechargées.
+    """
+    with _verrou_rechargement:
+        if _donnees is None:
+            # Pas encore chargées : le premier chargement lit déjà les fichiers à jour
+            _activer(_charger_initial())
+            return True
+        if DONNEES_PARTAGEES:
+            nouvelles = charger_donnees_partagees(force, _donnees.version)
+            if nouvelles is None:
+                return False
+        else:
+            # Sources brutes éventuellement modifiées : mise à jour des fichiers nettoyés
+            data_cleaning.load_clean_and_save_data()
+            if not force and version_fichiers() == _donnees.version:
+                return False
+            nouvelles = charger_donnees(None if force else _donnees)
+
+        _activer(nouvelles)
+        return True
+
+
+class SurveillantDonnees:
+    """
+    Thread de fond qui surveille les fichiers nettoyés et recharge les données quand ils changent.
+    Un changement n'est pris en compte que s'il est stable sur deux vérifications (fichier en cours d'écriture).
+    """
+
+    def __init__(self, intervalle=INTERVALLE_SURVEILLANCE):
+        self.intervalle = intervalle
+        self._arret = threading.Event()
+        self._thread = None
+
+    def demarrer(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._arret.clear()
+            self._thread = threading.Thread(target=self._boucle, name="surveillant-donnees", daemon=True)
+            self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _boucle(self):
+        vue = None
+        while not self._arret.wait(self.intervalle):
+            try:
+                # Données pas encore chargées : leur premier chargement lira les fichiers à jour
+                if _donnees is None:
+                    continue
+                version = version_fichiers()
+                if version != _donnees.version and version == vue:
+                    print(f"Données nettoyées modifiées (version {version}), rechargement...")
+                    recharger()
+                vue = version
+            except Exception as e:
+                print("Erreur de rechargement : ", e)
+
+
+# Recherche par titre dans un catalogue (10 résultats)
+def _recommandations(catalogue, titre, approche, sans_doublons):
     try:
-        if titre:
-            result = df_films[df_films["titre"].str.contains(titre, case=False, na=False)].head(10)
+        if titre and approche:
+            result = rechercher_titres_approches(catalogue.df, catalogue.index, titre, 10)
+        elif titre:
+            result = filtrer_par_titre(catalogue.df, catalogue.index, titre).head(10)
         else:
-            result = df_films.sample(10)
-            
+            result = catalogue.df.sample(10)
+
         # Supprimer les doublons
-        result = result.drop_duplicates(subset="titre")
-        
+        if sans_doublons:
+            result = result.drop_duplicates(subset="titre")
+
         return result.to_dict(orient="records")
     except Exception as e:
         print("Erreur : ", e)
 
 
+#Rechercher un film
+@cache_recherches.memoiser("films_recommandations")
+def films_recommandations(titre: str, approche: bool = False):
+    return _recommandations(donnees_actives()["films"], titre, approche, True)
+
+
 # Rechercher une musique
-def musiques_recommandations(titre: str):
+@cache_recherches.memoiser("musiques_recommandations")
+def musiques_recommandations(titre: str, approche: bool = False):
+    return _recommandations(donnees_actives()["musiques"], titre, approche, True)
+
+
+# Rechercher un livre
+@cache_recherches.memoiser("livres_recommandations")
+def livres_recommandations(titre: str, approche: bool = False):
+    return _recommandations(donnees_actives()["livres"], titre, approche, False)
+
+
+# Position de la ligne correspondant à un titre (titre exact en priorité)
+def position_titre(df, index, titre):
+    exact = (df["titre"].str.lower() == titre.lower()).to_numpy(dtype=bool, na_value=False)
+    if exact.any():
+        return int(exact.argmax())
+    result = filtrer_par_titre(df, index, titre)
+    if result.empty:
+        return None
+    return df.index.get_loc(result.index[0])
+
+
+# Titres similaires (contenu) à un titre donné
+def _similaires(catalogue, titre, k):
     try:
-        if titre:
-            result = df_musiques[df_musiques["titre"].str.contains(titre, case=False, na=False)].head(10)
-        else:
-            result = df_musiques.sample(10)
-            
-        # Supprimer les doublons
-        result = result.drop_duplicates(subset="titre")
-        
-        return result.to_dict(orient="records")
+        position = position_titre(catalogue.df, catalogue.index, titre)
+        if position is None:
+            return []
+        return elements_similaires(catalogue.df, catalogue.similarite, position, k).to_dict(orient="records")
     except Exception as e:
         print("Erreur : ", e)
 
 
-# Rechercher un livre
-def livres_recommandations(titre: str):
+# Titres dont la description est proche (vecteurs + index approché) de celle d'un titre donné
+def _semantiques(catalogue, titre, k):
     try:
-        if titre:
-            result = df_livres[df_livres["titre"].str.contains(titre, case=False, na=False)].head(10)
-        else:
-            result = df_livres.sample(10)
-        
-        return result.to_dict(orient="records")
+        position = position_titre(catalogue.df, catalogue.index, titre)
+        if position is None:
+            return []
+        return elements_semantiques(catalogue.df, catalogue.semantique, position, k).to_dict(orient="records")
     except Exception as e:
         print("Erreur : ", e)
+
+
+@cache_recherches.memoiser("films_similaires")
+def films_similaires(titre: str, k: int = 10):
+    return _similaires(donnees_actives()["films"], titre, k)
+
+
+@cache_recherches.memoiser("livres_similaires")
+def livres_similaires(titre: str, k: int = 10):
+    return _similaires(donnees_actives()["livres"], titre, k)
+
+
+@cache_recherches.memoiser("musiques_similaires")
+def musiques_similaires(titre: str, k: int = 10):
+    return _similaires(donnees_actives()["musiques"], titre, k)
+
+
+@cache_recherches.memoiser("similaires_semantiques")
+def similaires_semantiques(categorie: str, titre: str, k: int = 10):
+    return _semantiques(donnees_actives()[categorie], titre, k)
+
+
+# Recommandations dans les autres catégories (ou celles de cibles) pour un titre d'une catégorie
+def _croisees(donnees, categorie, titre, k, cibles):
+    try:
+        catalogue = donnees[categorie]
+        position = position_titre(catalogue.df, catalogue.index, titre)
+        if position is None:
+            return []
+        return [
+            {"categorie": cible, **donnees[cible].df.iloc[[position_cible]].to_dict(orient="records")[0], "score": round(score, 4)}
+            for cible, position_cible, score in donnees.croisements.recommander(categorie, position, k, cibles)
+        ]
+    except Exception as e:
+        print("Erreur : ", e)
+
+
+@cache_recherches.memoiser("recommandations_croisees")
+def recommandations_croisees(categorie: str, titre: str, k: int = 10, cibles=None):
+    return _croisees(donnees_actives(), categorie, titre, k, cibles)
+
+
+# Recherche par mots-clés dans toutes les colonnes ("ou" : au moins un mot, "et" : tous les mots)
+def recherche_mots_cles(categorie: str, mots_cles, mode: str = "ou"):
+    catalogue = donnees_actives()[categorie]
+    return rechercher_mots_cles(catalogue.df, catalogue.recherche, mots_cles, mode)
+
+
+# Recommandations personnalisées : éléments les mieux classés pour des genres, auteurs / artistes et une période
+def _personnalisees(catalogue, genres, personnes, annee_min, annee_max, k):
+    try:
+        return recommander(catalogue.df, catalogue.personnalisation, genres, personnes, annee_min, annee_max, k).to_dict(orient="records")
+    except Exception as e:
+        print("Erreur : ", e)
+
+
+@cache_recherches.memoiser("recommandations_personnalisees")
+def recommandations_personnalisees(categorie: str, genres=(), personnes=(), annee_min=None, annee_max=None, k: int = 10):
+    return _personnalisees(donnees_actives()[categorie], tuple(genres), tuple(personnes), annee_min, annee_max, k)
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from modules.data_cleaning import CLEANED_DIR
+from modules.metriques import compter
+from modules.similarite import VALEURS_IGNOREES, tokeniser, matrice_tfidf
+
+# Vecteurs des descriptions et index approché, calculés une fois puis relus par memory-map
+EMBEDDINGS_DIR = os.environ.get("EMBEDDINGS_DIR", os.path.join(CLEANED_DIR, "embeddings"))
+# Dimension des vecteurs (TF-IDF réduit par SVD tronquée)
+DIMENSION = 64
+# Termes gardés au plus pour la SVD (les plus fréquents, présents dans au moins deux documents)
+TAILLE_VOCABULAIRE_MAX = 100_000
+# Listes de l'index IVF (par défaut racine du nombre d'éléments) et listes parcourues par requête
+NB_LISTES_MIN = 16
+NB_SONDES = 8
+# En dessous de cette taille, la recherche exhaustive est plus rapide et exacte : l'index n'est pas utilisé
+TAILLE_MIN_IVF = 5000
+ITERATIONS_KMEANS = 10
+TAILLE_BLOC = 65536
+FICHIERS = ["vecteurs", "positions", "rangs", "centroides", "bornes"]
+
+
+def _lire(dossier):
+    """
+    Tableaux publiés dans dossier, lus par memory-map, ou None s'ils sont absents ou illisibles (à reconstruire).
+    """
+    if not os.path.exists(os.path.join(dossier, "meta.json")):
+        return None
+    try:
+        return [np.load(os.path.join(dossier, f"{nom}.npy"), mmap_mode="r") for nom in FICHIERS]
+    except (OSError, ValueError) as e:
+        print("Erreur de lecture des vecteurs :", e)
+        return None
+
+
+def _documents(df, colonnes_texte):
+    documents = [[] for _ in range(len(df))]
+    for col in colonnes_texte:
+        if col in df.columns:
+            for doc, texte in zip(documents, df[col].fillna("").astype(str)):
+                if texte.lower() not in VALEURS_IGNOREES:
+                    doc.extend(tokeniser(texte))
+    return documents
+
+
+def _svd_tronquee(matrice, dimension, iterations=4, seed=0):
+    """
+    Coordonnées des lignes de matrice sur ses dimension premiers axes (SVD randomisée, Halko et al.).
+    """
+    rng = np.random.default_rng(seed)
+    omega = rng.standard_normal((matrice.shape[1], dimension + 10)).astype(np.float32)
+    y = matrice @ omega
+    for _ in range(iterations):
+        y, _ = np.linalg.qr(y)
+        y = matrice @ (matrice.T @ y)
+    q, _ = np.linalg.qr(y)
+    # Petite matrice (dimension + 10) x termes : ses vecteurs singuliers donnent ceux de matrice
+    u, s, _ = np.linalg.svd(np.asarray((matrice.T @ q).T), full_matrices=False)
+    return (q @ u[:, :dimension]) * s[:dimension]
+
+
+def construire_embeddings(documents, dimension=DIMENSION):
+    """
+    Vecteurs float32 normalisés (cosinus = produit scalaire) des documents : TF-IDF puis SVD tronquée.
+    """
+    tfidf = matrice_tfidf(documents)
+    # Les termes d'un seul document ne rapprochent aucun élément
+    df_termes = np.bincount(tfidf.indices, minlength=tfidf.shape[1])
+    colonnes = np.flatnonzero(df_termes >= 2)
+    if len(colonnes) > TAILLE_VOCABULAIRE_MAX:
+        colonnes = colonnes[np.argsort(-df_termes[colonnes], kind="stable")[:TAILLE_VOCABULAIRE_MAX]]
+    tfidf = tfidf[:, np.sort(colonnes)]
+
+    dimension = min(dimension, tfidf.shape[0] - 1, tfidf.shape[1] - 1)
+    if dimension < 1:
+        return np.zeros((tfidf.shape[0], 1), dtype=np.float32)
+    vecteurs = _svd_tronquee(tfidf, dimension).astype(np.float32)
+    normes = np.linalg.norm(vecteurs, axis=1, keepdims=True)
+    normes[normes == 0] = 1
+    return vecteurs / normes
+
+
+def _plus_proches(vecteurs, centroides):
+    affectation = np.empty(len(vecteurs), dtype=np.int32)
+    for debut in range(0, len(vecteurs), TAILLE_BLOC):
+        affectation[debut:debut + TAILLE_BLOC] = np.argmax(vecteurs[debut:debut + TAILLE_BLOC] @ centroides.T, axis=1)
+    return affectation
+
+
+def _recentrer(centroides, vecteurs, affectation):
+    """
+    Centroïdes = moyennes normalisées des vecteurs de chaque liste (une liste vide garde son centroïde).
+    """
+    ordre = np.argsort(affectation, kind="stable")
+    listes, debuts = np.unique(affectation[ordre], return_index=True)
+    sommes = np.add.reduceat(vecteurs[ordre], debuts, axis=0)
+    normes = np.linalg.norm(sommes, axis=1, keepdims=True)
+    garder = normes[:, 0] > 0
+    centroides[listes[garder]] = sommes[garder] / normes[garder]
+    return ordre
+
+
+def _kmeans(vecteurs, nb_listes, iterations=ITERATIONS_KMEANS, seed=0):
+    """
+    k-means sphérique entraîné sur un échantillon (64 éléments par liste au plus).
+    """
+    rng = np.random.default_rng(seed)
+    echantillon = vecteurs[np.sort(rng.choice(len(vecteurs), min(len(vecteurs), 64 * nb_listes), replace=False))]
+    centroides = echantillon[rng.choice(len(echantillon), nb_listes, replace=False)].copy()
+    for _ in range(iterations):
+        _recentrer(centroides, echantillon, _plus_proches(echantillon, centroides))
+    return centroides
+
+
+def cle_textes(df, colonnes_texte, dimension=DIMENSION):
+    """
+    Empreinte du contenu des colonnes de texte et des réglages : les vecteurs enregistrés restent valables tant qu'elle ne change pas.
+    """
+    h = hashlib.sha256(json.dumps([colonnes_texte, dimension, TAILLE_VOCABULAIRE_MAX, NB_LISTES_MIN]).encode())
+    colonnes = [col for col in colonnes_texte if col in df.columns]
+    if colonnes and len(df):
+        h.update(pd.util.hash_pandas_object(df[colonnes].fillna("").astype(str), index=False).to_numpy().tobytes())
+    h.update(str(len(df)).encode())
+    return h.hexdigest()[:16]
+
+
+class IndexSemantique:
+    """
+    Vecteurs des descriptions (TF-IDF + SVD, float32) et index approché IVF : les vecteurs sont regroupés
+    en listes autour de centroïdes (k-means), une requête ne parcourt que les nb_sondes listes les plus proches.
+    Les vecteurs sont rangés liste par liste (lecture contiguë) ; positions et rangs font le lien avec le catalogue.
+    Avec categorie, ils sont enregistrés dans EMBEDDINGS_DIR et relus par memory-map aux chargements suivants.
+    """
+
+    def __init__(self, df, colonnes_texte, categorie=None, dimension=DIMENSION):
+        debut = time.perf_counter()
+        dossier = None
+        if categorie is not None:
+            dossier = os.path.join(EMBEDDINGS_DIR, f"{categorie}_{cle_textes(df, colonnes_texte, dimension)}")
+            tableaux = _lire(dossier)
+            if tableaux is not None:
+                self._attacher(*tableaux)
+                self.duree_construction = 0.0
+                return
+
+        vecteurs = construire_embeddings(_documents(df, colonnes_texte), dimension)
+        nb_listes = min(len(df), max(NB_LISTES_MIN, int(np.sqrt(len(df)))))
+        if nb_listes:
+            centroides = _kmeans(vecteurs, nb_listes)
+            affectation = _plus_proches(vecteurs, centroides)
+            # Centroïdes recalculés sur tous les éléments de chaque liste
+            positions = _recentrer(centroides, vecteurs, affectation).astype(np.int32)
+        else:
+            affectation = np.zeros(0, dtype=np.int32)
+            centroides = np.zeros((0, vecteurs.shape[1]), dtype=np.float32)
+            positions = np.zeros(0, dtype=np.int32)
+        bornes = np.searchsorted(affectation[positions], np.arange(nb_listes + 1)).astype(np.int64)
+        rangs = np.empty(len(positions), dtype=np.int32)
+        rangs[positions] = np.arange(len(positions), dtype=np.int32)
+        self._attacher(vecteurs[positions], positions, rangs, centroides, bornes)
+        self.duree_construction = time.perf_counter() - debut
+
+        # Publication illisible (fichier tronqué...) : remplacée par celle-ci
+        if dossier is not None and self.enregistrer(dossier, remplacer=os.path.exists(os.path.join(dossier, "meta.json"))):
+            # Relecture par memory-map : pages communes avec les autres processus qui les lisent
+            tableaux = _lire(dossier)
+            if tableaux is not None:
+                self._attacher(*tableaux)
+
+    @classmethod
+    def attacher(cls, vecteurs, positions, rangs, centroides, bornes):
+        """
+        Index construit sur des tableaux déjà calculés (ex : memory-mappés), sans copie.
+        """
+        index = cls.__new__(cls)
+        index._attacher(vecteurs, positions, rangs, centroides, bornes)
+        index.duree_construction = 0.0
+        return index
+
+    def _attacher(self, vecteurs, positions, rangs, centroides, bornes):
+        self.vecteurs = vecteurs
+        self.positions = positions
+        self.rangs = rangs
+        self.centroides = centroides
+        self.bornes = bornes
+
+    def tableaux(self):
+        return {nom: getattr(self, nom) for nom in FICHIERS}
+
+    def enregistrer(self, dossier, remplacer=False):
+        """
+        Écrit les tableaux dans dossier (publication atomique), sous un verrou entre processus :
+        si un autre processus (worker) l'a déjà publié, ses fichiers sont gardés tels quels
+        (avec remplacer, seulement s'ils sont lisibles). Aucune autre version n'est supprimée,
+        d'autres processus pouvant encore la lire par memory-map.
+        Renvoie True si les tableaux sont publiés dans dossier.
+        """
+        # Import local : stockage_partage importe ce module
+        from modules.stockage_partage import VerrouFichier
+        try:
+            with VerrouFichier(os.path.join(EMBEDDINGS_DIR, "publication.lock")):
+                if os.path.exists(os.path.join(dossier, "meta.json")) and (not remplacer or _lire(dossier) is not None):
+                    return True
+                tmp = f"{dossier}.tmp{os.getpid()}"
+                shutil.rmtree(tmp, ignore_errors=True)
+                os.makedirs(tmp)
+                for nom, tableau in self.tableaux().items():
+                    np.save(os.path.join(tmp, f"{nom}.npy"), tableau)
+                with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                    json.dump({"nb_elements": len(self.positions), "dimension": self.vecteurs.shape[1],
+                               "nb_listes": len(self.centroides)}, f, indent=2)
+                # Dossier sans meta.json (publication interrompue) ou illisible : mis de côté puis supprimé
+                # (sous Linux, un processus qui l'aurait ouvert garde ses fichiers)
+                if os.path.exists(dossier):
+                    ancien = f"{dossier}.old{os.getpid()}"
+                    os.replace(dossier, ancien)
+                    shutil.rmtree(ancien, ignore_errors=True)
+                os.replace(tmp, dossier)
+            return True
+        except OSError as e:
+            print("Erreur d'écriture des vecteurs :", e)
+            return False
+
+    def _top_k(self, rangs, scores, position, k):
+        compter("lignes_parcourues", len(rangs))
+        # L'élément lui-même et les scores nuls sont écartés
+        garder = (scores > 0) & (rangs != self.rangs[position])
+        positions, scores = np.asarray(self.positions[rangs[garder]]), scores[garder]
+        k = min(k, len(scores))
+        if k == 0:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.float32)
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        # Égalités au seuil (doublons) : les premiers éléments du catalogue sont gardés
+        seuil = scores[top].min()
+        if np.count_nonzero(scores >= seuil) > k:
+            au_dessus = np.flatnonzero(scores > seuil)
+            egaux = np.flatnonzero(scores == seuil)
+            top = np.concatenate([au_dessus, egaux[np.argsort(positions[egaux], kind="stable")[:k - len(au_dessus)]]])
+        top = top[np.lexsort((positions[top], -scores[top]))]
+        return positions[top], scores[top]
+
+    def similaires(self, position, k=10, nb_sondes=NB_SONDES):
+        """
+        Renvoie (positions, scores) des k éléments approximativement les plus proches (cosinus), sans score nul.
+        """
+        if len(self.positions) < TAILLE_MIN_IVF:
+            return self.similaires_exacts(position, k)
+        requete = self.vecteurs[self.rangs[position]]
+        proximites = self.centroides @ requete
+        nb_sondes = min(nb_sondes, len(proximites))
+        listes = np.argpartition(-proximites, nb_sondes - 1)[:nb_sondes]
+        # Listes contiguës : produit sur des tranches, sans copie des vecteurs
+        rangs = np.concatenate([np.arange(self.bornes[l], self.bornes[l + 1]) for l in listes])
+        scores = np.concatenate([self.vecteurs[self.bornes[l]:self.bornes[l + 1]] @ requete for l in listes])
+        return self._top_k(rangs, scores, position, k)
+
+    def similaires_exacts(self, position, k=10):
+        """
+        Même résultat par recherche exhaustive (référence pour mesurer le rappel de l'index).
+        """
+        requete = self.vecteurs[self.rangs[position]]
+        return self._top_k(np.arange(len(self.vecteurs)), self.vecteurs @ requete, position, k)
+
+
+def elements_semantiques(df, index, position, k=10, exact=False):
+    """
+    Lignes de df dont la description est la plus proche de celle de la ligne à la position donnée, avec leur score.
+    """
+    positions, scores = index.similaires_exacts(position, k) if exact else index.similaires(position, k)
+    result = df.iloc[positions].copy()
+    result["score"] = np.round(scores.astype(float), 4)
+    return result
@@ -0,0 +1,110 @@
+import json
+import numpy as np
+import pyarrow as pa
+from json.encoder import encode_basestring
+
+
+def _champs(colonne, serie):
+    """
+    Fragments '"colonne":valeur' de chaque ligne d'une colonne, encodés comme json.dumps
+    le ferait sur to_dict(orient='records') ; les valeurs manquantes (NaN, None) donnent null.
+    """
+    cle = json.dumps(str(colonne), ensure_ascii=False) + ":"
+    manquantes = serie.isna().to_numpy()
+    champs = np.empty(len(serie), dtype=object)
+    champs[:] = [
+        cle + ("null" if manque else encode_basestring(valeur) if type(valeur) is str else json.dumps(valeur, ensure_ascii=False))
+        for valeur, manque in zip(serie.tolist(), manquantes)
+    ]
+    return champs
+
+
+def _assembler(parts):
+    """
+    Tableau JSON (bytes) à partir des fragments de chaque colonne.
+    """
+    lignes = ["{" + ",".join(ligne) + "}" for ligne in zip(*parts)]
+    return ("[" + ",".join(lignes) + "]").encode("utf-8")
+
+
+def encoder_df(df):
+    """
+    JSON (bytes) de df, sans passer par to_dict : même forme que to_dict(orient='records').
+    """
+    return _assembler([_champs(col, df[col]) for col in df.columns])
+
+
+class FragmentsJSON:
+    """
+    Fragments JSON précalculés une fois par ligne et par colonne d'un catalogue.
+    Une réponse se construit ensuite par simple concaténation des lignes demandées.
+    Compact : fragments en colonnes Arrow (un seul tampon par colonne au lieu d'une chaîne Python par valeur),
+    et colonnes a_la_demande (ex : description) encodées seulement pour les lignes renvoyées.
+    """
+
+    def __init__(self, df, a_la_demande=(), compact=False):
+        self.colonnes = list(df.columns)
+        self.index = df.index
+        self.a_la_demande = {col: df[col] for col in a_la_demande if col in df.columns}
+        self.champs = {col: _champs(col, df[col]) for col in df.columns if col not in self.a_la_demande}
+        # Lignes entières seulement si toutes les colonnes sont précalculées
+        self.lignes = None
+        if not self.a_la_demande:
+            self.lignes = np.empty(len(df), dtype=object)
+            self.lignes[:] = ["{" + ",".join(ligne) + "}" for ligne in zip(*self.champs.values())]
+        if compact:
+            self.champs = {col: pa.array(champs, type=pa.large_string()) for col, champs in self.champs.items()}
+            if self.lignes is not None:
+                self.lignes = pa.array(self.lignes, type=pa.large_string())
+
+    @classmethod
+    def attacher(cls, colonnes, index, champs, lignes, a_la_demande=None):
+        """
+        Fragments déjà calculés (ex : colonnes Arrow memory-mappées), utilisés sans copie.
+        """
+        fragments = cls.__new__(cls)
+        fragments.colonnes = list(colonnes)
+        fragments.index = index
+        fragments.champs = champs
+        fragments.lignes = lignes
+        fragments.a_la_demande = a_la_demande or {}
+        return fragments
+
+    def encoder(self, page):
+        """
+        JSON (bytes) de page, un sous-ensemble des lignes du catalogue (éventuellement projeté
+        ou complété de colonnes calculées, ex : score). Les colonnes inconnues ou à la demande sont encodées à la volée.
+        """
+        positions = self.index.get_indexer(page.index)
+        if (positions < 0).any():
+            return encoder_df(page)
+
+        colonnes = list(page.columns)
+        if colonnes == self.colonnes and self.lignes is not None:
+            return ("[" + ",".join(_prendre(self.lignes, positions)) + "]").encode("utf-8")
+        return _assembler([
+            _prendre(self.champs[col], positions) if col in self.champs else _champs(col, page[col])
+            for col in colonnes
+        ])
+
+    def objets(self, positions):
+        """
+        Objets JSON (str, toutes les colonnes) des lignes aux positions données.
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        if self.lignes is not None:
+            return list(_prendre(self.lignes, positions))
+        parts = [
+            _prendre(self.champs[col], positions) if col in self.champs else _champs(col, self.a_la_demande[col].iloc[positions])
+            for col in self.colonnes
+        ]
+        return ["{" + ",".join(ligne) + "}" for ligne in zip(*parts)]
+
+
+def _prendre(fragments, positions):
+    """
+    Fragments aux positions données, qu'ils soient en tableau numpy ou en colonne Arrow.
+    """
+    if isinstance(fragments, (pa.Array, pa.ChunkedArray)):
+        return fragments.take(positions).to_pylist()
+    return fragments[positions]
@@ -0,0 +1,160 @@
+import re
+import time
+import numpy as np
+from scipy import sparse
+
+# Valeurs de remplissage sans intérêt pour la similarité
+VALEURS_IGNOREES = {"inconnu", "non spécifié", "description non disponible"}
+MOTS_VIDES = {
+    "le", "la", "les", "un", "une", "des", "de", "du", "et", "en", "au", "aux", "à", "pour", "par",
+    "sur", "dans", "qui", "que", "est", "son", "sa", "ses", "il", "elle", "ils", "ne", "pas", "se",
+    "the", "a", "an", "and", "of", "to", "in", "is", "for", "on", "with", "his", "her", "their",
+    "he", "she", "they", "it", "its", "by", "at", "from", "as", "that", "this", "be", "are", "was",
+}
+MOT = re.compile(r"\w\w+")
+
+# Nombre de voisins précalculés par élément
+K_VOISINS = 20
+# Termes présents dans une trop grande part des éléments (non discriminants)
+PROPORTION_MAX_TERME = 0.5
+# Budget de construction (secondes) au-delà duquel on le signale
+BUDGET_CONSTRUCTION = 30.0
+# Nombre de scores calculés à la fois (lignes du bloc x éléments du catalogue)
+TAILLE_BLOC_SCORES = 1 << 23
+
+
+def tokeniser(texte):
+    """
+    Découpe un texte libre en mots minuscules, sans les mots vides.
+    """
+    return [mot for mot in MOT.findall(texte.lower()) if mot not in MOTS_VIDES and not mot.isdigit()]
+
+
+def _valeurs(serie):
+    """
+    Découpe une colonne catégorielle ("28, 80, 53", "Rihanna") en valeurs normalisées.
+    """
+    valeurs = []
+    for texte in serie.fillna("").astype(str):
+        parts = [p.strip().lower() for p in texte.split(",")]
+        valeurs.append([p for p in parts if p and p not in VALEURS_IGNOREES])
+    return valeurs
+
+
+def matrice_tfidf(documents):
+    """
+    Matrice TF-IDF (creuse, lignes normalisées L2) de documents donnés sous forme de listes de termes.
+    """
+    vocabulaire = {}
+    lignes, colonnes, valeurs = [], [], []
+    for i, doc in enumerate(documents):
+        compte = {}
+        for terme in doc:
+            j = vocabulaire.setdefault(terme, len(vocabulaire))
+            compte[j] = compte.get(j, 0) + 1
+        lignes.extend([i] * len(compte))
+        colonnes.extend(compte.keys())
+        valeurs.extend(compte.values())
+
+    tf = sparse.csr_matrix(
+        (np.array(valeurs, dtype=np.float32), (np.array(lignes, dtype=np.int32), np.array(colonnes, dtype=np.int32))),
+        shape=(len(documents), len(vocabulaire)),
+    )
+    # tf sous-linéaire et idf lissé
+    tf.data = 1 + np.log(tf.data)
+    df_termes = np.bincount(tf.indices, minlength=tf.shape[1])
+    idf = (np.log((1 + tf.shape[0]) / (1 + df_termes)) + 1).astype(np.float32)
+    idf[df_termes > PROPORTION_MAX_TERME * tf.shape[0]] = 0
+    tfidf = tf @ sparse.diags(idf)
+
+    # Normalisation L2 : le produit scalaire devient un cosinus
+    normes = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+    normes[normes == 0] = 1
+    tfidf = sparse.csr_matrix(sparse.diags(1 / normes) @ tfidf, dtype=np.float32)
+    tfidf.eliminate_zeros()
+    return tfidf
+
+
+class MoteurSimilarite:
+    """
+    Similarité élément à élément par TF-IDF (cosinus) sur le texte libre et les colonnes catégorielles.
+    Les k plus proches voisins de chaque élément sont précalculés à la construction.
+    """
+
+    def __init__(self, df, colonnes_texte, colonnes_categories, k=K_VOISINS):
+        debut = time.perf_counter()
+
+        # Un document = mots du texte libre + valeurs catégorielles préfixées par leur colonne
+        documents = [[] for _ in range(len(df))]
+        for col in colonnes_texte:
+            if col in df.columns:
+                for doc, texte in zip(documents, df[col].fillna("").astype(str)):
+                    if texte.lower() not in VALEURS_IGNOREES:
+                        doc.extend(tokeniser(texte))
+        for col in colonnes_categories:
+            if col in df.columns:
+                for doc, valeurs in zip(documents, _valeurs(df[col])):
+                    doc.extend(f"{col}:{v}" for v in valeurs)
+
+        self.matrice = matrice_tfidf(documents)
+        self.voisins, self.scores = self._top_k(self.matrice, min(k, max(len(df) - 1, 0)))
+
+        self.duree_construction = time.perf_counter() - debut
+        if self.duree_construction > BUDGET_CONSTRUCTION:
+            print(f"Attention : similarité construite en {self.duree_construction:.1f} s (budget {BUDGET_CONSTRUCTION:.0f} s)")
+
+    @classmethod
+    def attacher(cls, matrice, voisins, scores):
+        """
+        Moteur construit sur une matrice et des voisins déjà calculés (ex : tableaux memory-mappés), sans copie.
+        """
+        moteur = cls.__new__(cls)
+        moteur.matrice = matrice
+        moteur.voisins = voisins
+        moteur.scores = scores
+        moteur.duree_construction = 0.0
+        return moteur
+
+    @staticmethod
+    def _top_k(matrice, k):
+        n = matrice.shape[0]
+        voisins = np.zeros((n, k), dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float32)
+        if k == 0:
+            return voisins, scores
+
+        transposee = matrice.T.tocsc()
+        # Hauteur du bloc bornée par le budget de scores : mémoire constante quelle que soit la taille du catalogue
+        taille_bloc = max(1, TAILLE_BLOC_SCORES // n)
+        for debut in range(0, n, taille_bloc):
+            fin = min(debut + taille_bloc, n)
+            bloc = (matrice[debut:fin] @ transposee).toarray()
+            # Un élément n'est pas son propre voisin
+            bloc[np.arange(fin - debut), np.arange(debut, fin)] = -1
+
+            # Sélection partielle puis tri des k meilleurs seulement
+            top = np.argpartition(-bloc, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(bloc, top, axis=1)
+            ordre = np.argsort(-top_scores, axis=1)
+            voisins[debut:fin] = np.take_along_axis(top, ordre, axis=1)
+            scores[debut:fin] = np.take_along_axis(top_scores, ordre, axis=1)
+        return voisins, scores
+
+    def similaires(self, position, k=10):
+        """
+        Renvoie (positions, scores) des k éléments les plus proches, sans score nul.
+        """
+        voisins = self.voisins[position, :k]
+        scores = self.scores[position, :k]
+        garder = scores > 0
+        return voisins[garder], scores[garder]
+
+
+def elements_similaires(df, moteur, position, k=10):
+    """
+    Lignes de df les plus proches de la ligne à la position donnée, avec leur score.
+    """
+    positions, scores = moteur.similaires(position, k)
+    result = df.iloc[positions].copy()
+    result["score"] = np.round(scores.astype(float), 4)
+    return result
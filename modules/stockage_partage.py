@@ -0,0 +1,220 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from scipy import sparse
+from modules.data_cleaning import CLEANED_DIR, df_compact, ecrire_arrow, lire_arrow
+from modules.semantique import FICHIERS as FICHIERS_SEMANTIQUE
+from modules.facettes import FICHIERS as FICHIERS_FACETTES
+
+# Données publiées pour être partagées entre processus : un dossier par version des données nettoyées.
+# Les fichiers sont ouverts en memory-map : les pages sont communes à tous les processus qui les lisent.
+PARTAGE_DIR = os.environ.get("DONNEES_PARTAGEES_DIR", os.path.join(CLEANED_DIR, "partage"))
+VERROU_PATH = os.path.join(PARTAGE_DIR, "publication.lock")
+# Ancienneté (secondes) au-delà de laquelle un verrou est considéré comme abandonné
+DELAI_VERROU = 600
+# Format des fichiers publiés : une publication d'un autre format (ex : index des titres normalisé autrement)
+# est reconstruite, même si les données nettoyées n'ont pas changé
+FORMAT_PUBLICATION = 2
+
+
+class VerrouFichier:
+    """
+    Verrou entre processus : fichier créé de façon exclusive (O_EXCL), sous Linux comme sous Windows.
+    """
+
+    def __init__(self, path=VERROU_PATH, delai_max=DELAI_VERROU):
+        self.path = path
+        self.delai_max = delai_max
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    # Verrou abandonné (processus arrêté pendant la publication)
+                    if time.time() - os.path.getmtime(self.path) > self.delai_max:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(0.1)
+
+    def __exit__(self, *args):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def dossier_version(version):
+    return os.path.join(PARTAGE_DIR, version)
+
+
+def est_publie(version):
+    # meta.json est écrit en dernier : sa présence garantit une publication complète
+    try:
+        with open(os.path.join(dossier_version(version), "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("format") == FORMAT_PUBLICATION
+    except (OSError, ValueError):
+        return False
+
+
+def publier(version, catalogues, croisements):
+    """
+    Écrit les catalogues (données, index des titres, similarité, profils, vecteurs, recherche, facettes, fragments JSON)
+    et les candidats entre catégories dans le dossier de la version, puis supprime les versions plus anciennes.
+    """
+    dossier = dossier_version(version)
+    tmp = f"{dossier}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    meta = {"version": version, "format": FORMAT_PUBLICATION, "categories": {}}
+    for categorie, catalogue in catalogues.items():
+        chemin = os.path.join(tmp, categorie)
+        ecrire_arrow(pa.Table.from_pandas(catalogue.df, preserve_index=False), f"{chemin}.arrow")
+
+        # Colonnes dérivées : recherche par mots-clés et fragments JSON (ligne entière et par colonne)
+        fragments = catalogue.fragments
+        derives = {"recherche": pa.array(catalogue.recherche)}
+        if fragments.lignes is not None:
+            derives["json"] = _colonne_json(fragments.lignes)
+        for col, champs in fragments.champs.items():
+            derives[f"json:{col}"] = _colonne_json(champs)
+        ecrire_arrow(pa.table(derives), f"{chemin}_derives.arrow")
+
+        grams, bornes, positions = catalogue.index.vers_csr()
+        matrice = catalogue.similarite.matrice
+        personnalisation = catalogue.personnalisation
+        tableaux = {
+            "index_grams": grams, "index_bornes": bornes, "index_positions": positions,
+            "voisins": catalogue.similarite.voisins, "scores": catalogue.similarite.scores,
+            "matrice_data": matrice.data, "matrice_indices": matrice.indices, "matrice_indptr": matrice.indptr,
+            "profils_data": personnalisation.matrice.data, "profils_indices": personnalisation.matrice.indices,
+            "profils_indptr": personnalisation.matrice.indptr, "profils_genres": personnalisation.genres,
+            "profils_personnes": personnalisation.personnes, "profils_tranches": personnalisation.tranches,
+        }
+        tableaux.update({f"semantique_{nom}": tableau for nom, tableau in catalogue.semantique.tableaux().items()})
+        tableaux.update({f"facettes_{nom}": tableau for nom, tableau in catalogue.facettes.tableaux().items()})
+        for nom, tableau in tableaux.items():
+            np.save(f"{chemin}_{nom}.npy", tableau)
+
+        meta["categories"][categorie] = {
+            "empreinte": catalogue.empreinte,
+            "nb_lignes": len(catalogue.df),
+            "colonnes": fragments.colonnes,
+            "a_la_demande": list(fragments.a_la_demande),
+            "forme_matrice": list(matrice.shape),
+            "forme_profils": list(personnalisation.matrice.shape),
+        }
+
+    meta["croisements"] = []
+    for (source, cible), voisins in croisements.voisins.items():
+        np.save(os.path.join(tmp, f"croisements_{source}_{cible}_voisins.npy"), voisins)
+        np.save(os.path.join(tmp, f"croisements_{source}_{cible}_scores.npy"), croisements.scores[source, cible])
+        meta["croisements"].append([source, cible])
+
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # Publication atomique : le dossier n'apparaît sous son nom qu'une fois complet
+    if os.path.exists(dossier):
+        ancien = f"{dossier}.old{os.getpid()}"
+        os.replace(dossier, ancien)
+        shutil.rmtree(ancien, ignore_errors=True)
+    os.replace(tmp, dossier)
+
+    # Les processus encore attachés à une ancienne version gardent leurs fichiers ouverts (Linux) ;
+    # sous Windows la suppression échoue tant qu'ils sont ouverts et sera refaite à la prochaine publication.
+    for nom in os.listdir(PARTAGE_DIR):
+        chemin = os.path.join(PARTAGE_DIR, nom)
+        if nom != version and os.path.isdir(chemin):
+            shutil.rmtree(chemin, ignore_errors=True)
+    print(f"Données publiées pour le partage : {dossier}")
+
+
+def _colonne_json(fragments):
+    # Fragments JSON en colonne Arrow (déjà en Arrow pour un catalogue compact)
+    if isinstance(fragments, (pa.Array, pa.ChunkedArray)):
+        return fragments.cast(pa.large_string())
+    return pa.array(list(fragments), type=pa.large_string())
+
+
+def attacher(version):
+    """
+    Vues en lecture seule, sans copie, sur les données publiées d'une version.
+    Renvoie {categorie: éléments d'un catalogue}.
+    """
+    dossier = dossier_version(version)
+    with open(os.path.join(dossier, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    elements = {}
+    for categorie, infos in meta["categories"].items():
+        chemin = os.path.join(dossier, categorie)
+        df = df_compact(lire_arrow(f"{chemin}.arrow"))
+        derives = lire_arrow(f"{chemin}_derives.arrow")
+        tableaux = {
+            nom: np.load(f"{chemin}_{nom}.npy", mmap_mode="r")
+            for nom in ["index_grams", "index_bornes", "index_positions", "voisins", "scores",
+                        "matrice_data", "matrice_indices", "matrice_indptr",
+                        "profils_data", "profils_indices", "profils_indptr",
+                        "profils_genres", "profils_personnes", "profils_tranches"]
+                       + [f"semantique_{nom}" for nom in FICHIERS_SEMANTIQUE]
+                       + [f"facettes_{nom}" for nom in FICHIERS_FACETTES]
+        }
+
+        elements[categorie] = {
+            "df": df,
+            "empreinte": infos["empreinte"],
+            "index": (tableaux["index_grams"], tableaux["index_bornes"], tableaux["index_positions"], infos["nb_lignes"]),
+            "similarite": (
+                sparse.csr_matrix(
+                    (tableaux["matrice_data"], tableaux["matrice_indices"], tableaux["matrice_indptr"]),
+                    shape=tuple(infos["forme_matrice"]), copy=False,
+                ),
+                tableaux["voisins"], tableaux["scores"],
+            ),
+            "personnalisation": (
+                sparse.csc_matrix(
+                    (tableaux["profils_data"], tableaux["profils_indices"], tableaux["profils_indptr"]),
+                    shape=tuple(infos["forme_profils"]), copy=False,
+                ),
+                tableaux["profils_genres"], tableaux["profils_personnes"], tableaux["profils_tranches"],
+            ),
+            "semantique": tuple(tableaux[f"semantique_{nom}"] for nom in FICHIERS_SEMANTIQUE),
+            "recherche": pd.Series(pd.arrays.ArrowExtensionArray(derives.column("recherche")), index=df.index),
+            "facettes": tuple(tableaux[f"facettes_{nom}"] for nom in FICHIERS_FACETTES),
+            "fragments": (
+                infos["colonnes"], df.index,
+                {col: derives.column(f"json:{col}") for col in infos["colonnes"] if col not in infos["a_la_demande"]},
+                derives.column("json") if "json" in derives.column_names else None,
+                {col: df[col] for col in infos["a_la_demande"]},
+            ),
+        }
+    return elements
+
+
+def attacher_croisements(version):
+    """
+    Candidats entre catégories publiés pour une version : ({(source, cible): voisins}, {(source, cible): scores}).
+    """
+    dossier = dossier_version(version)
+    with open(os.path.join(dossier, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    voisins, scores = {}, {}
+    for source, cible in meta["croisements"]:
+        chemin = os.path.join(dossier, f"croisements_{source}_{cible}")
+        voisins[source, cible] = np.load(f"{chemin}_voisins.npy", mmap_mode="r")
+        scores[source, cible] = np.load(f"{chemin}_scores.npy", mmap_mode="r")
+    return voisins, scores
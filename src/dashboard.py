@@ -2,14 +2,20 @@ import streamlit as st
 import pandas as pd
 import requests
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Ajout du chemin du projet pour pouvoir importer les modules
 sys.path.append(os.path.join(os.path.dirname(__file__), 'projet_datascience'))
 
 # Import des modules du projet
 try:
-    from modules.recommandation import df_livres, df_films, df_musiques, livres_recommandations, films_recommandations, musiques_recommandations
+    from modules.recherche import colonne_recherche, rechercher_mots_cles
+    from modules import recommandation
+    from modules.recommandation import livres_recommandations, films_recommandations, musiques_recommandations
+    from modules.recommandation import livres_similaires, films_similaires, musiques_similaires
+    from modules.recommandation import recherche_mots_cles
     #from modules import recommandation, config, data_cleaning
     
     MODULES_LOADED = True
@@ -24,8 +30,8 @@ API_URL = "http://127.0.0.1:8000"  # FastAPI utilise le port 8000 par défaut
 # Fonction pour vérifier si l'API est disponible
 def is_api_available():
     try:
-        # Utiliser un timeout court pour éviter de bloquer trop longtemps
-        response = requests.get(f"{API_URL}/films/", timeout=1)
+        # Utiliser un timeout court pour éviter de bloquer trop longtemps ; /health répond sans chercher de données
+        response = requests.get(f"{API_URL}/health", timeout=1)
         if response.status_code == 200:
             print("API connectée avec succès!")
             return True
@@ -36,9 +42,38 @@ def is_api_available():
         print(f"Erreur de connexion à l'API: {e}")
         return False
 
-# Vérification de la disponibilité de l'API
-API_AVAILABLE = is_api_available()
-print(f"API disponible: {API_AVAILABLE}")
+@st.cache_resource(show_spinner=False)
+def _executeur_verification():
+    return ThreadPoolExecutor(max_workers=1)
+
+
+# Vérification de la disponibilité de l'API en arrière-plan, renouvelée toutes les 30 s :
+# la page s'affiche sans l'attendre, le résultat n'est attendu qu'au moment d'appeler l'API
+@st.cache_resource(ttl=30, show_spinner=False)
+def verification_api():
+    return _executeur_verification().submit(is_api_available)
+
+
+def api_disponible():
+    try:
+        return verification_api().result(timeout=2)
+    except Exception:
+        return False
+
+
+verification_api()
+
+
+# Identifiant (item_id) d'un titre dans le catalogue de l'API : titre entier, identique en priorité, sinon à la casse près.
+# None si l'API ne le trouve pas
+def identifiant_api(categorie, titre):
+    params = {"titre": f"^{re.escape(titre)}$", "fields": "item_id,titre"}
+    response = requests.get(f"{API_URL}/{categorie}/", params=params)
+    response.raise_for_status()
+    resultats = response.json()
+    exacts = [r for r in resultats if r["titre"] == titre]
+    return (exacts or resultats or [{}])[0].get("item_id")
+
 
 # Configuration de la page Streamlit
 st.set_page_config(
@@ -64,17 +99,37 @@ content_type = st.sidebar.selectbox(
     ["Livres", "Films", "Musiques"]
 )
 
-# Fonction pour charger les données selon le type de contenu
-@st.cache_data
-def load_data(content_type):
+# Rechargement des données du dashboard quand les fichiers nettoyés changent, comme pour l'API
+# (un seul surveillant pour toutes les sessions ; désactivable avec RECHARGEMENT_AUTO=0)
+@st.cache_resource(show_spinner=False)
+def surveillant_donnees():
+    surveillant = recommandation.SurveillantDonnees()
+    surveillant.demarrer()
+    return surveillant
+
+
+if MODULES_LOADED and os.environ.get("RECHARGEMENT_AUTO", "1") != "0":
+    surveillant_donnees()
+
+
+# Version des données des modules (None sans les modules) : clé des caches ci-dessous, renouvelés après un rechargement
+def version_donnees():
+    return recommandation.donnees.version if MODULES_LOADED else None
+
+
+# Fonction pour charger les données selon le type de contenu, appelée seulement par les recherches qui en ont besoin
+# (cache_resource : pas de copie des données, qui peuvent être partagées avec l'API en memory-map ;
+# une entrée par catégorie et par version des données, les anciennes versions sont libérées)
+@st.cache_resource(max_entries=3, show_spinner="Chargement des données...")
+def load_data(content_type, version=None):
     if MODULES_LOADED:
         # Utilisation directe des dataframes du module de recommandation
         if content_type == "Livres":
-            return df_livres
+            return recommandation.donnees["livres"].df
         elif content_type == "Films":
-            return df_films
+            return recommandation.donnees["films"].df
         else:  # Musiques
-            return df_musiques
+            return recommandation.donnees["musiques"].df
     else:
         # Fallback si les modules ne sont pas chargés
         if content_type == "Livres":
@@ -93,18 +148,37 @@ def load_data(content_type):
         else:  # Musiques
             return pd.read_csv("data/musiques.csv")
 
-# Chargement des données
-try:
-    df = load_data(content_type)
-    st.sidebar.success(f"Données {content_type} chargées avec succès!")
-except Exception as e:
-    st.sidebar.error(f"Erreur lors du chargement des données: {e}")
-    df = pd.DataFrame()
 
-# Affichage d'un aperçu des données
-if not df.empty:
-    st.subheader(f"Aperçu des données ({content_type})")
-    st.dataframe(df.head())
+# Données du type de contenu choisi (DataFrame vide en cas d'erreur)
+def donnees_contenu(content_type):
+    try:
+        return load_data(content_type, version_donnees())
+    except Exception as e:
+        st.sidebar.error(f"Erreur lors du chargement des données: {e}")
+        return pd.DataFrame()
+
+
+# Titres proposés pour la recherche de titres similaires, conservés entre les reruns
+@st.cache_resource(max_entries=3, show_spinner=False)
+def load_titles(content_type, version=None):
+    df = load_data(content_type, version)
+    if df.empty:
+        return []
+    title_column = "titre" if "titre" in df.columns else "title" if "title" in df.columns else df.columns[0]
+    return df[title_column].dropna().unique().tolist()
+
+
+# Colonne de recherche par mots-clés, conservée entre les reruns
+@st.cache_resource(max_entries=3, show_spinner=False)
+def load_search_column(content_type, version=None):
+    return colonne_recherche(load_data(content_type, version))
+
+# Aperçu des données, à la demande : le premier affichage n'attend pas leur chargement
+if st.sidebar.checkbox("Afficher un aperçu des données"):
+    df = donnees_contenu(content_type)
+    if not df.empty:
+        st.subheader(f"Aperçu des données ({content_type})")
+        st.dataframe(df.head())
 
 # Options de recherche
 st.subheader("Recherche et Recommandation")
@@ -116,6 +190,7 @@ search_method = st.radio(
 
 if search_method == "Par mots-clés":
     keywords = st.text_input("Entrez des mots-clés séparés par des espaces")
+    match_mode = st.radio("Correspondance", ["Au moins un mot-clé", "Tous les mots-clés"], horizontal=True)
     col1, col2 = st.columns([1,1])
 
     with col2:
@@ -127,11 +202,15 @@ if search_method == "Par mots-clés":
     with col1:
         if st.button("Rechercher") and keywords:
             st.info("Recherche en cours...")
-            # Simulation de recherche par mots-clés
-            # Dans une implémentation réelle, vous appelleriez votre API ici
             try:
-                # Exemple de filtrage simple (à remplacer par appel API)
-                results = df[df.apply(lambda row: any(kw.lower() in str(row).lower() for kw in keywords.split()), axis=1)]
+                # Recherche vectorisée sur la colonne de recherche précalculée
+                mode = "et" if match_mode == "Tous les mots-clés" else "ou"
+                if MODULES_LOADED:
+                    results = recherche_mots_cles(content_type.lower(), keywords, mode)
+                else:
+                    results = rechercher_mots_cles(
+                        donnees_contenu(content_type), load_search_column(content_type, version_donnees()), keywords, mode
+                    )
                 if not results.empty:
                     st.success(f"{len(results)} résultats trouvés")
                     st.dataframe(results)
@@ -141,45 +220,45 @@ if search_method == "Par mots-clés":
                 st.error(f"Erreur lors de la recherche: {e}")
 
 elif search_method == "Par titre similaire":
-    if not df.empty:
-        # Récupération des titres selon le type de contenu
-        title_column = "titre" if "titre" in df.columns else "title" if "title" in df.columns else df.columns[0]
-        titles = df[title_column].dropna().unique().tolist()
+    # Récupération des titres selon le type de contenu
+    try:
+        titles = load_titles(content_type, version_donnees())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des données: {e}")
+        titles = []
+    if titles:
         selected_title = st.selectbox("Sélectionnez un titre", titles)
         
         if st.button("Trouver des titres similaires"):
             st.info("Recherche de titres similaires...")
             try:
                 # Essayer d'utiliser l'API d'abord si elle est disponible
-                if API_AVAILABLE:
-                    endpoint = ""
-                    if content_type == "Livres":
-                        endpoint = f"{API_URL}/livres/?titre={selected_title}"
-                    elif content_type == "Films":
-                        endpoint = f"{API_URL}/films/?titre={selected_title}"
-                    else:  # Musiques
-                        endpoint = f"{API_URL}/musiques/?titre={selected_title}"
-                    
-                    response = requests.get(endpoint)
-                    if response.status_code == 200:
-                        results = response.json()
-                        if results:
-                            st.success(f"Titres similaires à '{selected_title}' (via API)")
-                            for i, item in enumerate(results, 1):
-                                st.write(f"{i}. {item['titre']}")
-                        else:
-                            st.warning("Aucun titre similaire trouvé via l'API.")
+                if api_disponible():
+                    # Identifiant du titre résolu par l'API, dans ses données à jour
+                    item_id = identifiant_api(content_type.lower(), selected_title)
+                    if item_id is None:
+                        st.warning(f"Titre '{selected_title}' introuvable via l'API.")
                     else:
-                        st.error(f"Erreur lors de l'appel à l'API: {response.status_code}")
-                        # Fallback aux modules si l'API échoue
-                        if MODULES_LOADED:
-                            st.info("Utilisation des modules locaux comme alternative...")
-                
+                        response = requests.get(f"{API_URL}/{content_type.lower()}/{item_id}/similaires")
+                        if response.status_code == 200:
+                            results = response.json()
+                            if results:
+                                st.success(f"Titres similaires à '{selected_title}' (via API)")
+                                for i, item in enumerate(results, 1):
+                                    st.write(f"{i}. {item['titre']}")
+                            else:
+                                st.warning("Aucun titre similaire trouvé via l'API.")
+                        else:
+                            st.error(f"Erreur lors de l'appel à l'API: {response.status_code}")
+                            # Fallback aux modules si l'API échoue
+                            if MODULES_LOADED:
+                                st.info("Utilisation des modules locaux comme alternative...")
+
                 # Utiliser les modules si l'API n'est pas disponible ou a échoué
                 elif MODULES_LOADED:
                     # Utilisation des fonctions du module de recommandation
                     if content_type == "Livres":
-                        results = livres_recommandations(selected_title)
+                        results = livres_similaires(selected_title)
                         if results:
                             st.success(f"Titres similaires à '{selected_title}' (via modules)")
                             for i, item in enumerate(results, 1):
@@ -187,7 +266,7 @@ elif search_method == "Par titre similaire":
                         else:
                             st.warning("Aucun titre similaire trouvé.")
                     elif content_type == "Films":
-                        results = films_recommandations(selected_title)
+                        results = films_similaires(selected_title)
                         if results:
                             st.success(f"Titres similaires à '{selected_title}' (via modules)")
                             for i, item in enumerate(results, 1):
@@ -195,7 +274,7 @@ elif search_method == "Par titre similaire":
                         else:
                             st.warning("Aucun titre similaire trouvé.")
                     else:  # Musiques
-                        results = musiques_recommandations(selected_title)
+                        results = musiques_similaires(selected_title)
                         if results:
                             st.success(f"Titres similaires à '{selected_title}' (via modules)")
                             for i, item in enumerate(results, 1):
@@ -216,29 +295,59 @@ elif search_method == "Par titre similaire":
 elif search_method == "Par recommandation personnalisée":
     st.write("Entrez vos préférences pour obtenir des recommandations personnalisées")
     
-    # Champs de préférences selon le type de contenu
+    # Champs de préférences selon le type de contenu (genres les plus fréquents du catalogue, identifiants TMDB décodés)
+    if MODULES_LOADED:
+        genres_proposes = recommandation.donnees[content_type.lower()].facettes.genres_frequents(30)
     if content_type == "Livres":
-        genre = st.multiselect("Genres préférés", ["Roman", "Science-fiction", "Fantastique", "Policier", "Biographie", "Histoire"])
-        auteur = st.text_input("Auteurs préférés (séparés par des virgules)")
+        if not MODULES_LOADED:
+            genres_proposes = ["Roman", "Science-fiction", "Fantastique", "Policier", "Biographie", "Histoire"]
+        genre = st.multiselect("Genres préférés", genres_proposes)
+        personnes = st.text_input("Auteurs préférés (séparés par des virgules)")
     elif content_type == "Films":
-        genre = st.multiselect("Genres préférés", ["Action", "Comédie", "Drame", "Science-fiction", "Horreur", "Documentaire"])
-        realisateur = st.text_input("Réalisateurs préférés (séparés par des virgules)")
+        if not MODULES_LOADED:
+            genres_proposes = ["Action", "Comédie", "Drame", "Science-fiction", "Horreur", "Documentaire"]
+        genre = st.multiselect("Genres préférés", genres_proposes)
+        personnes = st.text_input("Réalisateurs préférés (séparés par des virgules)")
     else:  # Musiques
-        genre = st.multiselect("Genres préférés", ["Pop", "Rock", "Hip-hop", "Jazz", "Classique", "Électronique"])
-        artiste = st.text_input("Artistes préférés (séparés par des virgules)")
+        if not MODULES_LOADED:
+            genres_proposes = ["Pop", "Rock", "Hip-hop", "Jazz", "Classique", "Électronique"]
+        genre = st.multiselect("Genres préférés", genres_proposes)
+        personnes = st.text_input("Artistes préférés (séparés par des virgules)")
+    annee_min, annee_max = st.slider("Période préférée", 1900, 2030, (1900, 2030))
     
     if st.button("Obtenir des recommandations"):
         st.info("Génération de recommandations personnalisées...")
-        # Simulation de recommandations personnalisées
-        # Dans une implémentation réelle, vous appelleriez votre API ici
+        noms = [nom.strip() for nom in personnes.split(",") if nom.strip()]
+        # Période entière : pas de préférence d'années
+        periode = (None, None) if (annee_min, annee_max) == (1900, 2030) else (annee_min, annee_max)
         try:
-            # Exemple simple (à remplacer par appel API)
-            st.success("Recommandations personnalisées")
-            # Affichage de 5 titres aléatoires comme exemple
-            if not df.empty:
-                title_column = "titre" if "titre" in df.columns else "title" if "title" in df.columns else df.columns[0]
-                recommendations = df.sample(min(5, len(df)))
-                st.dataframe(recommendations[[title_column] + [col for col in recommendations.columns if col != title_column][:3]])
+            recommendations = None
+            # Essayer d'utiliser l'API d'abord si elle est disponible
+            if api_disponible():
+                params = {"categorie": content_type.lower(), "genres": genre, "personnes": noms, "k": 5}
+                if periode[0] is not None:
+                    params.update(annee_min=periode[0], annee_max=periode[1])
+                response = requests.get(f"{API_URL}/personnalise/", params=params)
+                if response.status_code == 200:
+                    recommendations = pd.DataFrame(response.json())
+                else:
+                    st.error(f"Erreur lors de l'appel à l'API: {response.status_code}")
+            if recommendations is None and MODULES_LOADED:
+                recommendations = pd.DataFrame(recommandation.recommandations_personnalisees(content_type.lower(), tuple(genre), tuple(noms), *periode, k=5))
+
+            if recommendations is None:
+                # Fallback si ni l'API ni les modules ne sont disponibles : 5 titres aléatoires comme exemple
+                st.success("Recommandations personnalisées (simulation)")
+                df = donnees_contenu(content_type)
+                if not df.empty:
+                    title_column = "titre" if "titre" in df.columns else "title" if "title" in df.columns else df.columns[0]
+                    recommendations = df.sample(min(5, len(df)))
+                    st.dataframe(recommendations[[title_column] + [col for col in recommendations.columns if col != title_column][:3]])
+            elif not recommendations.empty:
+                st.success("Recommandations personnalisées")
+                st.dataframe(recommendations[["titre"] + [col for col in recommendations.columns if col != "titre"][:3] + ["score"]])
+            else:
+                st.warning("Aucune recommandation ne correspond à ces préférences.")
         except Exception as e:
             st.error(f"Erreur lors de la génération des recommandations: {e}")
 
@@ -291,14 +400,14 @@ if user_input:
             
             # Essayer d'utiliser l'API d'abord si elle est disponible
             results = []
-            if API_AVAILABLE and search_term:
+            if api_disponible() and search_term:
                 endpoint = ""
                 if content_type == "Livres":
-                    endpoint = f"{API_URL}/livres/?titre={search_term}"
+                    endpoint = f"{API_URL}/livres/?titre={search_term}&limit=5&fields=item_id,titre"
                 elif content_type == "Films":
-                    endpoint = f"{API_URL}/films/?titre={search_term}"
+                    endpoint = f"{API_URL}/films/?titre={search_term}&limit=5&fields=item_id,titre"
                 else:  # Musiques
-                    endpoint = f"{API_URL}/musiques/?titre={search_term}"
+                    endpoint = f"{API_URL}/musiques/?titre={search_term}&limit=5&fields=item_id,titre"
                 
                 try:
                     response = requests.get(endpoint)
@@ -331,6 +440,24 @@ if user_input:
             if results:
                 for i, item in enumerate(results[:5], 1):
                     full_response += f"{i}. {item['titre']}\n"
+
+                # Recommandations dans les autres catégories pour le premier résultat
+                croisees = []
+                categorie = content_type.lower()
+                # Identifiant renvoyé par l'API avec les résultats (absent des résultats des modules locaux)
+                if "item_id" in results[0] and api_disponible():
+                    try:
+                        response = requests.get(f"{API_URL}/{categorie}/{results[0]['item_id']}/croises", params={"k": 3})
+                        if response.status_code == 200:
+                            croisees = response.json()
+                    except:
+                        pass
+                if not croisees and MODULES_LOADED:
+                    croisees = recommandation.recommandations_croisees(categorie, results[0]["titre"], 3) or []
+                if croisees:
+                    full_response += f"\nSi vous aimez « {results[0]['titre']} », vous aimerez peut-être aussi :\n"
+                    for item in croisees:
+                        full_response += f"- {item['titre']} ({item['categorie']})\n"
             else:
                 full_response += "Désolé, je n'ai pas trouvé de recommandations correspondant à votre demande. Pourriez-vous préciser davantage ?"
  
@@ -1,18 +1,63 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, HTTPException, Depends, Response, Body
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
+from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import threading
 import os
 import sys
 
 # Ajout du chemin pour accéder aux modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from modules.data_cleaning import load_clean_and_save_data
-from modules.config import import_data
+from modules.index_titres import filtrer_par_titre, filtrer_par_titres, rechercher_titres_approches, CARACTERES_REGEX
+from modules.similarite import elements_similaires, K_VOISINS
+from modules.personnalisation import recommander
+from modules.semantique import elements_semantiques
+from modules.croisement import K_CROISES
+from modules.recherche import plier_texte, rechercher_mots_cles
+from modules.cache_requetes import cle_requete
+from modules.pool_recherches import PoolRecherches, Surcharge
+from modules import metriques
+from modules.metriques import MiddlewareMetriques, etape, compter
+# Données et index partagés avec le module de recommandation (instantané rechargeable)
+from modules import recommandation
+from modules.recommandation import cache_recherches, SurveillantDonnees
+
+# Pagination : taille de page par défaut et plafond imposé par le serveur
+LIMITE_DEFAUT = 20
+LIMITE_MAX = 200
+# Nombre maximal de recherches dans un appel à /batch
+MAX_LOT = 1000
+# Champ calculé : identifiant d'un résultat (sa position dans le catalogue, celle attendue par /{item_id}/similaires)
+CHAMP_ID = "item_id"
+
+# Chargement des données au démarrage, en arrière-plan : l'API répond pendant ce temps (/health),
+# les recherches attendent la fin du chargement (PRECHARGEMENT=0 : chargement à la première recherche)
+PRECHARGEMENT = os.environ.get("PRECHARGEMENT", "1") != "0"
+
+# Rechargement automatique des données nettoyées (désactivable avec RECHARGEMENT_AUTO=0)
+surveillant = SurveillantDonnees()
+# Recherches exécutées hors de la boucle d'événements, dans un pool borné
+pool_recherches = PoolRecherches()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if PRECHARGEMENT:
+        threading.Thread(target=recommandation.donnees_actives, name="prechargement-donnees", daemon=True).start()
+    if os.environ.get("RECHARGEMENT_AUTO", "1") != "0":
+        surveillant.demarrer()
+    yield
+    surveillant.arreter()
+    pool_recherches.fermer()
+
 
 app = FastAPI(
     title="Chatbot Culture & Loisirs API",
     version="1.0.0",
-    description="APIs gestion de recommandations de films, musiques et livres."
+    description="APIs gestion de recommandations de films, musiques et livres.",
+    lifespan=lifespan
 )
 
 # Autoriser la communication avec ton interface web
@@ -24,61 +69,487 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Durée, taille et étapes de chaque requête par route, exposées sur /metrics (METRIQUES=0 pour désactiver)
+if metriques.ACTIVES:
+    app.add_middleware(MiddlewareMetriques)
 
-# Définir les chemins des fichiers de données nettoyées
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-films_path = os.path.join(BASE_DIR, "data/data_cleaned/films.csv")
-livres_path = os.path.join(BASE_DIR, "data/data_cleaned/livres.csv")
-musiques_path = os.path.join(BASE_DIR, "data/data_cleaned/musiques.csv")
 
+@app.get("/", tags=["Recommandations"])
+async def home():
+    return {"message": "Bienvenue sur l'API Chatbot Culture & Loisirs."}
 
-# Vérifier si les fichiers existent, sinon les générer
-if not (os.path.exists(films_path) and os.path.exists(livres_path) and os.path.exists(musiques_path)):
-    print("Fichiers manquants : nettoyage et génération en cours...")
-    load_clean_and_save_data()
-else:
-    print("Fichiers déjà présents, chargement direct.")
 
-# Charger les données
-films_df = import_data(films_path)
-livres_df = import_data(livres_path)
-musiques_df = import_data(musiques_path)
+# État de l'API, sans toucher aux données (réponse immédiate, même pendant leur chargement)
+@app.get("/health", tags=["Administration"])
+async def health():
+    return {"statut": "ok", "donnees": "chargees" if recommandation.donnees_chargees() else "en_chargement"}
 
 
-@app.get("/", tags=["Recommandations"])
-async def home():
-    return {"message": "Bienvenue sur l'API Chatbot Culture & Loisirs."}
+class Pagination:
+    """
+    Paramètres communs de pagination et de projection des résultats.
+    """
 
+    def __init__(
+        self,
+        limit: int = Query(LIMITE_DEFAUT, ge=1, le=LIMITE_MAX, description=f"Nombre de résultats par page (au plus {LIMITE_MAX})"),
+        offset: int = Query(0, ge=0, description="Position du premier résultat"),
+        fields: str = Query(None, description=f"Colonnes à renvoyer, séparées par des virgules (ex : titre,source ; {CHAMP_ID} : identifiant du résultat)")
+    ):
+        self.limit = limit
+        self.offset = offset
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
 
-# Rechercher un film
-@app.get("/films/", tags=["Recommandations"])
-async def get_films(titre: str = Query(None, description="Titre du film à rechercher")):
-    if titre:
+
+def reponse_json(df, catalogue):
+    """
+    Réponse JSON construite directement à partir des fragments précalculés du catalogue.
+    """
+    compter("lignes_renvoyees", len(df))
+    with etape("serialisation"):
+        return Response(content=catalogue.fragments.encoder(df), media_type="application/json")
+
+
+def paginer(df, pagination, catalogue):
+    """
+    Sérialise uniquement la page demandée (et les colonnes demandées) de df.
+    Renvoie le JSON de la page et le nombre total de résultats.
+    """
+    if pagination.fields:
+        inconnues = [f for f in pagination.fields if f not in df.columns and f != CHAMP_ID]
+        if inconnues:
+            raise HTTPException(status_code=400, detail=f"Champs inconnus : {', '.join(inconnues)}")
+
+    with etape("serialisation"):
+        page = df.iloc[pagination.offset:pagination.offset + pagination.limit]
+        if pagination.fields:
+            if CHAMP_ID in pagination.fields and CHAMP_ID not in page.columns:
+                page = page.assign(**{CHAMP_ID: catalogue.df.index.get_indexer(page.index)})
+            page = page[pagination.fields]
+        return catalogue.fragments.encoder(page), len(df)
+
+
+class Filtres:
+    """
+    Filtres des recherches par titre (genres, langues, période) et demande des facettes.
+    """
+
+    def __init__(
+        self,
+        genre: list[str] = Query([], description="Genres, au moins un (répétable : genre=Action&genre=Drame ; identifiants TMDB acceptés)"),
+        langue: list[str] = Query([], description="Langues, au moins une (répétable : langue=français&langue=anglais)"),
+        annee_min: int = Query(None, description="Année minimale"),
+        annee_max: int = Query(None, description="Année maximale"),
+        facettes: bool = Query(False, description="Renvoyer {total, resultats, facettes} : nombre de résultats par genre, langue et décennie")
+    ):
+        self.genres = genre
+        self.langues = langue
+        self.annee_min = annee_min
+        self.annee_max = annee_max
+        self.facettes = facettes
+
+    @property
+    def actifs(self):
+        return bool(self.genres or self.langues or self.annee_min is not None or self.annee_max is not None or self.facettes)
+
+    def cle(self):
+        return (
+            tuple(sorted({plier_texte(g).strip() for g in self.genres})), tuple(sorted({plier_texte(l).strip() for l in self.langues})),
+            self.annee_min, self.annee_max, self.facettes,
+        )
+
+
+def repondre(cle, recherche, pagination, catalogue, facettes=False):
+    """
+    Réponse paginée, mise en cache par (requête, pagination) : recherche() n'est appelée qu'en cas d'échec.
+    Le nombre total de résultats est renvoyé dans l'en-tête X-Total-Count.
+    Avec facettes, recherche() renvoie (df, facettes) et la réponse est {"total", "resultats", "facettes"}.
+    """
+    cle = cle + (pagination.limit, pagination.offset, tuple(pagination.fields or ()))
+
+    def page():
+        with etape("recherche"):
+            resultat = recherche()
+        if not facettes:
+            return paginer(resultat, pagination, catalogue)
+        df, comptes = resultat
+        corps, total = paginer(df, pagination, catalogue)
+        with etape("serialisation"):
+            facettes_json = json.dumps(comptes, ensure_ascii=False).encode("utf-8")
+            return f'{{"total":{total},"resultats":'.encode() + corps + b',"facettes":' + facettes_json + b"}", total
+
+    corps, total = cache_recherches.obtenir(cle, page)
+    compter("lignes_renvoyees", lignes_page(total, pagination))
+    return Response(content=corps, media_type="application/json", headers={"X-Total-Count": str(total)})
+
+
+def lignes_page(total, pagination):
+    return max(0, min(pagination.limit, total - pagination.offset))
+
+
+def rechercher_titre(catalogue, titre, approche, k, filtres=None):
+    if filtres is not None and filtres.actifs:
+        return rechercher_titre_filtre(catalogue, titre, approche, k, filtres)
+    if titre and approche:
+        # Les k titres les plus proches, avec leur score
+        return rechercher_titres_approches(catalogue.df, catalogue.index, titre, k)
+    elif titre:
         # Filtrer par titre
-        results = films_df[films_df['titre'].str.contains(titre, case=False, na=False)]
-        return results.to_dict(orient='records')
+        return filtrer_par_titre(catalogue.df, catalogue.index, titre)
     else:
         # Retourner un échantillon aléatoire
-        return films_df.sample(min(5, len(films_df))).to_dict(orient='records')
+        return catalogue.df.sample(min(5, len(catalogue.df)))
+
+
+def rechercher_titre_filtre(catalogue, titre, approche, k, filtres):
+    """
+    Résultats de la recherche par titre (sans titre : tout le catalogue, dans son ordre) qui passent les filtres,
+    et facettes si elles sont demandées.
+    """
+    lignes = None
+    if titre:
+        resultats = rechercher_titre(catalogue, titre, approche, k)
+        lignes = catalogue.df.index.get_indexer(resultats.index)
+    with etape("filtres"):
+        garder, comptes = catalogue.facettes.filtrer(
+            filtres.genres, filtres.langues, filtres.annee_min, filtres.annee_max, lignes, filtres.facettes
+        )
+    df = resultats[garder] if titre else catalogue.df[garder]
+    return (df, comptes) if filtres.facettes else df
+
+
+async def hors_boucle(fonction, *args):
+    """
+    Exécute fonction(*args) dans le pool de recherche : 503 si le serveur est surchargé, 504 si trop longue.
+    """
+    try:
+        return await pool_recherches.executer(fonction, *args)
+    except Surcharge:
+        raise HTTPException(status_code=503, detail="Serveur surchargé, réessayez plus tard", headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Recherche trop longue (plus de {pool_recherches.delai:g} s)")
+
+
+def recherche_par_titre(categorie, titre, approche, k, filtres, pagination):
+    # Un seul instantané des données pour toute la requête, même si un rechargement a lieu entre-temps
+    donnees = recommandation.donnees
+    catalogue = donnees[categorie]
+    cle = (donnees.version, categorie, cle_requete(titre), approche, k if approche else None)
+    # Sans filtre, même clé que les recherches de /batch (résultats partagés)
+    if filtres.actifs:
+        cle = cle + (filtres.cle(),)
+    return repondre(cle, lambda: rechercher_titre(catalogue, titre, approche, k, filtres), pagination, catalogue, filtres.facettes)
+
+
+# Rechercher un film
+@app.get("/films/", tags=["Recommandations"])
+async def get_films(
+    titre: str = Query(None, description="Titre du film à rechercher"),
+    approche: bool = Query(False, description="Recherche tolérante aux fautes de frappe, classée par score"),
+    k: int = Query(10, ge=1, le=100, description="Nombre de résultats de la recherche approchée"),
+    filtres: Filtres = Depends(),
+    pagination: Pagination = Depends()
+):
+    return await hors_boucle(recherche_par_titre, "films", titre, approche, k, filtres, pagination)
 
 # Rechercher un livre
 @app.get("/livres/", tags=["Recommandations"])
-async def get_livres(titre: str = Query(None, description="Titre du livre à rechercher")):
-    if titre:
-        # Filtrer par titre
-        results = livres_df[livres_df['titre'].str.contains(titre, case=False, na=False)]
-        return results.to_dict(orient='records')
-    else:
-        # Retourner un échantillon aléatoire
-        return livres_df.sample(min(5, len(livres_df))).to_dict(orient='records')
+async def get_livres(
+    titre: str = Query(None, description="Titre du livre à rechercher"),
+    approche: bool = Query(False, description="Recherche tolérante aux fautes de frappe, classée par score"),
+    k: int = Query(10, ge=1, le=100, description="Nombre de résultats de la recherche approchée"),
+    filtres: Filtres = Depends(),
+    pagination: Pagination = Depends()
+):
+    return await hors_boucle(recherche_par_titre, "livres", titre, approche, k, filtres, pagination)
 
 # Rechercher une musique
 @app.get("/musiques/", tags=["Recommandations"])
-async def get_musiques(titre: str = Query(None, description="Titre de la musique à rechercher")):
-    if titre:
-        # Filtrer par titre
-        results = musiques_df[musiques_df['titre'].str.contains(titre, case=False, na=False)]
-        return results.to_dict(orient='records')
-    else:
-        # Retourner un échantillon aléatoire
-        return musiques_df.sample(min(5, len(musiques_df))).to_dict(orient='records')
+async def get_musiques(
+    titre: str = Query(None, description="Titre de la musique à rechercher"),
+    approche: bool = Query(False, description="Recherche tolérante aux fautes de frappe, classée par score"),
+    k: int = Query(10, ge=1, le=100, description="Nombre de résultats de la recherche approchée"),
+    filtres: Filtres = Depends(),
+    pagination: Pagination = Depends()
+):
+    return await hors_boucle(recherche_par_titre, "musiques", titre, approche, k, filtres, pagination)
+
+
+# Recherche par mots-clés dans toutes les colonnes d'une catégorie
+@app.get("/search/", tags=["Recommandations"])
+async def search(
+    q: str = Query(..., description="Mots-clés séparés par des espaces"),
+    categorie: str = Query("films", pattern="^(films|livres|musiques)$", description="films, livres ou musiques"),
+    mode: str = Query("ou", pattern="^(ou|et)$", description="ou : au moins un mot-clé, et : tous les mots-clés"),
+    pagination: Pagination = Depends()
+):
+    return await hors_boucle(recherche_par_mots_cles, categorie, q, mode, pagination)
+
+
+def recherche_par_mots_cles(categorie, q, mode, pagination):
+    donnees = recommandation.donnees
+    catalogue = donnees[categorie]
+    cle = (donnees.version, "search", categorie, mode, tuple(plier_texte(mot) for mot in q.split()))
+    return repondre(cle, lambda: rechercher_mots_cles(catalogue.df, catalogue.recherche, q, mode), pagination, catalogue)
+
+
+class RequeteLot(BaseModel):
+    categorie: str = Field(pattern="^(films|livres|musiques)$", description="films, livres ou musiques")
+    titre: str = Field(min_length=1, description="Titre à rechercher")
+    approche: bool = Field(False, description="Recherche tolérante aux fautes de frappe, classée par score")
+    k: int = Field(10, ge=1, le=100, description="Nombre de résultats de la recherche approchée")
+
+
+# Plusieurs recherches par titre en un seul appel
+@app.post("/batch", tags=["Recommandations"])
+async def batch(
+    requetes: list[RequeteLot] = Body(..., max_length=MAX_LOT, description=f"Recherches (au plus {MAX_LOT})"),
+    pagination: Pagination = Depends()
+):
+    return await hors_boucle(recherche_par_lot, requetes, pagination)
+
+
+def recherche_par_lot(requetes, pagination):
+    """
+    Résultats de chaque recherche, dans l'ordre des requêtes et repris avec elles, identiques à ceux des GET
+    /films/, /livres/ et /musiques/ (pagination et fields compris). Les recherches exactes d'une catégorie
+    sont faites ensemble (cf. filtrer_par_titres) et les résultats sont partagés avec le cache des GET.
+    """
+    donnees = recommandation.donnees
+    suffixe = (pagination.limit, pagination.offset, tuple(pagination.fields or ()))
+    cles = [
+        (donnees.version, r.categorie, cle_requete(r.titre), r.approche, r.k if r.approche else None) + suffixe
+        for r in requetes
+    ]
+
+    # Résultats déjà en cache, recherches restantes (sans doublons) regroupées par catégorie
+    pages, a_calculer = {}, {}
+    for cle, requete in zip(cles, requetes):
+        if cle in pages or cle in a_calculer.get(requete.categorie, {}):
+            continue
+        page = cache_recherches.lire(cle)
+        if page is not None:
+            pages[cle] = page
+        else:
+            a_calculer.setdefault(requete.categorie, {})[cle] = requete
+
+    for categorie, restantes in a_calculer.items():
+        catalogue = donnees[categorie]
+        # Les titres contenant des caractères regex sont recherchés un par un (une regex invalide n'échoue que pour eux)
+        groupees = [cle for cle, r in restantes.items() if not r.approche and not any(c in CARACTERES_REGEX for c in r.titre)]
+        with etape("recherche"):
+            resultats = dict(zip(groupees, filtrer_par_titres(catalogue.df, catalogue.index, [restantes[cle].titre for cle in groupees])))
+
+        for cle, requete in restantes.items():
+            try:
+                with etape("recherche"):
+                    if cle in resultats:
+                        df = resultats[cle]
+                    elif requete.approche:
+                        df = rechercher_titres_approches(catalogue.df, catalogue.index, requete.titre, requete.k)
+                    else:
+                        df = filtrer_par_titre(catalogue.df, catalogue.index, requete.titre)
+                pages[cle] = paginer(df, pagination, catalogue)
+                cache_recherches.ecrire(cle, pages[cle])
+            except HTTPException:
+                raise
+            except Exception as e:
+                pages[cle] = e
+
+    morceaux = []
+    with etape("serialisation"):
+        for cle, requete in zip(cles, requetes):
+            entete = json.dumps(requete.model_dump(), ensure_ascii=False)[:-1].encode("utf-8")
+            page = pages[cle]
+            if isinstance(page, Exception):
+                morceaux.append(entete + b',"erreur":' + json.dumps(str(page), ensure_ascii=False).encode("utf-8") + b"}")
+            else:
+                corps, total = page
+                compter("lignes_renvoyees", lignes_page(total, pagination))
+                morceaux.append(entete + f',"total":{total},"resultats":'.encode() + corps + b"}")
+    return Response(content=b"[" + b",".join(morceaux) + b"]", media_type="application/json")
+
+
+# Éléments similaires (TF-IDF) à un élément identifié par sa position dans le catalogue
+def similaires(categorie, item_id, k):
+    catalogue = recommandation.donnees[categorie]
+    if not 0 <= item_id < len(catalogue.df):
+        raise HTTPException(status_code=404, detail=f"Élément {item_id} introuvable")
+    with etape("recherche"):
+        df = elements_similaires(catalogue.df, catalogue.similarite, item_id, k)
+    return reponse_json(df, catalogue)
+
+
+@app.get("/films/{item_id}/similaires", tags=["Recommandations"])
+async def get_films_similaires(item_id: int, k: int = Query(10, ge=1, le=K_VOISINS, description="Nombre de films similaires")):
+    return await hors_boucle(similaires, "films", item_id, k)
+
+
+@app.get("/livres/{item_id}/similaires", tags=["Recommandations"])
+async def get_livres_similaires(item_id: int, k: int = Query(10, ge=1, le=K_VOISINS, description="Nombre de livres similaires")):
+    return await hors_boucle(similaires, "livres", item_id, k)
+
+
+@app.get("/musiques/{item_id}/similaires", tags=["Recommandations"])
+async def get_musiques_similaires(item_id: int, k: int = Query(10, ge=1, le=K_VOISINS, description="Nombre de musiques similaires")):
+    return await hors_boucle(similaires, "musiques", item_id, k)
+
+
+# Éléments à la description proche (vecteurs, index approché ou recherche exacte) d'un élément du catalogue
+def semantiques(categorie, item_id, k, exact):
+    catalogue = recommandation.donnees[categorie]
+    if not 0 <= item_id < len(catalogue.df):
+        raise HTTPException(status_code=404, detail=f"Élément {item_id} introuvable")
+    with etape("recherche"):
+        df = elements_semantiques(catalogue.df, catalogue.semantique, item_id, k, exact)
+    return reponse_json(df, catalogue)
+
+
+@app.get("/films/{item_id}/semantiques", tags=["Recommandations"])
+async def get_films_semantiques(
+    item_id: int,
+    k: int = Query(10, ge=1, le=100, description="Nombre de films proches"),
+    exact: bool = Query(False, description="Recherche exhaustive au lieu de l'index approché")
+):
+    return await hors_boucle(semantiques, "films", item_id, k, exact)
+
+
+@app.get("/livres/{item_id}/semantiques", tags=["Recommandations"])
+async def get_livres_semantiques(
+    item_id: int,
+    k: int = Query(10, ge=1, le=100, description="Nombre de livres proches"),
+    exact: bool = Query(False, description="Recherche exhaustive au lieu de l'index approché")
+):
+    return await hors_boucle(semantiques, "livres", item_id, k, exact)
+
+
+@app.get("/musiques/{item_id}/semantiques", tags=["Recommandations"])
+async def get_musiques_semantiques(
+    item_id: int,
+    k: int = Query(10, ge=1, le=100, description="Nombre de musiques proches"),
+    exact: bool = Query(False, description="Recherche exhaustive au lieu de l'index approché")
+):
+    return await hors_boucle(semantiques, "musiques", item_id, k, exact)
+
+
+# Recommandations dans les autres catégories pour un élément d'une catégorie (candidats précalculés)
+def croisees(categorie, item_id, k, cibles):
+    donnees = recommandation.donnees
+    if not 0 <= item_id < len(donnees[categorie].df):
+        raise HTTPException(status_code=404, detail=f"Élément {item_id} introuvable")
+    with etape("recherche"):
+        resultats = donnees.croisements.recommander(categorie, item_id, k, cibles)
+    compter("lignes_renvoyees", len(resultats))
+    # Un objet JSON par résultat (les colonnes diffèrent d'une catégorie à l'autre) : lignes précalculées
+    # de chaque catégorie, complétées de la catégorie et du score
+    with etape("serialisation"):
+        lignes = {}
+        for cible in {cible for cible, _, _ in resultats}:
+            positions = [position for c, position, _ in resultats if c == cible]
+            lignes.update(zip(((cible, p) for p in positions), donnees[cible].fragments.objets(positions)))
+        morceaux = [
+            f'{{"categorie":{json.dumps(cible)},{lignes[cible, position][1:-1]},"score":{round(score, 4)}}}'.encode("utf-8")
+            for cible, position, score in resultats
+        ]
+    return Response(content=b"[" + b",".join(morceaux) + b"]", media_type="application/json")
+
+
+@app.get("/films/{item_id}/croises", tags=["Recommandations"])
+async def get_films_croises(
+    item_id: int,
+    k: int = Query(10, ge=1, le=K_CROISES, description="Nombre de livres et musiques recommandés"),
+    categories: list[str] = Query(None, description="Catégories recommandées (paramètre répétable), par défaut les deux autres")
+):
+    return await hors_boucle(croisees, "films", item_id, k, categories)
+
+
+@app.get("/livres/{item_id}/croises", tags=["Recommandations"])
+async def get_livres_croises(
+    item_id: int,
+    k: int = Query(10, ge=1, le=K_CROISES, description="Nombre de films et musiques recommandés"),
+    categories: list[str] = Query(None, description="Catégories recommandées (paramètre répétable), par défaut les deux autres")
+):
+    return await hors_boucle(croisees, "livres", item_id, k, categories)
+
+
+@app.get("/musiques/{item_id}/croises", tags=["Recommandations"])
+async def get_musiques_croises(
+    item_id: int,
+    k: int = Query(10, ge=1, le=K_CROISES, description="Nombre de films et livres recommandés"),
+    categories: list[str] = Query(None, description="Catégories recommandées (paramètre répétable), par défaut les deux autres")
+):
+    return await hors_boucle(croisees, "musiques", item_id, k, categories)
+
+
+# Recommandations personnalisées : tout le catalogue classé selon les préférences, k meilleurs éléments
+def personnalisees(categorie, genres, personnes, annee_min, annee_max, k):
+    catalogue = recommandation.donnees[categorie]
+    with etape("recherche"):
+        df = recommander(catalogue.df, catalogue.personnalisation, genres, personnes, annee_min, annee_max, k)
+    return reponse_json(df, catalogue)
+
+
+@app.get("/personnalise/", tags=["Recommandations"])
+async def get_personnalise(
+    categorie: str = Query("films", pattern="^(films|livres|musiques)$", description="films, livres ou musiques"),
+    genres: list[str] = Query([], description="Genres préférés (paramètre répétable : genres=pop&genres=rock)"),
+    personnes: list[str] = Query([], description="Auteurs, réalisateurs ou artistes préférés (paramètre répétable)"),
+    annee_min: int = Query(None, description="Début de la période préférée"),
+    annee_max: int = Query(None, description="Fin de la période préférée"),
+    k: int = Query(10, ge=1, le=100, description="Nombre de recommandations")
+):
+    return await hors_boucle(personnalisees, categorie, genres, personnes, annee_min, annee_max, k)
+
+
+# Compteurs du cache des recherches
+@app.get("/cache/stats", tags=["Administration"])
+async def cache_stats():
+    return cache_recherches.statistiques()
+
+
+# Métriques au format texte de Prometheus : requêtes par route, étapes du nettoyage, cache et pool de recherche.
+# Chaque worker (uvicorn --workers) a ses propres métriques.
+@app.get("/metrics", tags=["Administration"])
+async def metrics():
+    cache = cache_recherches.statistiques()
+    pool = pool_recherches.statistiques()
+    valeurs = [
+        ("cache_recherches_succes_total", "counter", "Lectures du cache des recherches trouvées", cache["succes"]),
+        ("cache_recherches_echecs_total", "counter", "Lectures du cache des recherches manquées", cache["echecs"]),
+        ("cache_recherches_evictions_total", "counter", "Résultats évincés du cache (taille maximale atteinte)", cache["evictions"]),
+        ("cache_recherches_expirations_total", "counter", "Résultats expirés du cache", cache["expirations"]),
+        ("cache_recherches_taille", "gauge", "Résultats en cache", cache["taille"]),
+        ("pool_recherches_en_cours", "gauge", "Recherches en cours ou en attente dans le pool", pool["en_cours"]),
+        ("pool_recherches_terminees_total", "counter", "Recherches terminées", pool["terminees"]),
+        ("pool_recherches_refusees_total", "counter", "Recherches refusées (503)", pool["refusees"]),
+        ("pool_recherches_expirees_total", "counter", "Recherches abandonnées après le délai (504)", pool["expirees"]),
+        ("donnees_chargees", "gauge", "1 si les données sont chargées", int(recommandation.donnees_chargees())),
+    ]
+    return Response(content=metriques.exposer(valeurs), media_type=metriques.TYPE_CONTENU)
+
+
+# Version des données actives
+def etat_donnees(donnees):
+    return {"version": donnees.version, "charge_le": donnees.charge_le, "lignes": donnees.lignes()}
+
+
+# Occupation du pool de recherche (requêtes en cours, refusées, expirées)
+@app.get("/admin/pool", tags=["Administration"])
+async def get_pool():
+    return pool_recherches.statistiques()
+
+
+# Hors de la boucle d'événements : attend le chargement des données s'il est en cours
+@app.get("/admin/donnees", tags=["Administration"])
+def get_donnees():
+    return etat_donnees(recommandation.donnees)
+
+
+# Rechargement des données nettoyées ; les requêtes en cours continuent sur l'ancien instantané
+@app.post("/admin/recharger", tags=["Administration"])
+def post_recharger(force: bool = Query(False, description="Recharger même si les fichiers nettoyés n'ont pas changé")):
+    try:
+        recharge = recommandation.recharger(force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur de rechargement : {e}")
+    return {"recharge": recharge, **etat_donnees(recommandation.donnees)}
@@ -0,0 +1,64 @@
+import os
+import sys
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.cache_requetes import CacheRequetes
+
+
+def test_memoiser_renvoie_des_copies():
+    cache = CacheRequetes()
+    appels = []
+
+    @cache.memoiser("recherche")
+    def recherche(titre):
+        appels.append(titre)
+        return [{"titre": titre, "score": 1.0}]
+
+    premier = recherche("Dune")
+    premier[0]["titre"] = "modifié"
+    premier.append({"titre": "ajouté"})
+    second = recherche("Dune")
+    second[0]["score"] = 0.0
+
+    assert recherche("Dune") == [{"titre": "Dune", "score": 1.0}]
+    assert appels == ["Dune"]
+
+
+def test_memoiser_resultat_vide_ou_absent():
+    cache = CacheRequetes()
+
+    @cache.memoiser("vide")
+    def vide():
+        return []
+
+    @cache.memoiser("absent")
+    def absent():
+        return None
+
+    assert vide() == [] and vide() == []
+    assert absent() is None
+
+
+def test_premier_resultat_reutilise():
+    # Le premier appel charge les données, ce qui vide le cache et fixe la version
+    donnees = {}
+
+    def version_donnees():
+        if not donnees:
+            donnees["version"] = "v1"
+            cache.invalider("v1")
+        return donnees["version"]
+
+    cache = CacheRequetes(version_donnees=version_donnees)
+    appels = []
+
+    @cache.memoiser("recherche")
+    def recherche(titre):
+        version_donnees()
+        appels.append(titre)
+        return [{"titre": titre}]
+
+    assert recherche("Dune") == recherche("Dune") == [{"titre": "Dune"}]
+    assert appels == ["Dune"]
+    assert cache.statistiques()["succes"] == 1
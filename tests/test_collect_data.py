@@ -0,0 +1,167 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+import pytest
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.collect_data import (Collecteur, ErreurTemporaire, TokenBucket, collecter_en_flux, collectes_terminees,
+                                 lire_checkpoints)
+
+
+class ServeurStub:
+    """
+    Serveur HTTP local : la page n renvoie {"page": n}, après les statuts d'erreur prévus pour elle (ex : [429, 503]).
+    """
+
+    def __init__(self, erreurs=None):
+        self.erreurs = {page: list(statuts) for page, statuts in (erreurs or {}).items()}
+        self.requetes = {}
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                page = int(parse_qs(urlparse(self.path).query)["page"][0])
+                with stub.lock:
+                    stub.requetes[page] = stub.requetes.get(page, 0) + 1
+                    statuts = stub.erreurs.get(page)
+                    statut = statuts.pop(0) if statuts else 200
+                corps = json.dumps({"page": page} if statut == 200 else {}).encode()
+                self.send_response(statut)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corps)))
+                self.end_headers()
+                self.wfile.write(corps)
+
+            def log_message(self, *args):
+                pass
+
+        self.serveur = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.hote = f"127.0.0.1:{self.serveur.server_address[1]}"
+        self.url = f"http://{self.hote}/films"
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+
+    def arreter(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+
+@pytest.fixture
+def stub_erreurs(request):
+    stub = ServeurStub(getattr(request, "param", None))
+    yield stub
+    stub.arreter()
+
+
+def _collecteur(stub, debit=1000, tentatives=4):
+    return Collecteur(limites={stub.hote: (debit, debit)}, tentatives=tentatives)
+
+
+def test_token_bucket_debit():
+    limiteur = TokenBucket(debit=20, capacite=2)
+    debut = time.monotonic()
+    for _ in range(2):
+        limiteur.acquerir()
+    assert time.monotonic() - debut < 0.05
+    for _ in range(4):
+        limiteur.acquerir()
+    # 4 jetons regénérés à 20 par seconde
+    assert time.monotonic() - debut >= 0.19
+
+
+def test_pages_dans_l_ordre(stub_erreurs):
+    collecteur = _collecteur(stub_erreurs)
+    pages = collecteur.pages(stub_erreurs.url, [{"page": p} for p in range(1, 31)])
+    collecteur.fermer()
+    assert pages == [{"page": p} for p in range(1, 31)]
+
+
+def test_debit_limite_par_hote(stub_erreurs):
+    collecteur = _collecteur(stub_erreurs, debit=20)
+    debut = time.monotonic()
+    collecteur.pages(stub_erreurs.url, [{"page": p} for p in range(1, 31)])
+    collecteur.fermer()
+    # 20 jetons au départ, puis 10 requêtes à 20 par seconde
+    assert time.monotonic() - debut >= 0.45
+
+
+@pytest.mark.parametrize("stub_erreurs", [{2: [429, 503]}], indirect=True)
+def test_nouvelle_tentative_sur_429_et_5xx(stub_erreurs):
+    collecteur = _collecteur(stub_erreurs)
+    pages = collecteur.pages(stub_erreurs.url, [{"page": p} for p in range(1, 4)])
+    collecteur.fermer()
+    assert pages == [{"page": 1}, {"page": 2}, {"page": 3}]
+    assert stub_erreurs.requetes == {1: 1, 2: 3, 3: 1}
+
+
+@pytest.mark.parametrize("stub_erreurs", [{2: [500, 500, 502, 502]}], indirect=True)
+def test_tentatives_epuisees(stub_erreurs):
+    collecteur = _collecteur(stub_erreurs, tentatives=2)
+    pages = collecteur.pages(stub_erreurs.url, [{"page": p} for p in range(1, 4)], ignorer_erreurs=True)
+    assert pages[0] == {"page": 1} and pages[2] == {"page": 3}
+    assert isinstance(pages[1], ErreurTemporaire)
+    assert stub_erreurs.requetes[2] == 2
+    with pytest.raises(ErreurTemporaire):
+        collecteur.pages(stub_erreurs.url, [{"page": 2}])
+    collecteur.fermer()
+
+
+@pytest.mark.parametrize("stub_erreurs", [{404: [404]}], indirect=True)
+def test_pas_de_nouvelle_tentative_sur_4xx(stub_erreurs):
+    collecteur = _collecteur(stub_erreurs)
+    pages = collecteur.pages(stub_erreurs.url, [{"page": 404}])
+    collecteur.fermer()
+    assert pages == [{}]
+    assert stub_erreurs.requetes == {404: 1}
+
+
+def _extraire(data, langue):
+    return [{"page": data["page"], "langue": langue}] if data else None
+
+
+@pytest.mark.parametrize("stub_erreurs", [{2: [500, 500], 5: [503, 503]}], indirect=True)
+def test_flux_reprise_des_pages_en_echec(stub_erreurs, tmp_path):
+    fichier = str(tmp_path / "films.csv")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    liste_params = [{"page": p} for p in range(1, 7)]
+    collecteur = _collecteur(stub_erreurs, tentatives=2)
+
+    def collecter():
+        return collecter_en_flux("films", "en-US", fichier, stub_erreurs.url, liste_params, _extraire,
+                                 checkpoint_path=checkpoint, collecteur=collecteur, taille_lot=4,
+                                 ignorer_erreurs=True)
+
+    # Pages 2 et 5 en échec : non marquées comme faites
+    assert collecter() == 4
+    etat = lire_checkpoints(checkpoint)["films"]["langues"]["en-US"]
+    assert etat["echecs"] == [1, 4] and not etat["termine"]
+    assert not collectes_terminees(checkpoint)
+
+    # La reprise ne redemande que les pages en échec
+    assert collecter() == 2
+    assert stub_erreurs.requetes == {1: 1, 2: 3, 3: 1, 4: 1, 5: 3, 6: 1}
+    assert collectes_terminees(checkpoint)
+    assert sorted(pd.read_csv(fichier)["page"]) == list(range(1, 7))
+
+    assert collecter() == 0
+    collecteur.fermer()
+
+
+@pytest.mark.parametrize("stub_erreurs", [{404: [404]}], indirect=True)
+def test_flux_arret_sans_donnees(stub_erreurs, tmp_path):
+    fichier = str(tmp_path / "films.csv")
+    checkpoint = str(tmp_path / "checkpoint.json")
+    # La page 404 renvoie un contenu vide : fin des données
+    liste_params = [{"page": p} for p in [1, 2, 404, 4, 5, 6]]
+    collecteur = _collecteur(stub_erreurs)
+    assert collecter_en_flux("films", "en-US", fichier, stub_erreurs.url, liste_params, _extraire,
+                             checkpoint_path=checkpoint, collecteur=collecteur, taille_lot=2) == 2
+    collecteur.fermer()
+    assert collectes_terminees(checkpoint)
+    assert 5 not in stub_erreurs.requetes
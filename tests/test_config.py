@@ -0,0 +1,42 @@
+import io
+import os
+import sys
+import pandas as pd
+import pytest
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.config import lire_csv
+
+# Jetons qu'Arrow et pd.read_csv ne lisent pas forcément de la même façon
+JETONS = [
+    "5", "+5", "-5", "00012", "-0", "0x1A", "0X1a", "-0x1A", "0b101", "1_000", "1,5", "1 000", "١٢", "²",
+    "1e5", "1E+5", "+1e5", ".5", "5.", "+.5", "1.", "1e", "e5", "1.5.5", "1.5e400",
+    "inf", "-inf", "+inf", "Inf", "iNf", "Infinity", "-Infinity", "nan", "NaN", "nAn", "-nan",
+    "9223372036854775807", "9223372036854775808", "18446744073709551615", "18446744073709551616", "-9223372036854775809",
+    "True", "TRUE", "False", "2024-01-01", "12:30",
+]
+AUTRES = ["7", "7.5", "", "x"]
+
+
+@pytest.mark.parametrize("jeton", JETONS)
+def test_lire_csv_comme_pandas(jeton):
+    for autre in AUTRES:
+        texte = f'a,b\n"{jeton}",1\n{autre},2\n'
+        attendu = pd.read_csv(io.StringIO(texte))
+        lu = lire_csv(io.BytesIO(texte.encode()), "utf-8", ",")
+        pd.testing.assert_frame_equal(lu, attendu)
+
+
+@pytest.mark.parametrize("texte", [
+    # Index écrit par df.to_csv() : en-tête vide
+    ",titre,annee\n0,Dune,1965\n1,Solaris,1961\n",
+    # En-tête seul, sans lignes
+    "titre,annee\n",
+    # Noms de colonnes en double
+    "a,a,b\n1,2,3\n",
+])
+def test_lire_csv_entetes(texte):
+    attendu = pd.read_csv(io.StringIO(texte))
+    lu = lire_csv(io.BytesIO(texte.encode()), "utf-8", ",")
+    pd.testing.assert_frame_equal(lu, attendu)
@@ -0,0 +1,102 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules import croisement
+from modules.croisement import MoteurCroise, profils_croises
+
+FILMS = pd.DataFrame({
+    "titre": ["Dune", "Le Parrain", "Orgueil et Préjugés", "Interstellar"],
+    "genre": ["878, 12", "80, 18", "10749, 18", "878, 18"],
+    "langue": ["en", "en", "en", "en"],
+    "annee": [2021.0, 1972.0, 2005.0, 2014.0],
+    "description": [
+        "Paul Atreides part sur Arrakis, planète désertique, pour protéger l'épice",
+        "La famille mafieuse Corleone à New York, le parrain et ses fils",
+        "Elizabeth Bennet et monsieur Darcy, amour et préjugés dans l'Angleterre rurale",
+        "Des astronautes traversent un trou de ver à la recherche d'une planète habitable",
+    ],
+})
+LIVRES = pd.DataFrame({
+    "titre": ["Dune", "Le Parrain", "Orgueil et préjugés", "Fondation"],
+    "genre": ["Science Fiction", "Crime", "Romance", "Science Fiction"],
+    "langue": ["anglais", "anglais", "anglais", "français"],
+    "annee": [1965.0, 1969.0, 1813.0, 1951.0],
+    "description": [
+        "Sur la planète désertique Arrakis, Paul Atreides et l'épice",
+        "Le roman de la famille mafieuse Corleone",
+        "Elizabeth Bennet rencontre monsieur Darcy",
+        "Hari Seldon prévoit la chute de l'Empire galactique",
+    ],
+    "auteur": ["Frank Herbert", "Mario Puzo", "Jane Austen", "Isaac Asimov"],
+})
+MUSIQUES = pd.DataFrame({
+    "titre": ["Space Oddity", "Speak Softly Love", "Crazy in Love"],
+    "genre": ["Rock", "Soundtrack", "Pop"],
+    "langue": ["anglais", "anglais", "anglais"],
+    "annee": [1969.0, 1972.0, 2003.0],
+    "auteur": ["David Bowie", "Andy Williams", "Beyoncé"],
+})
+ELEMENTS = {
+    "films": (FILMS, ["description"]),
+    "livres": (LIVRES, ["description", "auteur"]),
+    "musiques": (MUSIQUES, ["auteur"]),
+}
+
+
+def test_meilleur_livre_pour_chaque_film():
+    moteur = MoteurCroise(ELEMENTS)
+    for position, titre in [(0, "Dune"), (1, "Le Parrain"), (2, "Orgueil et préjugés")]:
+        categorie, livre, _ = moteur.recommander("films", position, k=1, cibles=["livres"])[0]
+        assert (categorie, LIVRES["titre"][livre]) == ("livres", titre)
+    # Interstellar : pas de livre de même titre, le plus proche partage genre et vocabulaire
+    assert LIVRES["titre"][moteur.recommander("films", 3, k=1, cibles=["livres"])[0][1]] == "Dune"
+
+
+def test_recommander():
+    moteur = MoteurCroise(ELEMENTS)
+    assert sorted(moteur.categories_cibles("films")) == ["livres", "musiques"]
+    for source, (df, _) in ELEMENTS.items():
+        for position in range(len(df)):
+            resultats = moteur.recommander(source, position, k=5)
+            assert 0 < len(resultats) <= 5
+            assert all(categorie != source and score > 0 for categorie, _, score in resultats)
+            scores = [score for _, _, score in resultats]
+            assert scores == sorted(scores, reverse=True)
+            # La catégorie source et les catégories inconnues sont ignorées
+            assert moteur.recommander(source, position, cibles=[source, "jeux"]) == []
+
+
+def test_candidats_comme_produit_complet(monkeypatch):
+    # Blocs de quelques lignes : mêmes candidats qu'un produit dense complet
+    monkeypatch.setattr(croisement, "TAILLE_BLOC_SCORES", 7)
+    moteur = MoteurCroise(ELEMENTS, k=3)
+    profils = {categorie: profils_croises(df, colonnes) for categorie, (df, colonnes) in ELEMENTS.items()}
+    for (source, cible), voisins in moteur.voisins.items():
+        produit = (profils[source] @ profils[cible].T).toarray()
+        k = min(3, produit.shape[1])
+        # Scores décroissants, à égalité par position dans le catalogue cible
+        attendus = np.array([sorted(range(len(ligne)), key=lambda j: (-ligne[j], j))[:k] for ligne in produit])
+        np.testing.assert_array_equal(voisins, attendus)
+        np.testing.assert_allclose(moteur.scores[source, cible], np.take_along_axis(produit, attendus, axis=1), rtol=1e-6)
+
+
+def test_attacher():
+    moteur = MoteurCroise(ELEMENTS)
+    attache = MoteurCroise.attacher(moteur.voisins, moteur.scores)
+    for source, (df, _) in ELEMENTS.items():
+        for position in range(len(df)):
+            assert attache.recommander(source, position) == moteur.recommander(source, position)
+
+
+@pytest.mark.parametrize("colonne", ["genre", "langue", "annee", "description"])
+def test_colonnes_absentes(colonne):
+    # Une catégorie sans l'une des colonnes garde un profil (les autres groupes)
+    df = LIVRES.drop(columns=[colonne])
+    profils = profils_croises(df, ["description", "auteur"])
+    assert profils.shape[0] == len(df)
+    np.testing.assert_allclose(np.asarray(profils.multiply(profils).sum(axis=1)).ravel(), 1, rtol=1e-5)
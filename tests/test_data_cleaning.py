@@ -0,0 +1,120 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules import config, data_cleaning
+
+TITRES = ["Nuit", "Été", "Nuit", "Ombre", "été", "Cœur", "Ombre", "Nuit", "Étoile", "Secret", "Cœur", "Paris"]
+
+
+@pytest.fixture
+def source_musiques(tmp_path, monkeypatch):
+    # Doublons dans un même bloc et d'un bloc à l'autre, valeurs manquantes (texte et nombres)
+    rng = np.random.default_rng(0)
+    n = len(TITRES)
+    df = pd.DataFrame({
+        "titre": TITRES,
+        "artiste": [None if i % 5 == 0 else f"Artiste {i % 3}" for i in range(n)],
+        "album": [None if i % 2 else "Album" for i in range(n)],
+        "langue": rng.choice(["français", "anglais"], n),
+        "genre": rng.choice(["Pop", "Rock"], n),
+        "annee": [np.nan if i % 6 == 1 else 1990 + i for i in range(n)],
+        "source": [f"https://exemple.org/{i}" for i in range(n)],
+    })
+    chemin = tmp_path / "musiques.csv"
+    df.to_csv(chemin, index=False)
+    monkeypatch.setitem(data_cleaning.SOURCES, "musiques", str(chemin))
+    return tmp_path
+
+
+def _nettoyage_complet(dossier):
+    sources = {"musiques": data_cleaning.preparer_source("musiques", config.import_data(data_cleaning.SOURCES["musiques"]))}
+    df, nb_lignes = data_cleaning.nettoyer_categorie("musiques", sources)
+    chemin = dossier / "complet.csv"
+    df.to_csv(chemin, index=False, encoding="utf-8")
+    return chemin.read_text(encoding="utf-8"), nb_lignes
+
+
+@pytest.mark.parametrize("taille_bloc", [1, 3, 100])
+def test_par_blocs_identique(source_musiques, taille_bloc):
+    attendu, nb_attendu = _nettoyage_complet(source_musiques)
+    chemin = source_musiques / "blocs.csv"
+    nb_lignes = data_cleaning.nettoyer_categorie_par_blocs("musiques", str(chemin), taille_bloc)
+    assert chemin.read_text(encoding="utf-8") == attendu
+    assert nb_lignes == nb_attendu == len(set(TITRES))
+
+
+def test_collision_de_hash(source_musiques, monkeypatch):
+    # Tous les titres ont le même hash : seuls les titres égaux sont des doublons
+    attendu, nb_attendu = _nettoyage_complet(source_musiques)
+    monkeypatch.setattr(data_cleaning, "_hash_titres", lambda titres: np.zeros(len(titres), dtype=np.uint64))
+    chemin = source_musiques / "blocs.csv"
+    nb_lignes = data_cleaning.nettoyer_categorie_par_blocs("musiques", str(chemin), 2)
+    assert chemin.read_text(encoding="utf-8") == attendu
+    assert nb_lignes == nb_attendu
+
+
+def _traitement_na_reference(data):
+    # Version ligne à ligne d'origine : concat texte + nombres, puis fillna colonne par colonne
+    df = pd.concat([data.select_dtypes(include="object"), data.select_dtypes(exclude="object")], axis=1)
+    percent_na = (df.isnull().sum() / len(df)) * 100
+    for col in df.columns:
+        if percent_na[col] > 20:
+            df.drop(columns=[col], inplace=True)
+        elif percent_na[col] > 0:
+            if df[col].dtype == "object":
+                df.fillna({col: "Inconnu"}, inplace=True)
+            else:
+                df.fillna({col: df[col].median()}, inplace=True)
+    return df
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_traitement_na_identique(seed):
+    rng = np.random.default_rng(seed)
+    n = 200
+
+    def trous(valeurs, taux):
+        valeurs = np.array(valeurs, dtype=object)
+        valeurs[rng.random(n) < taux] = None
+        return valeurs
+
+    df = pd.DataFrame({
+        "annee": np.where(rng.random(n) < 0.1, np.nan, rng.integers(1950, 2025, n)),
+        "titre": trous([f"Titre {i}" for i in rng.integers(0, 80, n)], 0.05),
+        "langue": trous(rng.choice(["français", "anglais"], n), 0.15),
+        "genre": trous(rng.choice(["Pop", "Rock", "Jazz"], n), 0.3),
+        "note": np.where(rng.random(n) < 0.4, np.nan, rng.random(n)),
+        "auteur": rng.choice(["A", "B"], n).astype(object),
+    })
+    attendu = _traitement_na_reference(df.copy()).drop_duplicates(subset="titre")
+    obtenu = config.drop_doublon(config.traitement_na(config.en_categories(df.copy())))
+    assert obtenu.to_csv(index=False) == attendu.to_csv(index=False)
+
+
+def test_source_livres_comme_fstring():
+    df = pd.DataFrame({
+        "annee": [2001.0, np.nan, 1999.0],
+        "titre": ["Dune", None, 42],
+        "auteur": ["Frank Herbert", "Inconnu", np.nan],
+    })
+    attendu = df.apply(lambda x: f"{x['annee']} - {x['titre']} - {x['auteur']}", axis=1)
+    assert data_cleaning.source_livres(df).tolist() == attendu.tolist()
+
+
+def test_films_comptes_sans_doublons():
+    # Les films sont sauvegardés avec leurs doublons, le nombre compte les titres distincts
+    films = pd.DataFrame({
+        "titre": TITRES,
+        "langue": ["en"] * len(TITRES),
+        "genre": ["28, 80"] * len(TITRES),
+        "annee": [2000.0] * len(TITRES),
+        "source": [f"https://exemple.org/{i}" for i in range(len(TITRES))],
+    })
+    sources = {"films_fr": films.iloc[:5], "films": films.iloc[5:]}
+    df, nb_lignes = data_cleaning.nettoyer_categorie("films", sources)
+    assert len(df) == len(TITRES) and nb_lignes == len(set(TITRES))
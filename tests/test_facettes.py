@@ -0,0 +1,142 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.croisement import LANGUES
+from modules.facettes import DENSITE_BITSET, IndexFacettes
+from modules.genres import libelles_genre
+from modules.personnalisation import VALEURS_VIDES
+from modules.recherche import plier_texte
+
+GENRES = ["28", "28, 80", "80, 53", "Fiction", "fiction", "Policier", "Histoire, Fiction", "Inconnu", "", None]
+# Valeurs rares (moins d'une ligne sur DENSITE_BITSET) : listes de lignes au lieu de bitsets
+GENRES_RARES = ["Poésie", "843.914", "Bande dessinée"]
+LANGUES_CATALOGUE = ["français", "Français", "English", "anglais", "en", "Deutsch", "Inconnu", None]
+VIDES = {plier_texte(valeur) for valeur in VALEURS_VIDES}
+
+
+def _catalogue(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    genres = list(rng.choice(np.array(GENRES, dtype=object), n))
+    for i, genre in zip(rng.choice(n, len(GENRES_RARES), replace=False), GENRES_RARES):
+        genres[i] = genre
+    annees = rng.integers(1950, 2025, n).astype(float)
+    annees[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "genre": genres,
+        "langue": rng.choice(np.array(LANGUES_CATALOGUE, dtype=object), n),
+        "annee": annees,
+    })
+
+
+def _cles_genres(valeur):
+    if not isinstance(valeur, str):
+        return set()
+    return {plier_texte(l).strip() for l in libelles_genre(valeur)} - VIDES
+
+
+def _cle_langue(valeur):
+    if not isinstance(valeur, str):
+        return None
+    cle = plier_texte(valeur).strip()
+    cle = {"fr": "francais", "en": "anglais"}.get(LANGUES.get(cle), cle)
+    return None if cle in VIDES else cle
+
+
+def _reference(df, genres=(), langues=(), annee_min=None, annee_max=None):
+    """
+    Masques de chaque filtre en parcourant les chaînes ligne par ligne.
+    """
+    masques = {}
+    if genres:
+        voulus = {plier_texte(l).strip() for g in genres for l in libelles_genre(g) or [g]}
+        masques["genre"] = np.array([bool(_cles_genres(v) & voulus) for v in df["genre"]])
+    if langues:
+        voulues = {_cle_langue(l) for l in langues}
+        masques["langue"] = np.array([_cle_langue(v) in voulues for v in df["langue"]])
+    if annee_min is not None or annee_max is not None:
+        annees = df["annee"].to_numpy()
+        masques["annee"] = (annees >= (annee_min if annee_min is not None else -np.inf)) & \
+                           (annees <= (annee_max if annee_max is not None else np.inf))
+    return masques
+
+
+def _selection(df, masques, sauf=None):
+    garder = np.ones(len(df), dtype=bool)
+    for nom, masque in masques.items():
+        if nom != sauf:
+            garder &= masque
+    return garder
+
+
+FILTRES = [
+    {},
+    {"genres": ["Action"]},
+    {"genres": ["28"]},
+    {"genres": ["fiction", "Crime"]},
+    {"genres": ["Poésie"]},
+    {"genres": ["843.914", "Thriller"]},
+    {"genres": ["Genre absent"]},
+    {"langues": ["English"]},
+    {"langues": ["francais", "Deutsch"]},
+    {"annee_min": 1990, "annee_max": 1999},
+    {"annee_min": 2020},
+    {"genres": ["Action", "Histoire"], "langues": ["anglais"], "annee_max": 1980},
+]
+
+
+@pytest.mark.parametrize("filtres", FILTRES)
+def test_filtrer_comme_parcours(filtres):
+    df = _catalogue()
+    index = IndexFacettes(df)
+    # Les valeurs rares passent bien par les listes de lignes
+    assert len(index.genre.rares) > 0 and len(index.genre.denses) > 0
+
+    garder, comptes = index.filtrer(**filtres, facettes=True)
+    masques = _reference(df, **filtres)
+    np.testing.assert_array_equal(garder, _selection(df, masques))
+
+    # Chaque facette tient compte des autres filtres, pas du sien
+    lignes = _selection(df, masques, "genre")
+    attendus = pd.Series([c for v in df["genre"][lignes] for c in _cles_genres(v)]).value_counts()
+    assert {plier_texte(l).strip(): c for l, c in comptes["genre"].items()} == attendus.to_dict()
+
+    lignes = _selection(df, masques, "langue")
+    attendus = pd.Series([_cle_langue(v) for v in df["langue"][lignes]]).dropna().value_counts()
+    assert {plier_texte(l).strip(): c for l, c in comptes["langue"].items()} == attendus.to_dict()
+
+    lignes = _selection(df, masques, "annee")
+    attendus = (df["annee"][lignes].dropna() // 10 * 10).astype(int).astype(str).value_counts()
+    assert comptes["annee"] == attendus.to_dict()
+
+
+def test_filtrer_lignes_candidates():
+    df = _catalogue()
+    index = IndexFacettes(df)
+    lignes = np.arange(0, len(df), 7)
+    garder, _ = index.filtrer(genres=["Action"], lignes=lignes)
+    np.testing.assert_array_equal(garder, _reference(df, genres=["Action"])["genre"][lignes])
+
+
+def test_attacher_identique():
+    df = _catalogue()
+    index = IndexFacettes(df)
+    attache = IndexFacettes.attacher(*index.tableaux().values())
+    for filtres in FILTRES:
+        garder, comptes = index.filtrer(**filtres, facettes=True)
+        garder_attache, comptes_attache = attache.filtrer(**filtres, facettes=True)
+        np.testing.assert_array_equal(garder, garder_attache)
+        assert comptes == comptes_attache
+    assert index.genres_frequents() == attache.genres_frequents()
+
+
+def test_densite():
+    df = _catalogue()
+    index = IndexFacettes(df)
+    presences = pd.Series([c for v in df["genre"] for c in _cles_genres(v)]).value_counts()
+    denses = set(index.genre.cles[index.genre.denses])
+    assert denses == set(presences[presences * DENSITE_BITSET >= len(df)].index)
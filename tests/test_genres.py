@@ -0,0 +1,17 @@
+import os
+import sys
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.genres import libelles_genre
+
+
+def test_identifiants_tmdb():
+    assert libelles_genre("28, 80") == ["Action", "Crime"]
+    assert libelles_genre("Hip-hop/Rap") == ["Hip-hop/Rap"]
+    assert libelles_genre("99999") == ["99999"]
+
+
+def test_chiffres_non_decimaux():
+    assert libelles_genre("²") == ["²"]
+    assert libelles_genre("①, 28") == ["①", "Action"]
@@ -0,0 +1,112 @@
+import os
+import random
+import re
+import sys
+import pandas as pd
+import pytest
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.index_titres import (IndexTitres, distance_sous_chaine, filtrer_par_titre, filtrer_par_titres,
+                                  rechercher_titres_approches, _normaliser_caractere)
+
+# Caractères dont la casse ou la décomposition est particulière (re.IGNORECASE vs str.lower)
+ALPHABET = list("aeiksty ") + list("İıIiſSsKKkµμΜΩΩωσςΣßẞéÉèÈœŒǅǄǆﬁÅÅåİstanbul") + ["̇", "é"]
+TITRES_FIXES = ["İSTANBUL Hatırası", "ıstanbul", "Istanbul", "Straße", "STRASSE", "Ωmega", "ΣΟΦΙΑ", "Kelvin", "ﬁlm"]
+
+
+def _corpus(n=400, seed=0):
+    rng = random.Random(seed)
+    titres = TITRES_FIXES + ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 12))) for _ in range(n)]
+    return pd.DataFrame({"titre": titres})
+
+
+def _requetes(df, seed=1):
+    # Sous-chaînes des titres, changées de casse, et quelques requêtes fixes
+    rng = random.Random(seed)
+    requetes = {"ist", "İst", "IST", "stra", "ωme", "σοφ", "kel", "fil"}
+    for titre in df["titre"]:
+        debut = rng.randint(0, max(0, len(titre) - 3))
+        morceau = titre[debut:debut + rng.randint(3, 5)]
+        requetes.update([morceau, morceau.upper(), morceau.lower()])
+    return sorted(r for r in requetes if not any(c in ".^$*+?{}[]\\|()" for c in r))
+
+
+def test_casse_comme_re_ignorecase():
+    # Deux caractères égaux pour re.IGNORECASE ont la même forme normalisée
+    for code in range(sys.maxunicode + 1):
+        if 0xD800 <= code <= 0xDFFF:
+            continue
+        c = chr(code)
+        for autre in {c.lower(), c.upper(), c.swapcase(), c.casefold()}:
+            if len(autre) == 1 and autre != c and re.fullmatch(re.escape(c), autre, re.IGNORECASE):
+                assert _normaliser_caractere(c) == _normaliser_caractere(autre), (c, autre)
+
+
+def test_istanbul():
+    df = _corpus(0)
+    index = IndexTitres(df["titre"])
+    attendu = df[df["titre"].str.contains("ist", case=False, na=False)]
+    assert "İSTANBUL Hatırası" in attendu["titre"].tolist()
+    pd.testing.assert_frame_equal(filtrer_par_titre(df, index, "ist"), attendu)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_index_identique_au_parcours(seed):
+    df = _corpus(seed=seed)
+    index = IndexTitres(df["titre"])
+    requetes = _requetes(df, seed)
+    attendus = [df[df["titre"].str.contains(r, case=False, na=False)] for r in requetes]
+    for requete, attendu in zip(requetes, attendus):
+        pd.testing.assert_frame_equal(filtrer_par_titre(df, index, requete), attendu, obj=requete)
+    for requete, resultat, attendu in zip(requetes, filtrer_par_titres(df, index, requetes), attendus):
+        pd.testing.assert_frame_equal(resultat, attendu, obj=requete)
+
+
+def _distance_naive(motif, texte):
+    # Programmation dynamique de Sellers : début de la sous-chaîne libre dans le texte
+    ligne = [0] * (len(texte) + 1)
+    for i, c in enumerate(motif, start=1):
+        precedente, ligne = ligne, [i] + [0] * len(texte)
+        for j, t in enumerate(texte, start=1):
+            ligne[j] = min(precedente[j] + 1, ligne[j - 1] + 1, precedente[j - 1] + (c != t))
+    return min(ligne)
+
+
+def test_distance_sous_chaine():
+    rng = random.Random(0)
+    for _ in range(2000):
+        motif = "".join(rng.choice("abcd ") for _ in range(rng.randint(0, 12)))
+        texte = "".join(rng.choice("abcd ") for _ in range(rng.randint(0, 30)))
+        assert distance_sous_chaine(motif, texte) == _distance_naive(motif, texte), (motif, texte)
+    assert distance_sous_chaine("seigneur", "le seigneur des anneaux") == 0
+    assert distance_sous_chaine("siegneur", "le seigneur des anneaux") == 2
+
+
+CATALOGUE = pd.DataFrame({"titre": [
+    "Le Seigneur des anneaux", "Le Seigneur des mouches", "Les Anneaux de Saturne", "Dune", "Dunkerque",
+    "Le Petit Prince", "Le Prince de Machiavel", "Les Misérables", None, "Le Seigneur des Anneaux : Les Deux Tours",
+]})
+
+
+@pytest.mark.parametrize("requete, attendu", [
+    ("seigneur des aneaux", "Le Seigneur des anneaux"),
+    ("Segneur des anneaux", "Le Seigneur des anneaux"),
+    ("petit prnce", "Le Petit Prince"),
+    ("miserables", "Les Misérables"),
+])
+def test_recherche_approchee(requete, attendu):
+    index = IndexTitres(CATALOGUE["titre"])
+    result = rechercher_titres_approches(CATALOGUE, index, requete, k=3)
+    assert result["titre"].iloc[0] == attendu
+    assert result["score"].is_monotonic_decreasing
+    assert result["score"].between(0, 1).all()
+
+
+def test_recherche_approchee_titre_exact_en_tete():
+    index = IndexTitres(CATALOGUE["titre"])
+    result = rechercher_titres_approches(CATALOGUE, index, "le seigneur des anneaux")
+    assert result["titre"].iloc[0] == "Le Seigneur des anneaux"
+    assert "Le Seigneur des Anneaux : Les Deux Tours" in result["titre"].tolist()
+    # Trop d'erreurs : aucun résultat
+    assert rechercher_titres_approches(CATALOGUE, index, "xyzxyzxyz").empty
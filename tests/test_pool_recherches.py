@@ -0,0 +1,91 @@
+import asyncio
+import os
+import sys
+import threading
+import pytest
+from fastapi import HTTPException
+
+# Ajout du chemin pour accéder aux modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.pool_recherches import PoolRecherches, Surcharge
+from src import main as api
+
+
+def _bloquee(debut, fin):
+    # Recherche qui dure jusqu'à ce que le test la libère
+    debut.set()
+    fin.wait(5)
+    return threading.current_thread().name
+
+
+def test_execution_hors_boucle():
+    pool = PoolRecherches(nb_threads=2, max_en_attente=4, delai=5)
+    assert asyncio.run(pool.executer(lambda: threading.current_thread().name)).startswith("recherche")
+    pool.fermer()
+    # Sans threads : exécution directe dans la boucle d'événements
+    assert asyncio.run(PoolRecherches(nb_threads=0).executer(threading.current_thread)) is threading.current_thread()
+
+
+def test_surcharge():
+    pool = PoolRecherches(nb_threads=1, max_en_attente=2, delai=5)
+    debut, fin = threading.Event(), threading.Event()
+
+    async def scenario():
+        # Une recherche en cours et une en attente : la troisième est refusée
+        taches = [asyncio.create_task(pool.executer(_bloquee, debut, fin)) for _ in range(2)]
+        await asyncio.sleep(0)
+        await asyncio.to_thread(debut.wait, 5)
+        with pytest.raises(Surcharge):
+            await pool.executer(_bloquee, debut, fin)
+        fin.set()
+        await asyncio.gather(*taches)
+        # Les places sont libérées à la fin des recherches
+        return await pool.executer(lambda: "ok")
+
+    assert asyncio.run(scenario()) == "ok"
+    statistiques = pool.statistiques()
+    assert statistiques["refusees"] == 1 and statistiques["terminees"] == 3 and statistiques["en_cours"] == 0
+    pool.fermer()
+
+
+def test_delai_depasse():
+    pool = PoolRecherches(nb_threads=1, max_en_attente=4, delai=0.1)
+    debut, fin = threading.Event(), threading.Event()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(pool.executer(_bloquee, debut, fin))
+    assert pool.statistiques()["expirees"] == 1
+    # La recherche commencée garde sa place jusqu'à sa fin
+    assert pool.statistiques()["en_cours"] == 1
+    fin.set()
+    pool.fermer()
+
+
+def test_hors_boucle_503(monkeypatch):
+    pool = PoolRecherches(nb_threads=1, max_en_attente=1, delai=5)
+    monkeypatch.setattr(api, "pool_recherches", pool)
+    debut, fin = threading.Event(), threading.Event()
+
+    async def scenario():
+        tache = asyncio.create_task(api.hors_boucle(_bloquee, debut, fin))
+        await asyncio.sleep(0)
+        await asyncio.to_thread(debut.wait, 5)
+        with pytest.raises(HTTPException) as erreur:
+            await api.hors_boucle(_bloquee, debut, fin)
+        fin.set()
+        await tache
+        return erreur.value
+
+    erreur = asyncio.run(scenario())
+    assert erreur.status_code == 503 and erreur.headers == {"Retry-After": "1"}
+    pool.fermer()
+
+
+def test_hors_boucle_504(monkeypatch):
+    pool = PoolRecherches(nb_threads=1, max_en_attente=4, delai=0.1)
+    monkeypatch.setattr(api, "pool_recherches", pool)
+    debut, fin = threading.Event(), threading.Event()
+    with pytest.raises(HTTPException) as erreur:
+        asyncio.run(api.hors_boucle(_bloquee, debut, fin))
+    assert erreur.value.status_code == 504
+    fin.set()
+    pool.fermer()